@@ -0,0 +1,58 @@
+"""
+Generation of bootstrapped terminal stock prices with `BootstrapGenerator`
+(100,000 samples over 21 trading days, blocks of 5 returns), uncached and
+cached, compared with gathering the returns of every sample and with drawing
+blocks with pandas per sample.
+
+Usage: python benchmarks/bench_bootstrap.py [number of samples]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from optionsmonkey.bootstrap import BootstrapGenerator
+
+HORIZON = 21
+BLOCK_SIZE = 5
+
+
+def main(n: int = 100000) -> None:
+    returns = np.random.default_rng(0).normal(0.0005, 0.02, 1260)
+    generator = BootstrapGenerator(returns={"XYZ": returns}, block_size=BLOCK_SIZE)
+
+    start = time.perf_counter()
+    generator.samples("XYZ", 100.0, HORIZON, n, seed=0)
+    print(f"Uncached:        {(time.perf_counter() - start) * 1e3:9.2f} ms")
+
+    start = time.perf_counter()
+    generator.samples("XYZ", 100.0, HORIZON, n, seed=0)
+    print(f"Cached:          {(time.perf_counter() - start) * 1e3:9.2f} ms")
+
+    # Returns gathered into a (samples x horizon) array of indices
+    start = time.perf_counter()
+    rng = np.random.default_rng(0)
+    nblocks = -(-HORIZON // BLOCK_SIZE)
+    starts = rng.integers(0, returns.shape[0] - BLOCK_SIZE + 1, (n, nblocks, 1))
+    indices = (starts + np.arange(BLOCK_SIZE)).reshape(n, -1)[:, :HORIZON]
+    100.0 * np.exp(returns[indices].sum(axis=1))
+    print(f"Gathered:        {(time.perf_counter() - start) * 1e3:9.2f} ms")
+
+    # Blocks drawn with pandas sample by sample, extrapolated
+    sample = min(n, 1000)
+    series = pd.Series(returns)
+    start = time.perf_counter()
+
+    for _ in range(sample):
+        positions = series.iloc[: -BLOCK_SIZE + 1].sample(nblocks, replace=True).index
+        blocks = [series.iloc[p : p + BLOCK_SIZE] for p in positions]
+        100.0 * np.exp(pd.concat(blocks).iloc[:HORIZON].sum())
+
+    elapsed = (time.perf_counter() - start) * n / sample
+    print(f"pandas:          {elapsed * 1e3:9.2f} ms (extrapolated)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""
+Backtest-style scan of a year of daily options chain snapshots stored in a
+`ChainArchive`, compared with keeping them as `OptionsChain` data frames: the
+at-the-money call of every expiration is looked up in each snapshot.
+
+Usage: python benchmarks/bench_chain_archive.py [number of days]
+"""
+
+import datetime as dt
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from optionsmonkey.chain_archive import ChainArchive
+from optionsmonkey.engine import LegType
+from optionsmonkey.providers import SyntheticProvider
+
+
+def main(ndays: int = 250) -> None:
+    start_date = dt.date(2023, 1, 2)
+    prices = SyntheticProvider({"XYZ": 100.0}, start_date=start_date).get_stock_history(
+        "XYZ", 0, start=start_date - dt.timedelta(days=ndays * 7 // 5)
+    )["Close"]
+
+    with tempfile.TemporaryDirectory() as path:
+        archive = ChainArchive(path)
+        frame_bytes = 0
+        start = time.perf_counter()
+
+        for date, price in prices.items():
+            provider = SyntheticProvider({"XYZ": price}, start_date=date.date())
+            chains = {
+                expiration: provider.get_options_chain("XYZ", expiration)
+                for expiration in provider.get_expirations("XYZ")
+            }
+            frame_bytes += sum(
+                chain.calls.memory_usage(deep=True).sum()
+                + chain.puts.memory_usage(deep=True).sum()
+                for chain in chains.values()
+            )
+            archive.append("XYZ", date.date(), chains)
+
+        print(f"Append {prices.shape[0]} days: {time.perf_counter() - start:8.3f} s")
+        print(f"Data frames: {frame_bytes / 2**20:8.1f} MiB held in memory")
+
+        start = time.perf_counter()
+        lookups = 0
+
+        for snapshot in archive.snapshots("XYZ"):
+            calls = snapshot.type == LegType.CALL
+            atm = np.abs(snapshot.strike - snapshot.stock_price) + np.where(
+                calls, 0.0, np.inf
+            )
+
+            for expiration in snapshot.expirations():
+                rows = snapshot.rows(expiration, "call")
+                row = rows.start + int(np.argmin(atm[rows]))
+                lookups += snapshot.bid[row] + snapshot.ask[row] > 0.0
+
+        print(
+            f"Scan: {time.perf_counter() - start:8.3f} s "
+            f"({lookups} at-the-money calls)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
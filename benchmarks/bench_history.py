@@ -0,0 +1,45 @@
+"""
+Bulk loading of stock price histories through a `HistoryStore`: a year of
+daily bars of many tickers is fetched from a `SyntheticProvider` into an empty
+store, brought up to date again, and read back as a panel of closing prices.
+
+Usage: python benchmarks/bench_history.py [number of tickers]
+"""
+
+import sys
+import tempfile
+import time
+
+from optionsmonkey.api import update_stock_histories
+from optionsmonkey.history_store import HistoryStore
+from optionsmonkey.providers import SyntheticProvider
+
+
+def main(ntickers: int = 5000) -> None:
+    tickers = [f"T{i:04d}" for i in range(ntickers)]
+    provider = SyntheticProvider({ticker: 100.0 for ticker in tickers})
+
+    with tempfile.TemporaryDirectory() as path:
+        store = HistoryStore(path)
+        update = dict(store=store, rate=1e9, burst=1e9, provider=provider)
+
+        start = time.perf_counter()
+        update_stock_histories(tickers, 12, **update)
+        print(f"Initial load:  {time.perf_counter() - start:8.3f} s")
+
+        # Only the last bar of each ticker is fetched again
+        store.ttl = 0.0
+        start = time.perf_counter()
+        update_stock_histories(tickers, 12, **update)
+        print(f"Update:        {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        panel = store.load_panel(tickers)
+        print(
+            f"Panel {panel.shape[0]} x {panel.shape[1]}: "
+            f"{time.perf_counter() - start:8.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,99 @@
+"""
+Construction cost per strategy of `Inputs`, validated vs. trusted paths.
+
+Usage: python benchmarks/bench_inputs.py [number of strategies]
+"""
+
+import datetime as dt
+import sys
+import timeit
+
+import numpy as np
+
+from optionsmonkey.models import Inputs
+
+MARKET = dict(
+    stock_price=168.99,
+    volatility=0.483,
+    start_date=dt.date(2023, 1, 16),
+    target_date=dt.date(2023, 2, 17),
+    interest_rate=0.045,
+    min_stock=68.99,
+    max_stock=268.99,
+)
+EXPIRATION = dt.date(2023, 2, 17)
+
+
+def make_candidates(nstrategies: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    lower = np.round(rng.uniform(140.0, 180.0, nstrategies), 0)
+
+    return np.column_stack((lower, lower + 5.0))
+
+
+def validated(strikes: np.ndarray) -> None:
+    for low, high in strikes.tolist():
+        Inputs.model_validate(
+            MARKET
+            | dict(
+                strategy=[
+                    {
+                        "type": "call",
+                        "strike": low,
+                        "premium": 6.5,
+                        "n": 100,
+                        "action": "buy",
+                        "expiration": EXPIRATION,
+                    },
+                    {
+                        "type": "call",
+                        "strike": high,
+                        "premium": 4.1,
+                        "n": 100,
+                        "action": "sell",
+                        "expiration": EXPIRATION,
+                    },
+                ]
+            )
+        )
+
+
+def trusted(strikes: np.ndarray) -> None:
+    template = Inputs.model_validate(
+        MARKET
+        | dict(
+            strategy=[
+                {
+                    "type": "call",
+                    "strike": 150.0,
+                    "premium": 6.5,
+                    "n": 100,
+                    "action": "buy",
+                    "expiration": EXPIRATION,
+                },
+                {
+                    "type": "call",
+                    "strike": 155.0,
+                    "premium": 4.1,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": EXPIRATION,
+                },
+            ]
+        )
+    )
+
+    for low, high in strikes.tolist():
+        template.derive(strategy=[{"strike": low}, {"strike": high}])
+
+
+def main(nstrategies: int = 10000) -> None:
+    strikes = make_candidates(nstrategies)
+
+    for name, func in (("validated", validated), ("trusted", trusted)):
+        elapsed = min(timeit.repeat(lambda: func(strikes), number=1, repeat=3))
+        print(f"{name:>10}: {elapsed / nstrategies * 1e6:8.2f} us per strategy")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
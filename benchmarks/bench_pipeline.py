@@ -0,0 +1,82 @@
+"""
+Throughput of the whole pipeline with no network: options chains of many
+tickers are fetched concurrently from a `SyntheticProvider`, and a bull call
+spread near the money is evaluated on each chain.
+
+Usage: python benchmarks/bench_pipeline.py [number of tickers]
+"""
+
+import sys
+import time
+
+from optionsmonkey.api import get_options_chains
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs, OptionsChain
+from optionsmonkey.providers import SyntheticProvider
+
+
+def make_inputs(provider: SyntheticProvider, chain: OptionsChain, expiration) -> Inputs:
+    price = chain.underlying.regular_market_price
+    calls = chain.calls.set_index("strike")
+    lower = calls.index[calls.index <= price][-1]
+    upper = calls.index[calls.index > price * 1.05][0]
+
+    return Inputs(
+        stock_price=price,
+        volatility=provider.volatility,
+        interest_rate=provider.interest_rate,
+        min_stock=price * 0.5,
+        max_stock=price * 1.5,
+        start_date=provider.start_date,
+        target_date=expiration,
+        strategy=[
+            {
+                "type": "call",
+                "strike": float(lower),
+                "premium": float(calls.loc[lower, "ask"]),
+                "n": 100,
+                "action": "buy",
+                "expiration": expiration,
+            },
+            {
+                "type": "call",
+                "strike": float(upper),
+                "premium": float(calls.loc[upper, "bid"]),
+                "n": 100,
+                "action": "sell",
+                "expiration": expiration,
+            },
+        ],
+    )
+
+
+def main(ntickers: int = 50) -> None:
+    provider = SyntheticProvider(
+        {f"T{i:03d}": 20.0 + 5.0 * i for i in range(ntickers)}, nexpirations=4
+    )
+    pairs = [
+        (ticker, expiration)
+        for ticker in provider.quotes
+        for expiration in provider.get_expirations(ticker)
+    ]
+
+    start = time.perf_counter()
+    results = list(get_options_chains(pairs, rate=1e9, burst=1e9, provider=provider))
+    fetched = time.perf_counter()
+
+    for result in results:
+        assert result.chain is not None
+        StrategyEngine(
+            make_inputs(provider, result.chain, result.expiration_date)
+        ).run()
+
+    end = time.perf_counter()
+    print(
+        f"{len(pairs)} chains: fetch {fetched - start:.3f} s, "
+        f"evaluate {end - fetched:.3f} s "
+        f"({len(pairs) / (end - start):.1f} chains/s)"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
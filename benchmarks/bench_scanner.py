@@ -0,0 +1,89 @@
+"""
+Strategy scanner: all the iron condors of a synthetic options chain are
+evaluated with 'scan_strategies()', compared with building and running a
+'StrategyEngine' per candidate, extrapolated from a sample of the candidates.
+
+Usage: python benchmarks/bench_scanner.py [number of strikes]
+"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+from optionsmonkey.providers import SyntheticProvider
+from optionsmonkey.scanner import get_strategy, scan_strategies
+
+
+def main(nstrikes: int = 101) -> None:
+    start_date = dt.date(2024, 1, 8)
+    provider = SyntheticProvider(
+        {"XYZ": 100.0}, nstrikes=nstrikes, start_date=start_date
+    )
+    expiration = provider.get_expirations("XYZ")[3]
+    chain = provider.get_options_chain("XYZ", expiration)
+    inputs = Inputs(
+        stock_price=100.0,
+        volatility=0.3,
+        interest_rate=0.045,
+        min_stock=50.0,
+        max_stock=150.0,
+        start_date=start_date,
+        target_date=expiration,
+        strategy=[{"type": "stock", "n": 100, "action": "buy"}],
+    )
+    days_to_target = StrategyEngine(inputs).days_to_target
+    ncandidates = _count_iron_condors(chain)
+
+    start = time.perf_counter()
+    candidates = scan_strategies(
+        chain,
+        days_to_target,
+        0.3,
+        interest_rate=0.045,
+        strategies=["iron-condor"],
+        k=100,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'scanner':10s} {elapsed:8.3f} s, {ncandidates} candidates "
+        f"({ncandidates / elapsed:,.0f} per second)"
+    )
+
+    # Baseline on a sample of the candidates, extrapolated to all of them
+    start = time.perf_counter()
+
+    for _, candidate in candidates.iterrows():
+        StrategyEngine(
+            inputs.model_copy(update={"strategy": get_strategy(candidate, expiration)})
+        ).run()
+
+    elapsed = (time.perf_counter() - start) * ncandidates / candidates.shape[0]
+    print(f"{'engines':10s} {elapsed:8.3f} s (extrapolated)")
+
+
+def _count_iron_condors(chain) -> int:
+    # Combinations of bought and sold puts and calls with increasing strikes
+    legs = [
+        (chain.puts, "ask"),
+        (chain.puts, "bid"),
+        (chain.calls, "bid"),
+        (chain.calls, "ask"),
+    ]
+    strikes = [
+        np.sort(options["strike"][options[side] > 0.0]) for options, side in legs
+    ]
+    counts = np.ones(strikes[0].shape[0])
+
+    for below, above in zip(strikes[:-1], strikes[1:]):
+        cumsum = np.concatenate(([0.0], np.cumsum(counts)))
+        counts = cumsum[np.searchsorted(below, above, side="left")]
+
+    return int(counts.sum())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""
+Round-trip cost of 100k strategy results: binary batches vs. JSON.
+
+Usage: python benchmarks/bench_serialization.py [number of results]
+"""
+
+import dataclasses
+import datetime as dt
+import json
+import sys
+import time
+
+import numpy as np
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs, Outputs
+from optionsmonkey.serialization import dumps_outputs, loads_outputs
+
+
+def make_results(nresults: int):
+    inputs = Inputs.model_validate(
+        dict(
+            stock_price=168.99,
+            volatility=0.483,
+            start_date=dt.date(2023, 1, 16),
+            target_date=dt.date(2023, 2, 17),
+            interest_rate=0.045,
+            min_stock=68.99,
+            max_stock=268.99,
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "call",
+                    "strike": 185.0,
+                    "premium": 4.1,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": dt.date(2023, 2, 17),
+                },
+            ],
+        )
+    )
+    raw = StrategyEngine(inputs).run(validate=False)
+    noise = np.random.default_rng(0).normal(size=nresults).tolist()
+
+    return [
+        dataclasses.replace(raw, probability_of_profit=0.5 + 0.01 * value)
+        for value in noise
+    ]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+
+    return result, time.perf_counter() - start
+
+
+def main(nresults: int = 100000) -> None:
+    raw = make_results(nresults)
+    outputs = [output.to_pydantic() for output in raw]
+
+    buffer, encode = timed(lambda: dumps_outputs(raw))
+    batch, decode = timed(lambda: loads_outputs(buffer))
+    _, access = timed(lambda: batch.columns["probability_of_profit"].mean())
+    print(
+        f"binary: {len(buffer) / 1e6:7.1f} MB, encode {encode:6.3f} s, "
+        f"decode {decode * 1e3:6.3f} ms, column scan {access * 1e3:6.3f} ms"
+    )
+
+    # JSON has no infinity, so the standard library's extension is used
+    payload, encode = timed(
+        lambda: [json.dumps(output.model_dump()) for output in outputs]
+    )
+    _, decode = timed(
+        lambda: [Outputs.model_validate(json.loads(item)) for item in payload]
+    )
+    size = sum(len(item) for item in payload)
+    print(
+        f"  json: {size / 1e6:7.1f} MB, encode {encode:6.3f} s, decode {decode:6.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
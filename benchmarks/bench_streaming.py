@@ -0,0 +1,108 @@
+"""
+Streaming quote updates through a `SubscriptionEngine`: vertical spreads on
+ten stocks are subscribed, and a stream of random option quote updates (with a
+stock price update every 100 updates) is processed in micro-batches. Reports
+the per-update latency, the queue depth and the number of evaluations, compared
+with re-evaluating every strategy on the stock for each update.
+
+Usage: python benchmarks/bench_streaming.py [number of strategies] [number of updates]
+"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+
+from optionsmonkey.models import Inputs
+from optionsmonkey.streaming import QuoteUpdate, SubscriptionEngine
+
+START_DATE = dt.date(2024, 1, 8)
+EXPIRATIONS = (dt.date(2024, 2, 16), dt.date(2024, 3, 15))
+STRIKES = np.arange(80.0, 121.0, 2.5)
+STOCKS = [f"S{i}" for i in range(10)]
+
+
+def make_inputs(rng: np.random.Generator) -> Inputs:
+    expiration = EXPIRATIONS[rng.integers(2)]
+    lower, upper = np.sort(rng.choice(STRIKES, 2, replace=False))
+
+    return Inputs(
+        stock_price=100.0,
+        volatility=0.3,
+        interest_rate=0.045,
+        min_stock=50.0,
+        max_stock=150.0,
+        start_date=START_DATE,
+        target_date=expiration,
+        strategy=[
+            {
+                "type": "call",
+                "strike": float(strike),
+                "premium": 2.0,
+                "n": 100,
+                "action": action,
+                "expiration": expiration,
+            }
+            for strike, action in ((lower, "buy"), (upper, "sell"))
+        ],
+    )
+
+
+def make_updates(rng: np.random.Generator, nupdates: int) -> list[QuoteUpdate]:
+    updates = []
+
+    for i in range(nupdates):
+        stock = STOCKS[rng.integers(len(STOCKS))]
+
+        if i % 100 == 99:
+            updates.append(QuoteUpdate(stock, 100.0 + rng.normal()))
+        else:
+            mid = 1.0 + rng.random()
+            updates.append(
+                QuoteUpdate(
+                    stock,
+                    mid,
+                    mid - 0.05,
+                    mid + 0.05,
+                    "call",
+                    float(rng.choice(STRIKES)),
+                    EXPIRATIONS[rng.integers(2)],
+                )
+            )
+
+    return updates
+
+
+def main(nstrategies: int = 300, nupdates: int = 1000) -> None:
+    rng = np.random.default_rng(0)
+    updates = make_updates(rng, nupdates)
+
+    for batch_size in (1, 16, 256):
+        engine = SubscriptionEngine(batch_size=batch_size)
+
+        for i in range(nstrategies):
+            engine.subscribe(i, STOCKS[i % len(STOCKS)], make_inputs(rng))
+
+        engine.process()  # First evaluation of every strategy
+        engine.stats.evaluations = engine.stats.batches = 0
+        start = time.perf_counter()
+
+        # All the updates arrive at once, as after a burst of market activity
+        for update in updates:
+            engine.publish(update)
+
+        engine.run([])
+        stats = engine.stats
+        print(
+            f"batch {batch_size:3d}: {time.perf_counter() - start:7.3f} s, "
+            f"latency p50 {stats.latency(50) * 1e3:8.1f} ms "
+            f"p99 {stats.latency(99) * 1e3:8.1f} ms, "
+            f"max queue {stats.max_queue_depth:5d}, "
+            f"{stats.evaluations:6d} evaluations "
+            f"(vs {nupdates * nstrategies // len(STOCKS)} rerunning the stock)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
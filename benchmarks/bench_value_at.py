@@ -0,0 +1,81 @@
+"""
+Latency of point queries of a 20-leg strategy's P/L with
+`StrategyEngine.value_at()`, for 1 to 10 spots, compared with a full `run()`.
+
+Usage: python benchmarks/bench_value_at.py [number of queries]
+"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+
+MARKET = dict(
+    stock_price=168.99,
+    volatility=0.483,
+    start_date=dt.date(2023, 1, 16),
+    target_date=dt.date(2023, 2, 17),
+    interest_rate=0.045,
+    min_stock=68.99,
+    max_stock=268.99,
+)
+EXPIRATIONS = (dt.date(2023, 2, 17), dt.date(2023, 3, 17))
+
+
+def make_strategy() -> list[dict]:
+    strategy: list[dict] = [{"type": "stock", "n": 100, "action": "buy"}]
+
+    for i in range(19):
+        strategy.append(
+            {
+                "type": ("call", "put")[i % 2],
+                "strike": 140.0 + 5.0 * i,
+                "premium": 4.0,
+                "n": 10,
+                "action": ("buy", "sell")[i % 3 == 0],
+                "expiration": EXPIRATIONS[i % 2],
+            }
+        )
+
+    return strategy
+
+
+def percentiles(timings: list[float]) -> str:
+    p50, p99 = np.percentile(np.array(timings) * 1e6, [50, 99])
+
+    return f"p50 {p50:9.1f} us   p99 {p99:9.1f} us"
+
+
+def main(nqueries: int = 10000) -> None:
+    inputs = Inputs.model_validate(MARKET | dict(strategy=make_strategy()))
+    engine = StrategyEngine(inputs)
+    engine.value_at(MARKET["stock_price"])  # Compiles the strategy
+    rng = np.random.default_rng(0)
+
+    for nspots in (1, 2, 5, 10):
+        timings = []
+        spots = MARKET["stock_price"] + rng.normal(0.0, 1.0, (nqueries, nspots))
+
+        for query in spots:
+            start = time.perf_counter()
+            engine.value_at(query)
+            timings.append(time.perf_counter() - start)
+
+        print(f"value_at, {nspots:2d} spots: {percentiles(timings)}")
+
+    timings = []
+
+    for _ in range(20):
+        start = time.perf_counter()
+        StrategyEngine(inputs).run()
+        timings.append(time.perf_counter() - start)
+
+    print(f"run():              {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
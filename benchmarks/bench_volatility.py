@@ -0,0 +1,50 @@
+"""
+Historical volatility estimators over a universe of tickers: each estimator is
+computed on (tickers x days) OHLC arrays of a year of daily prices, compared
+with pandas 'rolling().apply()' per ticker for the close-to-close estimator.
+
+Usage: python benchmarks/bench_volatility.py [number of tickers]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from optionsmonkey import volatility
+
+
+def main(ntickers: int = 5000, ndays: int = 252, window: int = 21) -> None:
+    rng = np.random.default_rng(0)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, (ntickers, ndays)), axis=1))
+    open = close * np.exp(rng.normal(0.0, 0.01, close.shape))
+    high = np.maximum(open, close) * np.exp(rng.uniform(0.0, 0.01, close.shape))
+    low = np.minimum(open, close) * np.exp(-rng.uniform(0.0, 0.01, close.shape))
+    estimators = {
+        "close_to_close": lambda: volatility.close_to_close(close, window),
+        "ewma": lambda: volatility.ewma(close),
+        "parkinson": lambda: volatility.parkinson(high, low, window),
+        "garman_klass": lambda: volatility.garman_klass(open, high, low, close, window),
+        "yang_zhang": lambda: volatility.yang_zhang(open, high, low, close, window),
+    }
+
+    for name, estimator in estimators.items():
+        start = time.perf_counter()
+        estimator()
+        print(f"{name:15s} {time.perf_counter() - start:8.3f} s")
+
+    # Baseline on a sample of the tickers, extrapolated to the universe
+    sample = min(ntickers, 100)
+    start = time.perf_counter()
+
+    for row in close[:sample]:
+        returns = pd.Series(np.log(row[1:] / row[:-1]))
+        returns.rolling(window).apply(lambda x: x.std() * np.sqrt(252), raw=True)
+
+    elapsed = (time.perf_counter() - start) * ntickers / sample
+    print(f"{'pandas apply':15s} {elapsed:8.3f} s (close_to_close, extrapolated)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
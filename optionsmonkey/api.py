@@ -1,21 +1,346 @@
 import datetime as dt
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from importlib.util import find_spec
+from threading import Lock
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, TypeVar
 
 import pandas as pd
-from yfinance import Ticker
+import requests
+import yfinance
 
+from optionsmonkey.chain_cache import ChainCache
+from optionsmonkey.history_store import HistoryStore
 from optionsmonkey.models import OptionsChain
+from optionsmonkey.providers import MarketDataProvider, YFinanceProvider
 
 
-def get_options_chain(ticker: str, expiration_date: dt.date) -> OptionsChain:
-    stock = Ticker(ticker)
-    res = stock.option_chain(expiration_date.strftime("%Y-%m-%d"))
-    return OptionsChain(
-        calls=res.calls,
-        puts=res.puts,
-        underlying=res.underlying,
+def _create_session() -> Any:
+    # Recent yfinance versions only accept curl_cffi sessions
+    if find_spec("curl_cffi") is not None:
+        from curl_cffi import requests as curl_requests
+
+        return curl_requests.Session(impersonate="chrome")
+
+    return requests.Session()
+
+
+# HTTP session shared by all the downloads, so that connections are pooled
+default_session: Any = _create_session()
+# Provider used when none is passed to the functions below
+default_provider: MarketDataProvider = YFinanceProvider(default_session)
+
+# Cache used when none is passed to 'get_options_chain()', e.g., to run the
+# tests offline from a directory of stored chains
+default_cache: ChainCache | None = (
+    ChainCache(
+        os.environ["OPTIONSMONKEY_CACHE_DIR"],
+        offline=os.environ.get("OPTIONSMONKEY_OFFLINE", "") not in ("", "0"),
+    )
+    if os.environ.get("OPTIONSMONKEY_CACHE_DIR")
+    else None
+)
+# Store used when none is passed to 'get_stock_history()'
+default_history_store: HistoryStore | None = (
+    HistoryStore(os.environ["OPTIONSMONKEY_HISTORY_DIR"])
+    if os.environ.get("OPTIONSMONKEY_HISTORY_DIR")
+    else None
+)
+
+T = TypeVar("T")
+
+# Errors worth retrying: network failures, besides HTTP 429 and 5xx responses
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+if find_spec("curl_cffi") is not None:
+    from curl_cffi.requests import exceptions as curl_exceptions
+
+    TRANSIENT_ERRORS += (curl_exceptions.ConnectionError, curl_exceptions.Timeout)
+
+# Raised by recent yfinance versions when Yahoo throttles the requests
+if hasattr(getattr(yfinance, "exceptions", None), "YFRateLimitError"):
+    TRANSIENT_ERRORS += (yfinance.exceptions.YFRateLimitError,)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter, allowing 'rate' requests per second
+    on average and bursts of up to 'capacity' requests.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        """
+        Takes a token, waiting until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+
+                    return
+
+                wait = (1.0 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class ChainResult(NamedTuple):
+    ticker: str
+    expiration_date: dt.date
+    chain: OptionsChain | None
+    error: BaseException | None = None
+
+
+def _retry(
+    func: Callable[[], T], limiter: TokenBucket, retries: int, backoff: float
+) -> T:
+    """
+    Calls 'func' after taking a token from 'limiter', retrying transient errors
+    up to 'retries' times with exponential backoff starting at 'backoff'
+    seconds. Other errors are raised at once.
+    """
+    for attempt in range(retries):
+        limiter.acquire()
+
+        try:
+            return func()
+        except Exception as error:
+            if not _is_transient(error):
+                raise
+
+            time.sleep(backoff * 2**attempt)
+
+    limiter.acquire()
+
+    return func()
+
+
+def _is_transient(error: BaseException) -> bool:
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+
+    status = getattr(getattr(error, "response", None), "status_code", None)
+
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+
+def _get_cached_chain(
+    cache: ChainCache | None, ticker: str, expiration_date: dt.date
+) -> OptionsChain | None:
+    if cache is None:
+        return None
+
+    chain = cache.get(ticker, expiration_date)
+
+    if chain is None and cache.offline:
+        raise RuntimeError(
+            f"No cached options chain for {ticker} expiring on "
+            f"{expiration_date} in offline mode!"
+        )
+
+    return chain
+
+
+def get_options_chain(
+    ticker: str,
+    expiration_date: dt.date,
+    cache: ChainCache | None = None,
+    ttl: float | None = None,
+    provider: MarketDataProvider | None = None,
+) -> OptionsChain:
+    """
+    Returns the options chain of a ticker for an expiration date from
+    'provider' ('default_provider' if None). If a cache is
+    given (or 'default_cache' is set), a fresh cached chain is returned when
+    available, and downloaded chains are stored in it with a TTL of 'ttl'
+    seconds (the cache's TTL if None). An offline cache never downloads chains.
+    """
+    cache = cache or default_cache
+    chain = _get_cached_chain(cache, ticker, expiration_date)
+
+    if chain is not None:
+        return chain
+
+    chain = (provider or default_provider).get_options_chain(ticker, expiration_date)
+
+    if cache is not None:
+        cache.put(ticker, expiration_date, chain, ttl)
+
+    return chain
+
+
+def get_options_chains(
+    pairs: Iterable[tuple[str, dt.date]],
+    max_workers: int = 8,
+    rate: float = 2.0,
+    burst: float = 4.0,
+    retries: int = 3,
+    backoff: float = 1.0,
+    session: Any = None,
+    cache: ChainCache | None = None,
+    ttl: float | None = None,
+    fetch: Callable[[str, dt.date, Any], OptionsChain] | None = None,
+    provider: MarketDataProvider | None = None,
+) -> Iterator[ChainResult]:
+    """
+    Fetches the options chains of many (ticker, expiration date) pairs
+    concurrently from a pool of 'max_workers' threads, yielding a `ChainResult`
+    for each pair as soon as it completes.
+
+    Downloads share the HTTP 'session' ('default_session' if None) and a token
+    bucket allowing 'rate' requests per second with bursts of 'burst' requests.
+    Downloads failing with a network error or an HTTP 429 or 5xx response are
+    retried up to 'retries' times, waiting 'backoff' seconds before the first
+    retry and doubling the wait on each further one. A pair that still fails,
+    or fails with any other error, is yielded with its error. Cached chains
+    are served as in 'get_options_chain()' without counting against the rate
+    limit. Downloads not started yet are cancelled if the consumer stops
+    iterating early.
+
+    Chains are fetched from 'provider' or, if None, from Yahoo Finance through
+    'session'. 'fetch' replaces the download function altogether; it is called
+    with the ticker, the expiration date and the session.
+    """
+    cache = cache or default_cache
+    source = provider or (
+        YFinanceProvider(session) if session is not None else default_provider
     )
+    session = default_session if session is None else session
+    limiter = TokenBucket(rate, burst)
+
+    def fetch_chain(ticker: str, expiration_date: dt.date) -> OptionsChain:
+        if fetch is not None:
+            return fetch(ticker, expiration_date, session)
+
+        return source.get_options_chain(ticker, expiration_date)
+
+    def get(ticker: str, expiration_date: dt.date) -> OptionsChain:
+        chain = _get_cached_chain(cache, ticker, expiration_date)
+
+        if chain is None:
+            chain = _retry(
+                lambda: fetch_chain(ticker, expiration_date), limiter, retries, backoff
+            )
+
+            if cache is not None:
+                cache.put(ticker, expiration_date, chain, ttl)
+
+        return chain
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    try:
+        futures = {
+            pool.submit(get, ticker, expiration_date): (ticker, expiration_date)
+            for ticker, expiration_date in pairs
+        }
+
+        for future in as_completed(futures):
+            ticker, expiration_date = futures[future]
+            error = future.exception()
+
+            if error is None:
+                yield ChainResult(ticker, expiration_date, future.result())
+            else:
+                yield ChainResult(ticker, expiration_date, None, error)
+    finally:
+        # Also runs when the generator is closed before the end
+        pool.shutdown(cancel_futures=True)
+
+
+def _update_history(
+    store: HistoryStore,
+    provider: MarketDataProvider,
+    ticker: str,
+    start: dt.date,
+    fetch: Callable[[Callable[[], pd.DataFrame]], pd.DataFrame] = lambda f: f(),
+) -> None:
+    for range_start, range_end in store.missing(ticker, start):
+        bars = fetch(
+            lambda: provider.get_stock_history(ticker, 0, range_start, range_end)
+        )
+        store.merge(ticker, bars, range_start, range_end)
+
+
+def get_stock_history(
+    ticker: str,
+    num_of_months: int,
+    provider: MarketDataProvider | None = None,
+    store: HistoryStore | None = None,
+) -> pd.DataFrame:
+    """
+    Returns the daily bars of a stock over the last 'num_of_months' months from
+    'provider' ('default_provider' if None). If a store is given (or
+    'default_history_store' is set), only the bars missing from the store are
+    fetched, and the bars are served from the store.
+    """
+    provider = provider or default_provider
+    store = store or default_history_store
+
+    if store is None:
+        return provider.get_stock_history(ticker, num_of_months)
+
+    start = (pd.Timestamp.today() - pd.DateOffset(months=num_of_months)).date()
+    _update_history(store, provider, ticker, start)
+
+    return store.load(ticker, start)
+
+
+def update_stock_histories(
+    tickers: Iterable[str],
+    num_of_months: int,
+    store: HistoryStore,
+    max_workers: int = 8,
+    rate: float = 2.0,
+    burst: float = 4.0,
+    retries: int = 3,
+    backoff: float = 1.0,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, BaseException]:
+    """
+    Brings the stored histories of many tickers up to date over the last
+    'num_of_months' months, fetching the missing bars concurrently with the
+    rate limit and retries of 'get_options_chains()'. Returns the error of
+    each ticker that could not be updated. The histories can then be read in
+    bulk with 'store.load_panel()'.
+    """
+    provider = provider or default_provider
+    start = (pd.Timestamp.today() - pd.DateOffset(months=num_of_months)).date()
+    limiter = TokenBucket(rate, burst)
+    errors = {}
+
+    def fetch(func: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        return _retry(func, limiter, retries, backoff)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_update_history, store, provider, ticker, start, fetch): ticker
+            for ticker in tickers
+        }
+
+        for future in as_completed(futures):
+            error = future.exception()
 
+            if error is not None:
+                errors[futures[future]] = error
 
-def get_stock_history(ticker: str, num_of_months: int) -> pd.DataFrame:
-    stock = Ticker(ticker)
-    return stock.history(period=f"{num_of_months}mo")
+    return errors
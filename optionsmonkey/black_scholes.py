@@ -7,17 +7,21 @@ from numpy.lib.scimath import log, sqrt
 
 from optionsmonkey.models import OptionType, BlackScholesInfo
 
+# Every function below is vectorized over its stock price, strike, volatility,
+# time and 'd1'/'d2' arguments, which can be floats or numpy arrays
+FloatOrArray = float | np.ndarray
+
 
 def get_option_price(
     optype: OptionType,
-    s0: float,
-    x: float,
+    s0: FloatOrArray,
+    x: FloatOrArray,
     r: float,
-    time2maturity: float,
-    d1: float,
-    d2: float,
+    time2maturity: FloatOrArray,
+    d1: FloatOrArray,
+    d2: FloatOrArray,
     y: float = 0.0,
-) -> float:
+) -> FloatOrArray:
     """
     Returns the price of an option (call or put) given the current stock price 's0' and the option
     strike 'x', as well as the annualized risk-free rate 'r', the time remaining
@@ -25,10 +29,7 @@ def get_option_price(
     formula, and the stocks's annualized dividend yield 'y' (default is zero,
     i.e., the stock does not pay dividends).
     """
-    if y > 0.0:
-        s = s0 * exp(-y * time2maturity)
-    else:
-        s = s0
+    s = s0 * exp(-y * time2maturity) if y > 0.0 else s0
 
     if optype == "call":
         return round(
@@ -45,30 +46,35 @@ def get_option_price(
 
 def get_implied_vol(
     optype: OptionType,
-    oprice: float,
-    s0: float,
-    x: float,
+    oprice: FloatOrArray,
+    s0: FloatOrArray,
+    x: FloatOrArray,
     r: float,
-    time2maturity: float,
+    time2maturity: FloatOrArray,
     y: float = 0.0,
-) -> float:
+) -> FloatOrArray:
     """
     Estimates the implied volatility taking the option type (call or put), the option price, the current
     stock price 's0', the option strike 'x', the annualized risk-free rate 'r',
     the time remaining to maturity in units of year, and the stocks's annualized
     dividend yield 'y' (default is zero,i.e., the stock does not pay dividends)
-    as arguments.
+    as arguments. If the option price, the strike or the time remaining to
+    maturity are numpy arrays, one implied volatility per option is returned.
     """
-    vol = 0.001 * arange(1, 1001)
+    ndim = max(np.ndim(oprice), np.ndim(x), np.ndim(time2maturity))
+    vol = (0.001 * arange(1, 1001)).reshape((-1,) + (1,) * ndim)
     d1, d2 = get_d1_d2(s0, x, r, vol, time2maturity, y)
     dopt = abs(get_option_price(optype, s0, x, r, time2maturity, d1, d2, y) - oprice)
 
-    return vol[argmin(dopt)]
+    return vol.reshape(-1)[argmin(dopt, axis=0)]
 
 
 def get_delta(
-    optype: OptionType, d1: float, time2maturity: float = 0.0, y: float = 0.0
-) -> float:
+    optype: OptionType,
+    d1: FloatOrArray,
+    time2maturity: FloatOrArray = 0.0,
+    y: float = 0.0,
+) -> FloatOrArray:
     """
     Computes the Greek Delta for an option (call or put) taking 'd1' as defined in the
     Black-Scholes formula as a mandatory argument. Optionally, the time remaining to
@@ -77,8 +83,8 @@ def get_delta(
     The Greek Delta estimates how the option price varies as the stock price increases or
     decreases by $1.
     """
-    if y > 0.0 and time2maturity > 0.0:
-        yfac = exp(-y * time2maturity)
+    if y > 0.0:
+        yfac: FloatOrArray = exp(-y * time2maturity)
     else:
         yfac = 1.0
 
@@ -91,8 +97,12 @@ def get_delta(
 
 
 def get_gamma(
-    s0: float, vol: float, time2maturity: float, d1: float, y: float = 0.0
-) -> float:
+    s0: FloatOrArray,
+    vol: FloatOrArray,
+    time2maturity: FloatOrArray,
+    d1: FloatOrArray,
+    y: float = 0.0,
+) -> FloatOrArray:
     """
     Computes the Greek Gamma for an option
     taking the current stock price 's0', the annualized volatity 'vol', the time
@@ -102,7 +112,7 @@ def get_gamma(
     variation of Greek Delta as stock price increases or decreases by $1.
     """
     if y > 0.0:
-        yfac = exp(-y * time2maturity)
+        yfac: FloatOrArray = exp(-y * time2maturity)
     else:
         yfac = 1.0
 
@@ -113,15 +123,15 @@ def get_gamma(
 
 def get_theta(
     optype: OptionType,
-    s0: float,
-    x: float,
+    s0: FloatOrArray,
+    x: FloatOrArray,
     r: float,
-    vol: float,
-    time2maturity: float,
-    d1: float,
-    d2: float,
+    vol: FloatOrArray,
+    time2maturity: FloatOrArray,
+    d1: FloatOrArray,
+    d2: FloatOrArray,
     y: float = 0.0,
-) -> float:
+) -> FloatOrArray:
     """
     Computes the Greek Theta for an option (call or put) taking the current stock price 's0', the exercise
     price 'x', the annualized risk-free rate 'r', the time remaining to maturity
@@ -154,7 +164,9 @@ def get_theta(
         raise ValueError("Option type must be either 'call' or 'put'!")
 
 
-def get_vega(s0: float, time2maturity: float, d1: float, y: float = 0.0) -> float:
+def get_vega(
+    s0: FloatOrArray, time2maturity: FloatOrArray, d1: FloatOrArray, y: float = 0.0
+) -> FloatOrArray:
     """
     Computes the Greek Vega for an option taking
     the current stock price 's0', the time remaining to maturity in units of year,
@@ -174,13 +186,13 @@ def get_vega(s0: float, time2maturity: float, d1: float, y: float = 0.0) -> floa
 
 
 def get_d1_d2(
-    s0: float,
-    x: float | np.ndarray,
+    s0: FloatOrArray,
+    x: FloatOrArray,
     r: float,
-    vol: float | np.ndarray,
-    time2maturity: float,
+    vol: FloatOrArray,
+    time2maturity: FloatOrArray,
     y: float = 0.0,
-) -> tuple[float, float]:
+) -> tuple[FloatOrArray, FloatOrArray]:
     """
     Returns 'd1' and 'd2' taking the
     current stock price 's0', the exercise price 'x', the annualized risk-free
@@ -197,8 +209,11 @@ def get_d1_d2(
 
 
 def get_itm_prob(
-    optype: OptionType, d2: float, time2maturity: float = 0.0, y: float = 0.0
-) -> float:
+    optype: OptionType,
+    d2: FloatOrArray,
+    time2maturity: FloatOrArray = 0.0,
+    y: float = 0.0,
+) -> FloatOrArray:
     """
     Returns the estimated probability
     that an option (either call or put) will be in-the-money at maturity, taking
@@ -207,8 +222,8 @@ def get_itm_prob(
     dividend yield 'y' (default is zero,i.e., the stock does not pay dividends)
     may be passed as arguments.
     """
-    if y > 0.0 and time2maturity > 0.0:
-        yfac = exp(-y * time2maturity)
+    if y > 0.0:
+        yfac: FloatOrArray = exp(-y * time2maturity)
     else:
         yfac = 1.0
 
@@ -243,14 +258,14 @@ def get_bs_info(
     put_itm_prob = get_itm_prob("put", d2, time2maturity, y)
 
     return BlackScholesInfo(
-        call_price=call_price,
-        put_price=put_price,
-        call_delta=call_delta,
-        put_delta=put_delta,
-        call_theta=call_theta,
-        put_theta=put_theta,
-        gamma=gamma,
-        vega=vega,
-        call_itm_prob=call_itm_prob,
-        put_itm_prob=put_itm_prob,
+        call_price=float(call_price),
+        put_price=float(put_price),
+        call_delta=float(call_delta),
+        put_delta=float(put_delta),
+        call_theta=float(call_theta),
+        put_theta=float(put_theta),
+        gamma=float(gamma),
+        vega=float(vega),
+        call_itm_prob=float(call_itm_prob),
+        put_itm_prob=float(put_itm_prob),
     )
@@ -0,0 +1,193 @@
+"""
+Terminal stock price samples bootstrapped from historical returns, for
+strategies evaluated with 'distribution="array"'.
+
+The log return over the horizon of each sample is the sum of blocks of
+consecutive daily log returns drawn at random from the history (moving block
+bootstrap), which keeps the short-range dependence of the returns, e.g.,
+volatility clustering. Block sums are differences of the cumulative sums of
+the returns, so a sample costs one random start index per block whatever the
+block size.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Mapping
+
+import numpy as np
+
+from optionsmonkey.api import get_stock_history
+from optionsmonkey.cache import CacheStats
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.history_store import HistoryStore
+from optionsmonkey.providers import MarketDataProvider
+from optionsmonkey.support import getnonbusinessdays
+
+
+class BootstrapGenerator:
+    """
+    Generator of terminal stock price samples from the daily log returns of
+    the closing prices over the last 'num_of_months' months, fetched with
+    'api.get_stock_history()' from 'provider' through 'store' (if given), or
+    given per ticker in 'returns'.
+
+    Return series are cached per ticker, and the samples of the latest
+    'maxsize' (ticker, stock price, horizon, number of samples, seed)
+    combinations are cached as read-only arrays, which are shared, not copied.
+
+    Parameters
+    ----------
+    block_size : int, optional
+        Number of consecutive daily returns in a block. Default is 5.
+    drift : float, optional
+        Annualized drift of the log returns, which replaces the historical one
+        if given, e.g., to remove it with zero. Default is None.
+    """
+
+    def __init__(
+        self,
+        provider: MarketDataProvider | None = None,
+        store: HistoryStore | None = None,
+        num_of_months: int = 60,
+        block_size: int = 5,
+        drift: float | None = None,
+        returns: Mapping[str, np.ndarray] | None = None,
+        maxsize: int = 64,
+        days_in_year: int = 252,
+    ):
+        if block_size < 1:
+            raise ValueError("Block size must be positive!")
+
+        self.provider = provider
+        self.store = store
+        self.num_of_months = num_of_months
+        self.block_size = block_size
+        self.drift = drift
+        self.maxsize = maxsize
+        self.days_in_year = days_in_year
+        self.stats = CacheStats()
+        self._returns = {
+            ticker.upper(): np.asarray(values, dtype=np.float64)
+            for ticker, values in (returns or {}).items()
+        }
+        self._cumsums: dict[str, np.ndarray] = {}
+        self._samples: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = Lock()
+
+    def returns(self, ticker: str) -> np.ndarray:
+        """
+        Returns the daily log returns of a ticker.
+        """
+        ticker = ticker.upper()
+
+        if ticker not in self._returns:
+            close = np.asarray(
+                get_stock_history(
+                    ticker, self.num_of_months, self.provider, self.store
+                )["Close"],
+                dtype=np.float64,
+            )
+            returns = np.log(close[1:] / close[:-1])
+
+            with self._lock:
+                self._returns[ticker] = returns[np.isfinite(returns)]
+
+        return self._returns[ticker]
+
+    def samples(
+        self,
+        ticker: str,
+        stock_price: float,
+        days_to_target: int,
+        n: int = 100000,
+        seed: int | None = None,
+    ) -> np.ndarray:
+        """
+        Returns 'n' terminal stock prices 'days_to_target' trading days ahead,
+        from the current 'stock_price'. Samples are reproducible and cached if
+        'seed' is given.
+        """
+        key = (ticker.upper(), float(stock_price), int(days_to_target), int(n), seed)
+
+        if seed is not None:
+            with self._lock:
+                samples = self._samples.get(key)
+
+                if samples is not None:
+                    self._samples.move_to_end(key)
+                    self.stats.memory_hits += 1
+
+                    return samples
+
+        with self._lock:
+            self.stats.misses += 1
+
+        cumsum = self._get_cumsum(ticker)
+        nreturns = cumsum.shape[0] - 1
+
+        if nreturns < self.block_size:
+            raise ValueError(f"Not enough returns of {ticker} for a block!")
+
+        # Full blocks, then a last block holding the rest of the horizon
+        nblocks, rest = divmod(int(days_to_target), self.block_size)
+        rng = np.random.default_rng(seed)
+        starts = rng.integers(0, nreturns - self.block_size + 1, (nblocks + 1, n))
+        growth = np.zeros(n)
+
+        for i, size in enumerate((self.block_size,) * nblocks + (rest,)):
+            growth += cumsum[starts[i] + size] - cumsum[starts[i]]
+
+        samples = stock_price * np.exp(growth, out=growth)
+        samples.flags.writeable = False
+
+        if seed is not None:
+            with self._lock:
+                self._samples[key] = samples
+
+                if len(self._samples) > self.maxsize:
+                    self._samples.popitem(last=False)
+
+        return samples
+
+    def attach(
+        self, engine: StrategyEngine, ticker: str, n: int | None = None
+    ) -> np.ndarray:
+        """
+        Sets the terminal stock prices of an engine, evaluating a strategy with
+        'distribution="array"', to samples of a ticker over the engine's
+        horizon from its stock price, seeded with its seed. Returns the
+        samples.
+
+        The horizon is counted in trading days, the unit of the daily returns,
+        even if the engine does not discard non-business days.
+        """
+        days_to_target = engine.days_to_target
+
+        if not engine.discard_nonbusinessdays:
+            days_to_target -= getnonbusinessdays(
+                engine.start_date, engine.target_date, engine.country
+            )
+
+        engine.s_mc = self.samples(
+            ticker,
+            engine.stock_price,
+            days_to_target,
+            int(n or engine.nmc_prices),
+            engine.seed,
+        )
+
+        return engine.s_mc
+
+    def _get_cumsum(self, ticker: str) -> np.ndarray:
+        ticker = ticker.upper()
+
+        if ticker not in self._cumsums:
+            returns = self.returns(ticker)
+
+            if self.drift is not None:
+                returns = returns - returns.mean() + self.drift / self.days_in_year
+
+            with self._lock:
+                self._cumsums[ticker] = np.concatenate(([0.0], np.cumsum(returns)))
+
+        return self._cumsums[ticker]
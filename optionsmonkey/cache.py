@@ -0,0 +1,254 @@
+"""
+Content-addressed cache of strategy results.
+
+Results are keyed by a hash of the canonical form of their `Inputs`: floats are
+quantized, legs are sorted, defaults such as the start date are resolved, and
+the seed is left out when there is no Monte Carlo simulation, so that
+equivalent inputs share the same key regardless of how they were built. On a
+miss, the engine runs on the quantized inputs, so that a cached result does
+not depend on which of the inputs sharing its key came first. Results are kept
+in an in-memory LRU cache and, optionally, in a SQLite file that persists
+between processes.
+
+Monte Carlo results are only cached when `Inputs.seed` is set, since otherwise
+they are not reproducible. Inputs with distribution 'array' are never cached,
+because their terminal prices are not part of the inputs.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs, Outputs
+from optionsmonkey.serialization import dumps_outputs, loads_outputs
+
+PER_LEG_FIELDS = (
+    "per_leg_cost",
+    "implied_volatility",
+    "in_the_money_probability",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+)
+
+"""Inputs fields that do not change the outputs and are left out of the key."""
+EXCLUDED_FIELDS = {"per_leg_profiles"}
+
+
+def canonicalize_inputs(inputs: Inputs, decimals: int = 8) -> tuple[str, list[int]]:
+    """
+    Returns the canonical JSON representation of `Inputs`, with floats rounded
+    to 'decimals' decimal places and legs sorted, together with the order of
+    the original legs in the canonical representation.
+    """
+    data = inputs.model_dump(mode="json", exclude=EXCLUDED_FIELDS)
+
+    # The seed is only used to draw Monte Carlo prices
+    if not inputs.compute_expectation:
+        del data["seed"]
+
+    legs = [_quantize(leg, decimals) for leg in data.pop("strategy")]
+    legs_json = [json.dumps(leg, sort_keys=True) for leg in legs]
+    order = sorted(range(len(legs)), key=legs_json.__getitem__)
+    data = _quantize(data, decimals) | {"strategy": [legs[i] for i in order]}
+
+    return json.dumps(data, sort_keys=True, separators=(",", ":")), order
+
+
+def inputs_key(inputs: Inputs, decimals: int = 8) -> str:
+    """
+    Returns the SHA-256 hex digest of the canonical representation of `Inputs`.
+    """
+    return hashlib.sha256(canonicalize_inputs(inputs, decimals)[0].encode()).hexdigest()
+
+
+def is_cacheable(inputs: Inputs) -> bool:
+    """
+    Whether the outputs of `Inputs` are deterministic and can be cached.
+    """
+    if inputs.distribution == "array":
+        return False
+
+    return not inputs.compute_expectation or inputs.seed is not None
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+
+        return self.hits / total if total > 0 else 0.0
+
+
+class ResultCache:
+    """
+    Two-tier cache of `Outputs`: an in-memory LRU cache holding up to 'maxsize'
+    results and, if 'path' is given, a SQLite database file.
+
+    Outputs are stored in the canonical leg order and permuted back to the leg
+    order of each request, so requests differing only in leg order share an
+    entry.
+    """
+
+    def __init__(self, maxsize: int = 1024, path: str | None = None, decimals: int = 8):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, Outputs] = OrderedDict()
+        self._lock = Lock()
+        self._db = None
+
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outputs (key TEXT PRIMARY KEY, value BLOB)"
+            )
+            self._db.commit()
+
+    def run(self, inputs: Inputs) -> Outputs:
+        """
+        Returns the cached outputs of `Inputs` or, on a miss, runs a
+        `StrategyEngine` on them and caches its outputs.
+        """
+        if not is_cacheable(inputs):
+            return StrategyEngine(inputs).run()
+
+        canonical, order = canonicalize_inputs(inputs, self.decimals)
+        key = hashlib.sha256(canonical.encode()).hexdigest()
+        outputs = self._get(key)
+
+        if outputs is None:
+            with self._lock:
+                self.stats.misses += 1
+
+            ordered = inputs.model_copy(
+                update={"strategy": [inputs.strategy[i] for i in order]}
+            )
+            canonical_inputs = ordered.derive(
+                strategy=[
+                    _quantize_fields(leg, self.decimals) for leg in ordered.strategy
+                ],
+                **_quantize_fields(ordered, self.decimals),
+            )
+            outputs = StrategyEngine(canonical_inputs).run()
+            self._put(key, outputs)
+
+        return _reorder_legs(outputs, order)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from both tiers and resets the statistics.
+        """
+        with self._lock:
+            self._memory.clear()
+            self.stats = CacheStats()
+
+            if self._db is not None:
+                self._db.execute("DELETE FROM outputs")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _get(self, key: str) -> Outputs | None:
+        with self._lock:
+            outputs = self._memory.get(key)
+
+            if outputs is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+
+                return outputs
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                "SELECT value FROM outputs WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        outputs = loads_outputs(row[0])[0].to_pydantic()
+
+        with self._lock:
+            self.stats.disk_hits += 1
+            self._remember(key, outputs)
+
+        return outputs
+
+    def _put(self, key: str, outputs: Outputs) -> None:
+        with self._lock:
+            self._remember(key, outputs)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO outputs VALUES (?, ?)",
+                    (key, dumps_outputs([outputs])),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, outputs: Outputs) -> None:
+        self._memory[key] = outputs
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+def _quantize(value: Any, decimals: int) -> Any:
+    if isinstance(value, float):
+        return round(value, decimals) + 0.0  # Also turns -0.0 into 0.0
+    elif isinstance(value, dict):
+        return {key: _quantize(item, decimals) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [_quantize(item, decimals) for item in value]
+
+    return value
+
+
+def _quantize_fields(model: BaseModel, decimals: int) -> dict[str, Any]:
+    # Quantized float (and list of floats) fields of a model, legs excluded
+    return {
+        name: _quantize(value, decimals)
+        for name, value in model.__dict__.items()
+        if isinstance(value, float | list) and name != "strategy"
+    }
+
+
+def _reorder_legs(outputs: Outputs, order: list[int]) -> Outputs:
+    if order == list(range(len(order))):
+        return outputs
+
+    position = np.argsort(order)
+
+    return outputs.model_copy(
+        update={
+            name: tuple(getattr(outputs, name)[i] for i in position)
+            for name in PER_LEG_FIELDS
+        }
+    )
@@ -0,0 +1,279 @@
+"""
+Archive of daily options chain snapshots for backtests, stored column by
+column and memory-mapped on reading, so that years of snapshots can be scanned
+without loading them into data frames.
+
+Snapshots are partitioned by underlying asset and date:
+
+    <path>/<UNDERLYING>/<YYYY-MM-DD>/
+        expiration.bin, type.bin, strike.bin, ...   (one array per column)
+        meta.json     (number of rows, stock price and index by expiration)
+
+The rows of a snapshot are sorted by expiration, type (calls first) and strike,
+so the options of an expiration and type are a contiguous slice of rows, whose
+strikes can be searched with 'np.searchsorted()'.
+"""
+
+import datetime as dt
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from optionsmonkey.engine import LegType
+from optionsmonkey.models import OptionsChain, OptionType
+
+# Archived columns, with their data type and the (lowercased) column of the
+# chain data frames they are read from; missing columns are filled with NaN
+ARCHIVE_COLUMNS = {
+    "strike": (np.float64, "strike"),
+    "bid": (np.float64, "bid"),
+    "ask": (np.float64, "ask"),
+    "last_price": (np.float64, "lastprice"),
+    "implied_volatility": (np.float64, "impliedvolatility"),
+    "volume": (np.float64, "volume"),
+    "open_interest": (np.float64, "openinterest"),
+}
+EXPIRATION_DTYPE = np.dtype("datetime64[D]")
+TYPE_DTYPE = np.dtype(np.int8)
+
+
+@dataclass(frozen=True, eq=False)
+class ChainSnapshot:
+    """
+    Options chains of an underlying asset on a date, as read-only NumPy arrays
+    with one element per option, mapped from the archive files. 'type' holds
+    `LegType.CALL` or `LegType.PUT`. Snapshots compare (and hash) by identity.
+    """
+
+    underlying: str
+    date: dt.date
+    stock_price: float
+    index: dict[dt.date, tuple[int, int, int]]
+    expiration: np.ndarray
+    type: np.ndarray
+    strike: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+    last_price: np.ndarray
+    implied_volatility: np.ndarray
+    volume: np.ndarray
+    open_interest: np.ndarray
+
+    @property
+    def mid(self) -> np.ndarray:
+        return (self.bid + self.ask) / 2.0
+
+    @property
+    def days_to_expiration(self) -> np.ndarray:
+        return (self.expiration - np.datetime64(self.date, "D")).astype(np.int64)
+
+    def expirations(self) -> list[dt.date]:
+        return list(self.index)
+
+    def rows(self, expiration: dt.date, option_type: OptionType | None = None) -> slice:
+        """
+        Returns the slice of rows of the options (of a type, if given)
+        expiring on a date, empty if there are none.
+        """
+        start, split, stop = self.index.get(expiration, (0, 0, 0))
+
+        if option_type is None:
+            return slice(start, stop)
+        elif option_type == "call":
+            return slice(start, split)
+        elif option_type == "put":
+            return slice(split, stop)
+        else:
+            raise ValueError("Option type must be either 'call' or 'put'!")
+
+    def find(self, expiration: dt.date, option_type: OptionType, strike: float) -> int:
+        """
+        Returns the row of an option.
+        """
+        rows = self.rows(expiration, option_type)
+        row = rows.start + int(np.searchsorted(self.strike[rows], strike))
+
+        if row >= rows.stop or self.strike[row] != strike:
+            raise ValueError(
+                f"No {option_type} with strike {strike} expiring on {expiration}!"
+            )
+
+        return row
+
+
+class ChainArchive:
+    """
+    Archive of daily options chain snapshots rooted at 'path'.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def append(
+        self,
+        underlying: str,
+        date: dt.date,
+        chains: Mapping[dt.date, OptionsChain],
+        stock_price: float | None = None,
+    ) -> None:
+        """
+        Archives the options chains of an underlying asset on a date, one per
+        expiration date. The stock price is taken from the chains unless given.
+        Snapshots are never overwritten.
+        """
+        if len(chains) == 0:
+            raise ValueError("No options chains to archive!")
+
+        partition = self._partition(underlying, date)
+
+        if partition.exists():
+            raise ValueError(f"Options chains of {underlying} on {date} are archived!")
+
+        tables = []
+
+        for expiration, chain in sorted(chains.items()):
+            for leg_type, options in (
+                (LegType.CALL, chain.calls),
+                (LegType.PUT, chain.puts),
+            ):
+                table = _to_table(options).sort_values("strike")
+                table.insert(0, "type", leg_type)
+                table.insert(0, "expiration", np.datetime64(expiration, "D"))
+                tables.append(table)
+
+        table = pd.concat(tables, ignore_index=True)
+        index = {}
+        start = 0
+
+        for expiration in sorted(chains):
+            stop = start + chains[expiration].calls.shape[0]
+            index[expiration.isoformat()] = (
+                start,
+                stop,
+                stop + chains[expiration].puts.shape[0],
+            )
+            start = index[expiration.isoformat()][2]
+
+        if stock_price is None:
+            stock_price = next(iter(chains.values())).underlying.regular_market_price
+
+        meta = {"nrows": table.shape[0], "stock_price": stock_price, "index": index}
+        partition.parent.mkdir(parents=True, exist_ok=True)
+
+        # The snapshot is written to a temporary directory and then renamed, so
+        # that readers never see a partial snapshot
+        staging = Path(tempfile.mkdtemp(dir=partition.parent, prefix=".tmp"))
+
+        try:
+            table["expiration"].to_numpy(EXPIRATION_DTYPE).tofile(
+                staging / "expiration.bin"
+            )
+            table["type"].to_numpy(TYPE_DTYPE).tofile(staging / "type.bin")
+
+            for column, (dtype, _) in ARCHIVE_COLUMNS.items():
+                table[column].to_numpy(dtype).tofile(staging / f"{column}.bin")
+
+            (staging / "meta.json").write_text(json.dumps(meta))
+            os.rename(staging, partition)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def read(self, underlying: str, date: dt.date) -> ChainSnapshot:
+        """
+        Returns the snapshot of the options chains of an underlying asset on a
+        date.
+        """
+        partition = self._partition(underlying, date)
+
+        if not partition.is_dir():
+            raise ValueError(f"No options chains of {underlying} on {date}!")
+
+        meta = json.loads((partition / "meta.json").read_text())
+        nrows = meta["nrows"]
+
+        return ChainSnapshot(
+            underlying=underlying.upper(),
+            date=date,
+            stock_price=meta["stock_price"],
+            index={
+                dt.date.fromisoformat(expiration): tuple(rows)
+                for expiration, rows in meta["index"].items()
+            },
+            expiration=_map(partition / "expiration.bin", EXPIRATION_DTYPE, nrows),
+            type=_map(partition / "type.bin", TYPE_DTYPE, nrows),
+            **{
+                column: _map(partition / f"{column}.bin", np.dtype(dtype), nrows)
+                for column, (dtype, _) in ARCHIVE_COLUMNS.items()
+            },
+        )
+
+    def snapshots(
+        self,
+        underlying: str,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> Iterator[ChainSnapshot]:
+        """
+        Yields the snapshots of an underlying asset from 'start' (inclusive) to
+        'end' (exclusive), oldest first.
+        """
+        for date in self.dates(underlying):
+            if (start is None or date >= start) and (end is None or date < end):
+                yield self.read(underlying, date)
+
+    def dates(self, underlying: str) -> list[dt.date]:
+        """
+        Returns the dates of the archived snapshots of an underlying asset.
+        """
+        directory = self.path / underlying.upper()
+
+        if not directory.is_dir():
+            return []
+
+        return sorted(
+            dt.date.fromisoformat(entry.name)
+            for entry in directory.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    def underlyings(self) -> list[str]:
+        """
+        Returns the underlying assets in the archive.
+        """
+        if not self.path.is_dir():
+            return []
+
+        return sorted(entry.name for entry in self.path.iterdir() if entry.is_dir())
+
+    def _partition(self, underlying: str, date: dt.date) -> Path:
+        return self.path / underlying.upper() / date.isoformat()
+
+
+def _to_table(options: pd.DataFrame) -> pd.DataFrame:
+    columns = {column.lower(): column for column in options.columns}
+
+    return pd.DataFrame(
+        {
+            column: (
+                options[columns[source]].to_numpy(dtype, na_value=np.nan)
+                if source in columns
+                else np.full(options.shape[0], np.nan, dtype)
+            )
+            for column, (dtype, source) in ARCHIVE_COLUMNS.items()
+        }
+    )
+
+
+def _map(path: Path, dtype: np.dtype, nrows: int) -> np.ndarray:
+    if nrows == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r", shape=(nrows,))
@@ -0,0 +1,252 @@
+"""
+Persistent cache of options chains, so that repeated requests do not hit the
+network and tests can run offline.
+
+Each chain is stored as a snapshot, keyed by ticker, expiration date and
+snapshot time, in its own directory:
+
+    <path>/<TICKER>/<YYYY-MM-DD>/<snapshot>/
+        calls.parquet, puts.parquet   (calls.json, puts.json without pyarrow)
+        underlying.json               (raw underlying asset data)
+        meta.json                     (snapshot time, TTL and table format)
+
+A snapshot is fresh for its TTL (time to live, in seconds), set when it is
+stored. In offline mode, the latest snapshot is served however old it is.
+
+Tables are never pickled, since loading a tampered or foreign pickle in the
+cache directory would run arbitrary code. Snapshots in any other format are
+treated as misses.
+"""
+
+import datetime as dt
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from threading import Lock
+
+import pandas as pd
+
+from optionsmonkey.models import OptionsChain
+
+SNAPSHOT_FORMAT = "%Y%m%dT%H%M%S%fZ"
+TABLE_FORMAT = "parquet" if find_spec("pyarrow") is not None else "json"
+TABLE_FORMATS = ("parquet", "json")
+
+
+@dataclass
+class ChainCacheStats:
+    hits: int = 0
+    misses: int = 0
+    hit_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+
+        return self.hits / total if total > 0 else 0.0
+
+    @property
+    def mean_hit_seconds(self) -> float:
+        return self.hit_seconds / self.hits if self.hits > 0 else 0.0
+
+
+class ChainCache:
+    """
+    On-disk cache of options chains rooted at 'path'. Snapshots are stored
+    with a TTL of 'ttl' seconds unless another one is given to 'put()'. If
+    'offline' is True, 'get()' ignores TTLs and 'api.get_options_chain()'
+    never downloads chains.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 900.0, offline: bool = False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.offline = offline
+        self.stats = ChainCacheStats()
+        # Guards the statistics, updated by concurrent downloads
+        self._lock = Lock()
+
+    def get(
+        self,
+        ticker: str,
+        expiration_date: dt.date,
+        snapshot: dt.datetime | None = None,
+    ) -> OptionsChain | None:
+        """
+        Returns the latest fresh snapshot of the options chain or, if given, the
+        snapshot taken at 'snapshot'. Returns None on a miss.
+        """
+        start = time.perf_counter()
+
+        if snapshot is None:
+            directory = self._latest(ticker, expiration_date)
+        else:
+            directory = self._directory(ticker, expiration_date) / _utc(
+                snapshot
+            ).strftime(SNAPSHOT_FORMAT)
+
+            if not directory.is_dir():
+                directory = None
+
+        chain = None if directory is None else self._load(directory)
+
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            if chain is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+                self.stats.hit_seconds += elapsed
+
+        return chain
+
+    def put(
+        self,
+        ticker: str,
+        expiration_date: dt.date,
+        chain: OptionsChain,
+        ttl: float | None = None,
+        snapshot: dt.datetime | None = None,
+    ) -> dt.datetime:
+        """
+        Stores a snapshot of the options chain, taken now unless 'snapshot' is
+        given, and returns its time.
+        """
+        snapshot = _utc(snapshot or dt.datetime.now(dt.timezone.utc))
+        directory = self._directory(ticker, expiration_date)
+        target = directory / snapshot.strftime(SNAPSHOT_FORMAT)
+
+        # Snapshots are immutable: storing the same one again does nothing
+        if target.is_dir():
+            return snapshot
+
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "snapshot": snapshot.isoformat(),
+            "ttl": self.ttl if ttl is None else ttl,
+            "format": TABLE_FORMAT,
+        }
+
+        # The snapshot is written to a temporary directory and then renamed, so
+        # that readers never see a partial snapshot
+        staging = Path(tempfile.mkdtemp(dir=directory, prefix=".tmp"))
+
+        try:
+            _write_table(chain.calls, staging / "calls")
+            _write_table(chain.puts, staging / "puts")
+            (staging / "underlying.json").write_text(json.dumps(chain.underlying.raw))
+            (staging / "meta.json").write_text(json.dumps(meta))
+            os.replace(staging, target)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+            if target.is_dir():  # Stored concurrently
+                return snapshot
+
+            raise
+
+        return snapshot
+
+    def snapshots(self, ticker: str, expiration_date: dt.date) -> list[dt.datetime]:
+        """
+        Returns the times of the stored snapshots of an options chain, oldest
+        first.
+        """
+        return [
+            _parse_snapshot(directory.name)
+            for directory in self._snapshot_directories(ticker, expiration_date)
+        ]
+
+    def clear(self) -> None:
+        """
+        Removes all snapshots and resets the statistics.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+        with self._lock:
+            self.stats = ChainCacheStats()
+
+    def _directory(self, ticker: str, expiration_date: dt.date) -> Path:
+        return self.path / ticker.upper() / expiration_date.isoformat()
+
+    def _snapshot_directories(
+        self, ticker: str, expiration_date: dt.date
+    ) -> list[Path]:
+        directory = self._directory(ticker, expiration_date)
+
+        if not directory.is_dir():
+            return []
+
+        return sorted(
+            entry
+            for entry in directory.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    def _latest(self, ticker: str, expiration_date: dt.date) -> Path | None:
+        directories = self._snapshot_directories(ticker, expiration_date)
+
+        if not directories:
+            return None
+
+        latest = directories[-1]
+
+        if self.offline:
+            return latest
+
+        try:
+            meta = json.loads((latest / "meta.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):  # Pruned or half-written
+            return None
+
+        age = dt.datetime.now(dt.timezone.utc) - _parse_snapshot(latest.name)
+
+        return latest if age.total_seconds() <= meta["ttl"] else None
+
+    def _load(self, directory: Path) -> OptionsChain | None:
+        try:
+            meta = json.loads((directory / "meta.json").read_text())
+
+            if meta["format"] not in TABLE_FORMATS:
+                return None
+
+            return OptionsChain(
+                calls=_read_table(directory / "calls", meta["format"]),
+                puts=_read_table(directory / "puts", meta["format"]),
+                underlying=json.loads((directory / "underlying.json").read_text()),
+            )
+        except (FileNotFoundError, json.JSONDecodeError):  # Removed or half-written
+            return None
+
+
+def _utc(snapshot: dt.datetime) -> dt.datetime:
+    # Naive snapshot times are taken as UTC
+    if snapshot.tzinfo is None:
+        return snapshot.replace(tzinfo=dt.timezone.utc)
+
+    return snapshot.astimezone(dt.timezone.utc)
+
+
+def _parse_snapshot(name: str) -> dt.datetime:
+    return dt.datetime.strptime(name, SNAPSHOT_FORMAT).replace(tzinfo=dt.timezone.utc)
+
+
+def _write_table(df: pd.DataFrame, path: Path) -> None:
+    if TABLE_FORMAT == "parquet":
+        df.to_parquet(path.with_suffix(".parquet"))
+    else:
+        # The table schema keeps the dtypes, time zones included
+        df.to_json(path.with_suffix(".json"), orient="table", date_unit="ns")
+
+
+def _read_table(path: Path, format: str) -> pd.DataFrame:
+    if format == "parquet":
+        return pd.read_parquet(path.with_suffix(".parquet"))
+
+    return pd.read_json(path.with_suffix(".json"), orient="table")
@@ -1,20 +1,173 @@
 from __future__ import print_function, division
 
-from numpy import array, zeros
+from dataclasses import dataclass, fields
+from enum import IntEnum
+
+from numpy import (
+    array,
+    bincount,
+    bool_,
+    dtype,
+    float64,
+    int8,
+    int64,
+    ndarray,
+    unique,
+    where,
+    zeros,
+)
+
+from optionsmonkey.black_scholes import (
+    get_d1_d2,
+    get_delta,
+    get_gamma,
+    get_implied_vol,
+    get_itm_prob,
+    get_theta,
+    get_vega,
+)
+from numpy.random import default_rng
 
-from optionsmonkey.black_scholes import get_bs_info, get_implied_vol
-from optionsmonkey.models import Inputs, Strategy, Outputs, OptionStrategy
+from optionsmonkey.models import Inputs, Outputs, Strategy, RawOutputs, OptionStrategy
+from optionsmonkey.payoff import PayoffFunction
 from optionsmonkey.support import (
     getPLprofile,
     getPLprofilestock,
     getPLprofileBS,
-    getprofitrange,
+    get_profit_ranges,
     getnonbusinessdays,
-    createpriceseq,
+    price_grids,
     createpricesamples,
     getPoP,
+    get_tail_risk,
 )
 
+MC_CHUNK_SIZE = 16384
+
+
+class LegType(IntEnum):
+    CALL = 0
+    PUT = 1
+    STOCK = 2
+    CLOSED = 3
+
+
+LEG_TYPES = ("call", "put", "stock", "closed")
+ACTIONS = {1: "buy", -1: "sell", 0: "n/a"}
+
+"""
+Columnar representation of the legs of a strategy, one record per leg. The leg
+type is coded as a 'LegType' and the action as +1 (buy), -1 (sell) or 0 (not
+applicable, for closed positions).
+"""
+LEG_DTYPE = dtype(
+    [
+        ("type", int8),
+        ("action", int8),
+        ("strike", float64),
+        ("premium", float64),
+        ("n", int64),
+        ("prev_pos", float64),
+        ("use_bs", bool_),
+        ("days_to_maturity", int64),
+        ("expiration", "datetime64[D]"),
+    ]
+)
+
+
+def net_legs(legs):
+    """
+    net_legs -> nets the legs of a strategy that hold the same contract, e.g.
+    several fills of the same order.
+
+    Open option legs with the same type, strike and expiration are merged into
+    one contract, with opposite actions cancelling each other, and so are open
+    stock legs. Closed positions and legs whose previous position is closed
+    are kept as they are.
+
+    Parameters
+    ----------
+    legs : numpy array
+        Legs of the strategy, with dtype 'LEG_DTYPE'.
+
+    Returns
+    -------
+    contracts : numpy array
+        One record per distinct contract, in order of first appearance, with
+        dtype 'LEG_DTYPE'. Records merging several legs hold the net position
+        in 'action' and 'n' (zero if the legs cancel out), and zero premium and
+        previous position.
+    inverse : numpy array
+        Index in 'contracts' of the contract of each leg.
+    """
+    keys = {}
+    inverse = zeros(legs.shape[0], dtype=int64)
+
+    for i, (type, strike, prev_pos, expiration) in enumerate(
+        legs[["type", "strike", "prev_pos", "expiration"]].tolist()
+    ):
+        # Tagged keys, so that those of different kinds never collide
+        if type == LegType.CLOSED or prev_pos < 0.0:
+            key = ("leg", i)
+        elif type == LegType.STOCK:
+            key = ("stock",)
+        else:
+            key = ("option", type, strike, expiration)
+
+        inverse[i] = keys.setdefault(key, len(keys))
+
+    contracts = legs[unique(inverse, return_index=True)[1]]
+    merged = bincount(inverse) > 1
+
+    if merged.any():
+        quantity = bincount(inverse, weights=legs["action"] * legs["n"])[merged]
+        contracts["action"][merged] = where(quantity < 0, -1, 1)
+        contracts["n"][merged] = abs(quantity)
+        contracts["premium"][merged] = 0.0
+        contracts["prev_pos"][merged] = 0.0
+
+    return contracts, inverse
+
+
+@dataclass(frozen=True, slots=True)
+class EngineState:
+    """
+    Complete state of a run of `StrategyEngine`, returned by
+    `StrategyEngine.evaluate()`. Besides the outputs, it holds the arrays that
+    'run()' used to store on the engine, under the same names: the stock price
+    grid 's' and the Monte Carlo prices 's_mc', the profit/loss profiles
+    'profit', 'profit_mc', 'strategyprofit' and 'strategyprofit_mc', the costs,
+    implied volatilities and Greeks of the legs, the probabilities and ranges
+    of profit, and the netted contracts of the strategy (see 'net_legs()').
+    """
+
+    outputs: Outputs | RawOutputs
+    s: ndarray
+    s_mc: ndarray
+    profit: ndarray
+    profit_mc: ndarray
+    strategyprofit: ndarray
+    strategyprofit_mc: ndarray
+    cost: list[float]
+    impvol: ndarray
+    itmprob: ndarray
+    delta: ndarray
+    gamma: ndarray
+    vega: ndarray
+    theta: ndarray
+    profitprob: float
+    profittargprob: float
+    losslimitprob: float
+    profit_ranges: ndarray
+    profit_target_range: ndarray
+    loss_limit_ranges: ndarray
+    contracts: ndarray
+    leg_contract: ndarray
+    contract_legs: list[list[int]]
+
+
+STATE_FIELDS = frozenset(field.name for field in fields(EngineState))
+
 
 class StrategyEngine:
     def __init__(self, inputs: Inputs):
@@ -32,35 +185,14 @@ class StrategyEngine:
         if len(inputs.strategy) == 0:
             raise ValueError("No strategy provided!")
 
+        self.state: EngineState | None = None
         self.s = array([])
         self.s_mc = array([])
-        self.strike = []
-        self.premium = []
-        self.n = []
-        self.action: list[str] = []
-        self.type = []
-        self.expiration = []
-        self.prev_pos = []
-        self.use_bs = []
-        self.profit_ranges: list[float] = []
-        self.profit_target_range: list[float] = []
-        self.loss_limit_ranges: list[float] = []
-        self.days_to_maturity: list[float] = []
         self.start_date = inputs.start_date
         self.country = "US"
         self.days_to_target = 30
         self.discard_nonbusinessdays = True
         self.days_in_year = 252
-        self.impvol: list[float] = []
-        self.itmprob: list[float] = []
-        self.delta: list[float] = []
-        self.gamma: list[float] = []
-        self.vega: list[float] = []
-        self.theta: list[float] = []
-        self.cost: list[float] = []
-        self.profitprob = 0.0
-        self.profittargprob = 0.0
-        self.losslimitprob = 0.0
         self.distribution = inputs.distribution
         self.stock_price = inputs.stock_price
         self.volatility = inputs.volatility
@@ -73,6 +205,10 @@ class StrategyEngine:
         self.opt_commission = inputs.opt_commission
         self.stock_commission = inputs.stock_commission
         self.nmc_prices = inputs.nmc_prices
+        self.var_confidence_levels = inputs.var_confidence_levels
+        self.pl_quantiles = inputs.pl_quantiles
+        self.per_leg_profiles = inputs.per_leg_profiles
+        self.seed = inputs.seed
         self.compute_expectation = inputs.compute_expectation
         self.discard_nonbusinessdays = inputs.discard_nonbusiness_days
 
@@ -99,20 +235,13 @@ class StrategyEngine:
                 "Start date cannot be after the target date!"
             )  # TODO: move validation to pydantic
 
-        for i, strat in enumerate(inputs.strategy):
+        legs = []
+
+        for strat in inputs.strategy:
             strategy: Strategy = strat
-            self.type.append(strategy.type)
 
             if type(strategy) is OptionStrategy:
-                self.strike.append(strategy.strike)  # type: ignore
-                self.premium.append(strategy.premium)  # type: ignore
-                self.n.append(strategy.n)  # type: ignore
-                self.action.append(strategy.action)  # type: ignore
-                self.prev_pos.append(strategy.prev_pos or 0.0)
-
                 if strategy.expiration >= self.target_date:
-                    self.expiration.append(strategy.expiration)
-
                     if self.discard_nonbusinessdays:
                         ndiscardeddays = getnonbusinessdays(
                             self.start_date, strategy.expiration, self.country
@@ -120,73 +249,132 @@ class StrategyEngine:
                     else:
                         ndiscardeddays = 0
 
-                    self.days_to_maturity.append(
-                        (strategy.expiration - self.start_date).days - ndiscardeddays
+                    legs.append(
+                        (
+                            LEG_TYPES.index(strategy.type),
+                            1 if strategy.action == "buy" else -1,  # type: ignore
+                            strategy.strike,  # type: ignore
+                            strategy.premium,  # type: ignore
+                            strategy.n,  # type: ignore
+                            strategy.prev_pos or 0.0,
+                            strategy.expiration != self.target_date,
+                            (strategy.expiration - self.start_date).days
+                            - ndiscardeddays,
+                            strategy.expiration,
+                        )
                     )
-
-                    self.use_bs.append(strategy.expiration != self.target_date)
                 else:
                     raise ValueError(
                         "Expiration date must be after or equal to the target date!"
                     )
 
             elif strategy.type == "stock":
-                self.n.append(strategy.n)
-                self.action.append(strategy.action)
-                self.prev_pos.append(strategy.prev_pos or 0.0)
-
-                self.strike.append(0.0)
-                self.premium.append(0.0)
-                self.use_bs.append(False)
-                self.days_to_maturity.append(-1)
-                self.expiration.append(self.target_date)
+                legs.append(
+                    (
+                        LegType.STOCK,
+                        1 if strategy.action == "buy" else -1,
+                        0.0,
+                        0.0,
+                        strategy.n,
+                        strategy.prev_pos or 0.0,
+                        False,
+                        -1,
+                        self.target_date,
+                    )
+                )
 
             elif strategy.type == "closed":
-                self.prev_pos.append(strategy.prev_pos)
-                self.strike.append(0.0)
-                self.n.append(0)
-                self.premium.append(0.0)
-                self.action.append("n/a")
-                self.use_bs.append(False)
-                self.days_to_maturity.append(-1)
-                self.expiration.append(self.target_date)
+                legs.append(
+                    (
+                        LegType.CLOSED,
+                        0,
+                        0.0,
+                        0.0,
+                        0,
+                        strategy.prev_pos,
+                        False,
+                        -1,
+                        self.target_date,
+                    )
+                )
             else:
                 raise ValueError("Type must be 'call', 'put', 'stock' or 'closed'!")
 
-    def run(self):
+        self.legs = array(legs, dtype=LEG_DTYPE)
+        self.legs.flags.writeable = False
+        self.payoff: PayoffFunction | None = None
+
+    def run(self, validate=True):
         """
         run -> runs calculations for an options strategy.
 
+        The state of the run is also kept in 'state', from which the arrays
+        and probabilities of the last run can be read as attributes of the
+        engine (e.g., 'strategyprofit'). Use 'evaluate()' instead to run the
+        same engine from several threads.
+
+        Parameters
+        ----------
+        validate : bool, optional
+            Whether the results are returned as validated `Outputs` or, for
+            batch and latency-sensitive use, as `RawOutputs` holding numpy
+            arrays. Default is True.
+
+        Returns
+        -------
+        outputs : Outputs | RawOutputs
+        """
+        self.state = self.evaluate(validate)
+
+        return self.state.outputs
+
+    def evaluate(self, validate=True):
+        """
+        evaluate -> runs calculations for an options strategy and returns their
+        results instead of storing them on the engine. The same engine can be
+        evaluated concurrently from several threads as long as its attributes
+        (e.g., 's', 's_mc' or the legs) are not changed in the meantime.
+
+        Parameters
+        ----------
+        validate : bool, optional
+            Whether the outputs are validated `Outputs` or `RawOutputs`.
+            Default is True.
+
         Returns
         -------
-        outputs : Outputs
+        state : EngineState
+            Outputs and complete state of the run.
         """
-        if len(self.type) == 0:
+        s = self._s
+        s_mc = self._s_mc
+
+        if self.legs.shape[0] == 0:
             raise RuntimeError("No legs in the strategy! Nothing to do!")
-        elif self.type.count("closed") > 1:
+        elif (self.legs["type"] == LegType.CLOSED).sum() > 1:
             raise RuntimeError("Only one position of type 'closed' is allowed!")
-        elif self.distribution == "array" and self.s_mc.shape[0] == 0:
+        elif self.distribution == "array" and s_mc.shape[0] == 0:
             raise RuntimeError(
                 "No terminal stock prices from Monte Carlo simulations! Nothing to do!"
             )
 
         time2target = self.days_to_target / self.days_in_year
-        self.cost = [0.0 for _ in range(len(self.type))]
-        self.impvol = []
-        self.itmprob = []
-        self.delta = []
-        self.gamma = []
-        self.vega = []
-        self.theta = []
-
-        if self.s.shape[0] == 0:
-            self.s = createpriceseq(self.min_stock, self.max_stock)
-
-        self.profit = zeros((len(self.type), self.s.shape[0]))
-        self.strategyprofit = zeros(self.s.shape[0])
-
-        if self.compute_expectation and self.s_mc.shape[0] == 0:
-            self.s_mc = createpricesamples(
+        nlegs = self.legs.shape[0]
+        contracts, leg_contract = net_legs(self.legs)
+        contract_legs = [[] for _ in range(contracts.shape[0])]
+
+        for leg, contract in enumerate(leg_contract.tolist()):
+            contract_legs[contract].append(leg)
+
+        cost = self._get_costs()
+
+        if s.shape[0] == 0:
+            s = price_grids.get(self.min_stock, self.max_stock)
+
+        profit = zeros((nlegs if self.per_leg_profiles else 0, s.shape[0]))
+
+        if self.compute_expectation and s_mc.shape[0] == 0:
+            s_mc = createpricesamples(
                 self.stock_price,
                 self.volatility,
                 time2target,
@@ -194,308 +382,433 @@ class StrategyEngine:
                 self.distribution,
                 self.y,
                 self.nmc_prices,
+                self.seed if self.seed is not None else default_rng(),
             )
 
-        if self.s_mc.shape[0] > 0:
-            self.profit_mc = zeros((len(self.type), self.s_mc.shape[0]))
-            self.strategyprofit_mc = zeros(self.s_mc.shape[0])
-
-        for i, type in enumerate(self.type):
-            if type in ("call", "put"):
-                if self.prev_pos[i] >= 0.0:
-                    time2maturity = self.days_to_maturity[i] / self.days_in_year
-                    bs = get_bs_info(
-                        self.stock_price,
-                        self.strike[i],
-                        self.r,
-                        self.volatility,
-                        time2maturity,
-                        self.y,
-                    )
-
-                    self.gamma.append(bs.gamma)
-                    self.vega.append(bs.vega)
-
-                    if type == "call":
-                        self.impvol.append(
-                            get_implied_vol(
-                                "call",
-                                self.premium[i],
-                                self.stock_price,
-                                self.strike[i],
-                                self.r,
-                                time2maturity,
-                                self.y,
-                            )
-                        )
-                        self.itmprob.append(bs.call_itm_prob)
-
-                        if self.action[i] == "buy":
-                            self.delta.append(bs.call_delta)
-                            self.theta.append(bs.call_theta / self.days_in_year)
-                        else:
-                            self.delta.append(-bs.call_delta)
-                            self.theta.append(-bs.call_theta / self.days_in_year)
-                    else:
-                        self.impvol.append(
-                            get_implied_vol(
-                                "put",
-                                self.premium[i],
-                                self.stock_price,
-                                self.strike[i],
-                                self.r,
-                                time2maturity,
-                                self.y,
-                            )
-                        )
-                        self.itmprob.append(bs.putitmprob)
-
-                        if self.action[i] == "buy":
-                            self.delta.append(bs.put_delta)
-                            self.theta.append(bs.put_theta / self.days_in_year)
-                        else:
-                            self.delta.append(-bs.put_delta)
-                            self.theta.append(-bs.put_theta / self.days_in_year)
-                else:
-                    self.impvol.append(0.0)
-                    self.itmprob.append(0.0)
-                    self.delta.append(0.0)
-                    self.gamma.append(0.0)
-                    self.vega.append(0.0)
-                    self.theta.append(0.0)
-
-                if self.prev_pos[i] < 0.0:  # Previous position is closed
-                    costtmp = (self.premium[i] + self.prev_pos[i]) * self.n[i]
+        nmc = s_mc.shape[0]
+        profit_mc = zeros((nlegs if self.per_leg_profiles else 0, nmc))
+        strategyprofit_mc = zeros(nmc)
+        impvol, itmprob, delta, gamma, vega, theta = self._get_greeks()
+        strategyprofit = self._get_strategy_pl(
+            s, contracts, contract_legs, cost, profit if self.per_leg_profiles else None
+        )
 
-                    if self.action[i] == "buy":
-                        costtmp *= -1.0
+        if self.compute_expectation or self.distribution == "array":
+            chunk = nmc if self.per_leg_profiles else MC_CHUNK_SIZE
+
+            # Without per-leg profiles, the Monte Carlo prices are processed in
+            # chunks so that temporaries stay small regardless of their number
+            for start in range(0, nmc, chunk):
+                strategyprofit_mc[start : start + chunk] = self._get_strategy_pl(
+                    s_mc[start : start + chunk],
+                    contracts,
+                    contract_legs,
+                    cost,
+                    profit_mc if self.per_leg_profiles else None,
+                )
 
-                    self.cost[i] = costtmp
-                    self.profit[i] += costtmp
+        targets = [0.01]
 
-                    if self.compute_expectation or self.distribution == "array":
-                        self.profit_mc[i] += costtmp
-                else:
-                    if self.prev_pos[i] > 0.0:  # Premium of the open position
-                        opval = self.prev_pos[i]
-                    else:  # Current premium
-                        opval = self.premium[i]
-
-                    if self.use_bs[i]:
-                        self.profit[i], self.cost[i] = getPLprofileBS(
-                            type,
-                            self.action[i],
-                            self.strike[i],
-                            opval,
-                            self.r,
-                            (self.days_to_maturity[i] - self.days_to_target)
-                            / self.days_in_year,
-                            self.volatility,
-                            self.n[i],
-                            self.s,
-                            self.y,
-                            self.opt_commission,
-                        )
+        if self.profit_target is not None:
+            targets.append(self.profit_target)
 
-                        if self.compute_expectation or self.distribution == "array":
-                            self.profit_mc[i] = getPLprofileBS(
-                                type,
-                                self.action[i],
-                                self.strike[i],
-                                opval,
-                                self.r,
-                                (self.days_to_maturity[i] - self.days_to_target)
-                                / self.days_in_year,
-                                self.volatility,
-                                self.n[i],
-                                self.s_mc,
-                                self.y,
-                                self.opt_commission,
-                            )[0]
-                    else:
-                        self.profit[i], self.cost[i] = getPLprofile(
-                            type,
-                            self.action[i],
-                            self.strike[i],
-                            opval,
-                            self.n[i],
-                            self.s,
-                            self.opt_commission,
-                        )
+        if self.loss_limit is not None:
+            targets.append(self.loss_limit + 0.01)
 
-                        if self.compute_expectation or self.distribution == "array":
-                            self.profit_mc[i] = getPLprofile(
-                                type,
-                                self.action[i],
-                                self.strike[i],
-                                opval,
-                                self.n[i],
-                                self.s_mc,
-                                self.opt_commission,
-                            )[0]
-            elif type == "stock":
-                self.impvol.append(0.0)
-                self.itmprob.append(1.0)
-                self.delta.append(1.0)
-                self.gamma.append(0.0)
-                self.vega.append(0.0)
-                self.theta.append(0.0)
-
-                if self.prev_pos[i] < 0.0:  # Previous position is closed
-                    costtmp = (self.stock_price + self.prev_pos[i]) * self.n[i]
-
-                    if self.action[i] == "buy":
-                        costtmp *= -1.0
-
-                    self.cost[i] = costtmp
-                    self.profit[i] += costtmp
-
-                    if self.compute_expectation or self.distribution == "array":
-                        self.profit_mc[i] += costtmp
-                else:
-                    if self.prev_pos[i] > 0.0:  # Stock price at previous position
-                        stockpos = self.prev_pos[i]
-                    else:  # Spot price of the stock at start date
-                        stockpos = self.stock_price
-
-                    self.profit[i], self.cost[i] = getPLprofilestock(
-                        stockpos,
-                        self.action[i],
-                        self.n[i],
-                        self.s,
-                        self.stock_commission,
-                    )
+        ranges = get_profit_ranges(s, strategyprofit, targets)
+        profit_ranges = ranges[0]
+        profit_target_range = zeros((0, 2))
+        loss_limit_ranges = zeros((0, 2))
+        profitprob = profittargprob = losslimitprob = 0.0
 
-                    if self.compute_expectation or self.distribution == "array":
-                        self.profit_mc[i] = getPLprofilestock(
-                            stockpos,
-                            self.action[i],
-                            self.n[i],
-                            self.s_mc,
-                            self.stock_commission,
-                        )[0]
-            elif type == "closed":
-                self.impvol.append(0.0)
-                self.itmprob.append(0.0)
-                self.delta.append(0.0)
-                self.gamma.append(0.0)
-                self.vega.append(0.0)
-                self.theta.append(0.0)
-
-                self.cost[i] = self.prev_pos[i]
-                self.profit[i] += self.prev_pos[i]
-
-                if self.compute_expectation or self.distribution == "array":
-                    self.profit_mc[i] += self.prev_pos[i]
-
-            self.strategyprofit += self.profit[i]
-
-            if self.compute_expectation or self.distribution == "array":
-                self.strategyprofit_mc += self.profit_mc[i]
-
-        self.profit_ranges = getprofitrange(self.s, self.strategyprofit)
-
-        if self.profit_ranges:
-            if self.distribution in ("normal", "laplace", "black-scholes"):
-                self.profitprob = getPoP(
-                    self.profit_ranges,
-                    self.distribution,
-                    stockprice=self.stock_price,
-                    volatility=self.volatility,
-                    time2maturity=time2target,
-                    interestrate=self.r,
-                    dividendyield=self.y,
-                )
-            elif self.distribution == "array":
-                self.profitprob = getPoP(
-                    self.profit_ranges, self.distribution, array=self.s_mc
-                )
+        if profit_ranges.shape[0] > 0:
+            profitprob = self._get_pop(profit_ranges, time2target, s_mc)
 
         if self.profit_target is not None:
-            self.profit_target_range = getprofitrange(
-                self.s, self.strategyprofit, self.profit_target
-            )
+            profit_target_range = ranges[1]
 
-            if self.profit_target_range:
-                if self.distribution in ("normal", "laplace", "black-scholes"):
-                    self.profittargprob = getPoP(
-                        self.profit_target_range,
-                        self.distribution,
-                        stockprice=self.stock_price,
-                        volatility=self.volatility,
-                        time2maturity=time2target,
-                        interestrate=self.r,
-                        dividendyield=self.y,
-                    )
-                elif self.distribution == "array":
-                    self.profittargprob = getPoP(
-                        self.profit_target_range, self.distribution, array=self.s_mc
-                    )
+            if profit_target_range.shape[0] > 0:
+                profittargprob = self._get_pop(profit_target_range, time2target, s_mc)
 
         if self.loss_limit is not None:
-            self.loss_limit_ranges = getprofitrange(
-                self.s, self.strategyprofit, self.loss_limit + 0.01
-            )
+            loss_limit_ranges = ranges[-1]
 
-            if self.loss_limit_ranges:
-                if self.distribution in ("normal", "laplace", "black-scholes"):
-                    self.losslimitprob = 1.0 - getPoP(
-                        self.loss_limit_ranges,
-                        self.distribution,
-                        stockprice=self.stock_price,
-                        volatility=self.volatility,
-                        time2maturity=time2target,
-                        interestrate=self.r,
-                        dividendyield=self.y,
-                    )
-                elif self.distribution == "array":
-                    self.losslimitprob = 1.0 - getPoP(
-                        self.loss_limit_ranges, self.distribution, array=self.s_mc
-                    )
+            if loss_limit_ranges.shape[0] > 0:
+                losslimitprob = 1.0 - self._get_pop(
+                    loss_limit_ranges, time2target, s_mc
+                )
 
         opt_outputs = {}
 
         if self.profit_target is not None:
-            opt_outputs["probability_of_profit_target"] = self.profittargprob
-            opt_outputs["project_target_ranges"] = self.profit_target_range
+            opt_outputs["probability_of_profit_target"] = profittargprob
+            opt_outputs["project_target_ranges"] = profit_target_range
 
         if self.loss_limit is not None:
-            opt_outputs["probability_of_loss_limit"] = self.losslimitprob
+            opt_outputs["probability_of_loss_limit"] = losslimitprob
 
-        if (
-            self.compute_expectation or self.distribution == "array"
-        ) and self.s_mc.shape[0] > 0:
-            tmpprof = self.strategyprofit_mc[self.strategyprofit_mc >= 0.01]
-            tmploss = self.strategyprofit_mc[self.strategyprofit_mc < 0.0]
+        if (self.compute_expectation or self.distribution == "array") and nmc > 0:
+            isprofit = strategyprofit_mc >= 0.01
+            isloss = strategyprofit_mc < 0.0
+            nprofit = isprofit.sum()
+            nloss = isloss.sum()
             opt_outputs["average_profit_from_mc"] = (
-                tmpprof.mean() if tmpprof.shape[0] > 0 else 0.0
+                strategyprofit_mc.sum(where=isprofit) / nprofit if nprofit > 0 else 0.0
             )
             opt_outputs["average_loss_from_mc"] = (
-                tmploss.mean() if tmploss.shape[0] > 0 else 0.0
+                strategyprofit_mc.sum(where=isloss) / nloss if nloss > 0 else 0.0
             )
 
             opt_outputs["probability_of_profit_from_mc"] = (
-                self.strategyprofit_mc >= 0.01
-            ).sum() / self.strategyprofit_mc.shape[0]
-
-        return Outputs.model_validate(
-            opt_outputs
-            | {
-                "probability_of_profit": self.profitprob,
-                "strategy_cost": sum(self.cost),
-                "per_leg_cost": self.cost,
-                "profit_ranges": self.profit_ranges,
-                "minimum_return_in_the_domain": self.strategyprofit.min(),
-                "maximum_return_in_the_domain": self.strategyprofit.max(),
-                "implied_volatility": self.impvol,
-                "in_the_money_probability": self.itmprob,
-                "delta": self.delta,
-                "gamma": self.gamma,
-                "theta": self.theta,
-                "vega": self.vega,
-            }
+                nprofit / strategyprofit_mc.shape[0]
+            )
+
+            if self.var_confidence_levels or self.pl_quantiles:
+                var, cvar, quantiles = get_tail_risk(
+                    strategyprofit_mc,
+                    self.var_confidence_levels or (),
+                    self.pl_quantiles or (),
+                )
+
+                if self.var_confidence_levels:
+                    opt_outputs["value_at_risk"] = var
+                    opt_outputs["conditional_value_at_risk"] = cvar
+
+                if self.pl_quantiles:
+                    opt_outputs["pl_quantiles"] = quantiles
+
+        outputs = RawOutputs(
+            probability_of_profit=profitprob,
+            strategy_cost=sum(cost),
+            per_leg_cost=array(cost),
+            profit_ranges=profit_ranges,
+            minimum_return_in_the_domain=strategyprofit.min(),
+            maximum_return_in_the_domain=strategyprofit.max(),
+            implied_volatility=impvol,
+            in_the_money_probability=itmprob,
+            delta=delta,
+            gamma=gamma,
+            theta=theta,
+            vega=vega,
+            **opt_outputs,
+        )
+
+        return EngineState(
+            outputs=outputs.to_pydantic() if validate else outputs,
+            s=s,
+            s_mc=s_mc,
+            profit=profit,
+            profit_mc=profit_mc,
+            strategyprofit=strategyprofit,
+            strategyprofit_mc=strategyprofit_mc,
+            cost=cost,
+            impvol=impvol,
+            itmprob=itmprob,
+            delta=delta,
+            gamma=gamma,
+            vega=vega,
+            theta=theta,
+            profitprob=profitprob,
+            profittargprob=profittargprob,
+            losslimitprob=losslimitprob,
+            profit_ranges=profit_ranges,
+            profit_target_range=profit_target_range,
+            loss_limit_ranges=loss_limit_ranges,
+            contracts=contracts,
+            leg_contract=leg_contract,
+            contract_legs=contract_legs,
+        )
+
+    def _get_greeks(self):
+        """
+        _get_greeks -> returns the implied volatility, the ITM probability and
+        the Greeks (Delta, Gamma, Vega and Theta) of all legs, computed at once
+        from the leg columns.
+        """
+        legs = self.legs
+        nlegs = legs.shape[0]
+        impvol = zeros(nlegs)
+        itmprob = zeros(nlegs)
+        delta = zeros(nlegs)
+        gamma = zeros(nlegs)
+        vega = zeros(nlegs)
+        theta = zeros(nlegs)
+
+        isstock = legs["type"] == LegType.STOCK
+        itmprob[isstock] = 1.0
+        delta[isstock] = 1.0
+
+        # Options whose previous position is closed have no Greeks
+        isopen = (legs["type"] <= LegType.PUT) & (legs["prev_pos"] >= 0.0)
+
+        if not isopen.any():
+            return impvol, itmprob, delta, gamma, vega, theta
+
+        options = legs[isopen]
+        iscall = options["type"] == LegType.CALL
+        time2maturity = options["days_to_maturity"] / self.days_in_year
+        d1, d2 = get_d1_d2(
+            self.stock_price,
+            options["strike"],
+            self.r,
+            self.volatility,
+            time2maturity,
+            self.y,
+        )
+
+        gamma[isopen] = get_gamma(
+            self.stock_price, self.volatility, time2maturity, d1, self.y
+        )
+        vega[isopen] = get_vega(self.stock_price, time2maturity, d1, self.y)
+        itmprob[isopen] = where(
+            iscall,
+            get_itm_prob("call", d2, time2maturity, self.y),
+            get_itm_prob("put", d2, time2maturity, self.y),
+        )
+        delta[isopen] = options["action"] * where(
+            iscall,
+            get_delta("call", d1, time2maturity, self.y),
+            get_delta("put", d1, time2maturity, self.y),
+        )
+        theta[isopen] = (
+            options["action"]
+            * where(
+                iscall,
+                get_theta(
+                    "call",
+                    self.stock_price,
+                    options["strike"],
+                    self.r,
+                    self.volatility,
+                    time2maturity,
+                    d1,
+                    d2,
+                    self.y,
+                ),
+                get_theta(
+                    "put",
+                    self.stock_price,
+                    options["strike"],
+                    self.r,
+                    self.volatility,
+                    time2maturity,
+                    d1,
+                    d2,
+                    self.y,
+                ),
+            )
+            / self.days_in_year
         )
 
+        optimpvol = zeros(options.shape[0])
+
+        for code, mask in ((LegType.CALL, iscall), (LegType.PUT, ~iscall)):
+            if mask.any():
+                optimpvol[mask] = get_implied_vol(
+                    LEG_TYPES[code],  # type: ignore
+                    options["premium"][mask],
+                    self.stock_price,
+                    options["strike"][mask],
+                    self.r,
+                    time2maturity[mask],
+                    self.y,
+                )
+
+        impvol[isopen] = optimpvol
+
+        return impvol, itmprob, delta, gamma, vega, theta
+
+    def _get_costs(self):
+        """
+        _get_costs -> returns the cost of each leg of the strategy, as a list.
+        """
+        legs = self.legs
+        type = legs["type"]
+        action = legs["action"]
+        n = legs["n"]
+        prev_pos = legs["prev_pos"]
+        isoption = type <= LegType.PUT
+        price = where(isoption, legs["premium"], self.stock_price)
+        commission = where(isoption, self.opt_commission, self.stock_commission)
+        opening_price = where(prev_pos > 0.0, prev_pos, price)
+
+        return where(
+            type == LegType.CLOSED,
+            prev_pos,
+            where(
+                prev_pos < 0.0,  # Previous position is closed
+                -action * (price + prev_pos) * n,
+                n * (-action * opening_price) - commission,
+            ),
+        ).tolist()
+
+    def _get_strategy_pl(self, s, contracts, contract_legs, cost, profit=None):
+        """
+        _get_strategy_pl -> returns the profit/loss profile of the strategy for
+        the stock prices in 's', evaluating each distinct contract once. If
+        'profit' is given, the profile of each leg is also stored in its rows.
+        """
+        strategyprofit = zeros(s.shape[0])
+
+        for contract, legs in enumerate(contract_legs):
+            if len(legs) == 1:
+                pl = self._get_leg_pl(legs[0], s)[0]
+                strategyprofit += pl
+
+                if profit is not None:
+                    profit[legs[0]] = pl
+
+                continue
+
+            quantity = contracts["action"][contract] * contracts["n"][contract]
+
+            for leg in legs:
+                strategyprofit += cost[leg]
+
+            if quantity == 0 and profit is None:
+                continue
+
+            unit_pl = self._get_unit_pl(contracts[contract], s)
+            strategyprofit += quantity * unit_pl
+
+            if profit is not None:
+                for leg in legs:
+                    profit[leg] = self._get_netted_leg_pl(leg, unit_pl, cost)
+
+        return strategyprofit
+
+    def _get_unit_pl(self, contract, s):
+        """
+        _get_unit_pl -> returns the profit/loss profile of buying one unit of a
+        contract at zero cost, for the stock prices in 's'.
+        """
+        type, _, strike, _, _, _, use_bs, days_to_maturity, _ = contract.item()
+
+        if type == LegType.STOCK:
+            return getPLprofilestock(0.0, "buy", 1, s)[0]
+        elif use_bs:
+            return getPLprofileBS(
+                LEG_TYPES[type],
+                "buy",
+                strike,
+                0.0,
+                self.r,
+                (days_to_maturity - self.days_to_target) / self.days_in_year,
+                self.volatility,
+                1,
+                s,
+                self.y,
+            )[0]
+
+        return getPLprofile(LEG_TYPES[type], "buy", strike, 0.0, 1, s)[0]
+
+    def _get_netted_leg_pl(self, leg, unit_pl, cost):
+        """
+        _get_netted_leg_pl -> returns the profit/loss profile of a leg that was
+        netted with other legs, from the unit profile of its contract.
+        """
+        return self.legs["action"][leg] * self.legs["n"][leg] * unit_pl + cost[leg]
+
+    def _get_leg_pl(self, leg, s):
+        """
+        _get_leg_pl -> returns the profit/loss profile and the cost of a leg of
+        the strategy, for the stock prices in 's'. Legs whose profit/loss does
+        not depend on the stock price return their profile as a scalar.
+        """
+        (
+            type,
+            action,
+            strike,
+            premium,
+            n,
+            prev_pos,
+            use_bs,
+            days_to_maturity,
+            _,
+        ) = self.legs[leg].item()
+
+        if type in (LegType.CALL, LegType.PUT):
+            if prev_pos < 0.0:  # Previous position is closed
+                costtmp = (premium + prev_pos) * n
+
+                if action == 1:
+                    costtmp *= -1.0
+
+                return costtmp, costtmp
+
+            if prev_pos > 0.0:  # Premium of the open position
+                opval = prev_pos
+            else:  # Current premium
+                opval = premium
+
+            if use_bs:
+                return getPLprofileBS(
+                    LEG_TYPES[type],
+                    ACTIONS[action],
+                    strike,
+                    opval,
+                    self.r,
+                    (days_to_maturity - self.days_to_target) / self.days_in_year,
+                    self.volatility,
+                    n,
+                    s,
+                    self.y,
+                    self.opt_commission,
+                )
+
+            return getPLprofile(
+                LEG_TYPES[type],
+                ACTIONS[action],
+                strike,
+                opval,
+                n,
+                s,
+                self.opt_commission,
+            )
+        elif type == LegType.STOCK:
+            if prev_pos < 0.0:  # Previous position is closed
+                costtmp = (self.stock_price + prev_pos) * n
+
+                if action == 1:
+                    costtmp *= -1.0
+
+                return costtmp, costtmp
+
+            if prev_pos > 0.0:  # Stock price at previous position
+                stockpos = prev_pos
+            else:  # Spot price of the stock at start date
+                stockpos = self.stock_price
+
+            return getPLprofilestock(
+                stockpos,
+                ACTIONS[action],
+                n,
+                s,
+                self.stock_commission,
+            )
+        else:
+            return prev_pos, prev_pos
+
+    def _get_pop(self, profit_ranges, time2target, s_mc):
+        """
+        _get_pop -> returns the probability that the stock price on the target
+        date falls within the given ranges, according to the chosen distribution.
+        """
+        if self.distribution in ("normal", "laplace", "black-scholes"):
+            return getPoP(
+                profit_ranges,
+                self.distribution,
+                stockprice=self.stock_price,
+                volatility=self.volatility,
+                time2maturity=time2target,
+                interestrate=self.r,
+                dividendyield=self.y,
+            )
+        elif self.distribution == "array":
+            return getPoP(profit_ranges, self.distribution, array=s_mc)
+
+        return 0.0
+
     def get_pl(self, leg=-1):
         """
         get_pl -> returns the profit/loss profile of either a leg or the whole
@@ -513,10 +826,89 @@ class StrategyEngine:
         P/L profile : numpy array
             Profit/loss profile of either a leg or the whole strategy.
         """
-        if self.profit.size > 0 and leg >= 0 and leg < self.profit.shape[0]:
-            return self.s, self.profit[leg]
+        state = self.state
+
+        if state is None:
+            raise RuntimeError("The strategy has not been run yet!")
+
+        if leg >= 0 and leg < self.legs.shape[0]:
+            if self.per_leg_profiles:
+                return state.s, state.profit[leg]
+
+            contract = state.leg_contract[leg]
+
+            if len(state.contract_legs[contract]) > 1:
+                return state.s, self._get_netted_leg_pl(
+                    leg,
+                    self._get_unit_pl(state.contracts[contract], state.s),
+                    state.cost,
+                )
+
+            return state.s, zeros(state.s.shape[0]) + self._get_leg_pl(leg, state.s)[0]
         else:
-            return self.s, self.strategyprofit
+            return state.s, state.strategyprofit
+
+    def value_at(self, spots):
+        """
+        value_at -> returns the profit/loss of the strategy on the target date
+        at the given stock prices only, without building the stock price grid.
+        The strategy is compiled on the first call and the compiled payoff is
+        cached in 'payoff', so later changes to the engine's attributes are not
+        taken into account unless 'payoff' is reset to None.
+
+        Parameters
+        ----------
+        spots : float | array
+            Stock price or array of stock prices.
+
+        Returns
+        -------
+        P/L : float | numpy array
+            Profit/loss at each stock price, a float if 'spots' is a float.
+        """
+        if self.payoff is None:
+            self.payoff = self.compile()
+
+        pl = self.payoff(spots)
+
+        return pl.item() if pl.ndim == 0 else pl
+
+    def compile(self):
+        """
+        compile -> returns the profit/loss of the strategy on the target date
+        as a function of the stock price, which can be evaluated on any array of
+        stock prices (e.g., a grid, Monte Carlo samples or historical paths)
+        without running the engine again. Netted legs are compiled once.
+
+        Returns
+        -------
+        payoff : PayoffFunction
+        """
+        contracts = net_legs(self.legs)[0]
+        type = contracts["type"]
+        quantity = (contracts["action"] * contracts["n"]).astype(float64)
+        isopen = contracts["prev_pos"] >= 0.0
+        isoption = (type <= LegType.PUT) & isopen
+        expiring = isoption & ~contracts["use_bs"]
+        later = isoption & contracts["use_bs"]
+
+        return PayoffFunction(
+            constant=sum(self._get_costs()),
+            slope=quantity[(type == LegType.STOCK) & isopen].sum(),
+            strikes=contracts["strike"][expiring],
+            weights=quantity[expiring],
+            is_call=type[expiring] == LegType.CALL,
+            bs_strikes=contracts["strike"][later],
+            bs_weights=quantity[later],
+            bs_is_call=type[later] == LegType.CALL,
+            bs_time2maturity=(
+                contracts["days_to_maturity"][later] - self.days_to_target
+            )
+            / self.days_in_year,
+            r=self.r,
+            volatility=self.volatility,
+            y=self.y,
+        )
 
     """
     Properties
@@ -530,8 +922,48 @@ class StrategyEngine:
     terminalstockprices : array
         A Numpy array or terminal stock prices typically generated by Monte Carlo 
         simulations. It is used to compute strategy's expected profit and loss. 
+    s, s_mc : array
+        Stock price grid and terminal stock prices. If set before running the
+        engine, they are used instead of the default grid and of the Monte
+        Carlo prices; after a run, those of the last run.
+    type, action : list, readonly
+        Type ('call', 'put', 'stock' or 'closed') and action ('buy', 'sell' or
+        'n/a') of each leg, decoded from 'legs'.
+    strike, premium, n, prev_pos, use_bs, days_to_maturity, expiration : array
+        Views of the corresponding columns of 'legs'.
     """
 
+    def __getattr__(self, name):
+        # The arrays and probabilities of the last run are read from its state
+        if name in STATE_FIELDS and self.__dict__.get("state") is not None:
+            return getattr(self.state, name)
+
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    @property
+    def s(self):
+        if self._s.shape[0] == 0 and self.state is not None:
+            return self.state.s
+
+        return self._s
+
+    @s.setter
+    def s(self, value):
+        self._s = value
+
+    @property
+    def s_mc(self):
+        if self._s_mc.shape[0] == 0 and self.state is not None:
+            return self.state.s_mc
+
+        return self._s_mc
+
+    @s_mc.setter
+    def s_mc(self, value):
+        self._s_mc = value
+
     @property
     def days2target(self):
         return self.days_to_target
@@ -543,3 +975,39 @@ class StrategyEngine:
     @property
     def terminalstockprices(self):
         return self.s_mc
+
+    @property
+    def type(self):
+        return [LEG_TYPES[code] for code in self.legs["type"]]
+
+    @property
+    def action(self):
+        return [ACTIONS[code] for code in self.legs["action"]]
+
+    @property
+    def strike(self):
+        return self.legs["strike"]
+
+    @property
+    def premium(self):
+        return self.legs["premium"]
+
+    @property
+    def n(self):
+        return self.legs["n"]
+
+    @property
+    def prev_pos(self):
+        return self.legs["prev_pos"]
+
+    @property
+    def use_bs(self):
+        return self.legs["use_bs"]
+
+    @property
+    def days_to_maturity(self):
+        return self.legs["days_to_maturity"]
+
+    @property
+    def expiration(self):
+        return self.legs["expiration"]
@@ -0,0 +1,362 @@
+"""
+Local append-only store of daily stock price histories, so that
+'api.get_stock_history()' only downloads the bars it does not have yet.
+
+The history of each ticker is stored column by column in raw binary files,
+which are memory-mapped on reading:
+
+    <path>/<TICKER>/
+        Date.<generation>.bin     (datetime64[s])
+        Close.<generation>.bin    (float64, one file per column)
+        meta.json                 (columns, number of rows, generation, first
+                                   date covered and time of the last update)
+
+New bars are appended to the column files past the stored rows, and
+'meta.json' is replaced afterwards, so readers never see partial rows. Rows
+that readers may have mapped are never written: bars older than the stored
+ones, or a refetched last bar that changed, are merged by writing a new
+generation of the column files.
+"""
+
+import datetime as dt
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+DATE_DTYPE = np.dtype("datetime64[s]")
+VALUE_DTYPE = np.dtype(np.float64)
+
+
+class HistoryStore:
+    """
+    On-disk store of daily stock price histories rooted at 'path'. The latest
+    bars of a ticker are considered up to date for 'ttl' seconds after they
+    were fetched.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 3600.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._locks: dict[str, Lock] = {}
+        self._locks_lock = Lock()
+
+    def missing(
+        self, ticker: str, start: dt.date
+    ) -> list[tuple[dt.date, dt.date | None]]:
+        """
+        Returns the (start, end) date ranges, end exclusive (open-ended if
+        None), to fetch so that the history of a ticker covers 'start' to date.
+        The last stored bar is fetched again, as it may have been incomplete.
+        """
+        meta = self._read_meta(ticker)
+
+        if meta is None:
+            return [(start, None)]
+
+        ranges: list[tuple[dt.date, dt.date | None]] = []
+        covered = dt.date.fromisoformat(meta["start"])
+
+        if start < covered:
+            ranges.append((start, covered))
+
+        if time.time() - meta["updated"] > self.ttl:
+            ranges.append((dt.date.fromisoformat(meta["last"] or meta["start"]), None))
+
+        return ranges
+
+    def merge(
+        self,
+        ticker: str,
+        bars: pd.DataFrame,
+        start: dt.date,
+        end: dt.date | None = None,
+    ) -> None:
+        """
+        Merges the bars of a ticker fetched for the range 'start' to 'end'
+        (exclusive, open-ended if None) into its stored history. Fetched bars
+        replace stored bars of the same date.
+        """
+        bars = _normalize(bars)
+
+        with self._lock(ticker):
+            directory = self._directory(ticker)
+            meta = self._read_meta(ticker)
+
+            if meta is None or not meta["columns"]:
+                meta = {
+                    "columns": list(bars.columns),
+                    "nrows": 0,
+                    "generation": 0,
+                    "start": start.isoformat(),
+                    "last": None,
+                    "updated": 0.0,
+                }
+                directory.mkdir(parents=True, exist_ok=True)
+                self._write(directory, meta, bars, 0)
+            else:
+                bars = bars.reindex(columns=meta["columns"])
+                dates = _map(
+                    directory / f"Date.{meta['generation']}.bin",
+                    DATE_DTYPE,
+                    meta["nrows"],
+                )
+
+                if meta["nrows"] > 0 and (bars.index < dates[0]).any():
+                    # Older bars: the whole history is written again
+                    merged = pd.concat(
+                        [
+                            bars[bars.index < dates[0]],
+                            self._load(directory, meta),
+                            bars[bars.index >= dates[-1]],
+                        ]
+                    )
+                    merged = merged[~merged.index.duplicated(keep="last")]
+                    meta["generation"] += 1
+                    self._write(directory, meta, merged, 0)
+                elif meta["nrows"] > 0:
+                    stored = self._load(directory, meta)
+                    newer = bars[bars.index >= dates[-1]]
+
+                    if (
+                        newer.shape[0] > 0
+                        and newer.index[0] == dates[-1]
+                        and not np.array_equal(
+                            newer.iloc[0].to_numpy(),
+                            stored.iloc[-1].to_numpy(),
+                            equal_nan=True,
+                        )
+                    ):
+                        # The last bar changed: written with the whole history
+                        merged = pd.concat([stored.iloc[:-1], newer])
+                        meta["generation"] += 1
+                        self._write(directory, meta, merged, 0)
+                    else:
+                        newer = newer[newer.index > dates[-1]]
+                        self._write(directory, meta, newer, meta["nrows"])
+                else:
+                    self._write(directory, meta, bars, 0)
+
+            meta["start"] = min(dt.date.fromisoformat(meta["start"]), start).isoformat()
+
+            if end is None:
+                meta["updated"] = time.time()
+
+            _write_json(directory / "meta.json", meta)
+
+            if meta["generation"] > 0:
+                _remove_generation(directory, meta["generation"] - 1)
+
+    def load(
+        self,
+        ticker: str,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the stored bars of a ticker from 'start' (inclusive) to 'end'
+        (exclusive), indexed by date. The columns are read-only views of the
+        memory-mapped files, so no data is copied.
+        """
+        while True:
+            meta = self._read_meta(ticker)
+
+            if meta is None:
+                raise ValueError(f"No price history of {ticker} in the store!")
+
+            try:
+                history = self._load(self._directory(ticker), meta)
+            except FileNotFoundError:  # Replaced by a concurrent 'merge()'
+                continue
+
+            break
+
+        dates = history.index.values
+        first = 0 if start is None else int(np.searchsorted(dates, _to_date64(start)))
+        last = (
+            dates.shape[0]
+            if end is None
+            else int(np.searchsorted(dates, _to_date64(end)))
+        )
+
+        return history.iloc[first:last]
+
+    def load_panel(
+        self,
+        tickers: list[str],
+        start: dt.date | None = None,
+        column: str = "Close",
+    ) -> pd.DataFrame:
+        """
+        Returns a column of the stored histories of many tickers, e.g., the
+        closing prices to estimate volatilities, as a (dates x tickers) data
+        frame with NaN where a ticker has no bar. Tickers not in the store are
+        left out.
+        """
+        columns = {}
+
+        for ticker in tickers:
+            data = self._read_column(ticker, column)
+
+            if data is None:
+                continue
+
+            dates, values = data
+            first = (
+                0 if start is None else int(np.searchsorted(dates, _to_date64(start)))
+            )
+            columns[ticker] = dates[first:], values[first:]
+
+        index = np.unique(
+            np.concatenate(
+                [dates for dates, _ in columns.values()] or [np.empty(0, DATE_DTYPE)]
+            )
+        )
+        panel = np.full((index.shape[0], len(columns)), np.nan)
+
+        for i, (dates, values) in enumerate(columns.values()):
+            panel[np.searchsorted(index, dates), i] = values
+
+        return pd.DataFrame(
+            panel, index=pd.DatetimeIndex(index, name="Date"), columns=list(columns)
+        )
+
+    def tickers(self) -> list[str]:
+        """
+        Returns the tickers in the store.
+        """
+        if not self.path.is_dir():
+            return []
+
+        return sorted(
+            entry.name
+            for entry in self.path.iterdir()
+            if (entry / "meta.json").is_file()
+        )
+
+    def _directory(self, ticker: str) -> Path:
+        return self.path / ticker.upper()
+
+    def _lock(self, ticker: str) -> Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(ticker.upper(), Lock())
+
+    def _read_meta(self, ticker: str) -> dict | None:
+        try:
+            return json.loads((self._directory(ticker) / "meta.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def _read_column(
+        self, ticker: str, column: str
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        # Read into memory rather than mapped, so that no file is kept open
+        while True:
+            meta = self._read_meta(ticker)
+
+            if meta is None or column not in meta["columns"]:
+                return None
+
+            directory = self._directory(ticker)
+            nrows, generation = meta["nrows"], meta["generation"]
+
+            try:
+                return (
+                    np.fromfile(
+                        directory / f"Date.{generation}.bin", DATE_DTYPE, nrows
+                    ),
+                    np.fromfile(
+                        directory / f"{column}.{generation}.bin", VALUE_DTYPE, nrows
+                    ),
+                )
+            except FileNotFoundError:  # Replaced by a concurrent 'merge()'
+                continue
+
+    def _load(self, directory: Path, meta: dict) -> pd.DataFrame:
+        nrows, generation = meta["nrows"], meta["generation"]
+        dates = _map(directory / f"Date.{generation}.bin", DATE_DTYPE, nrows)
+
+        return pd.DataFrame(
+            {
+                column: _map(
+                    directory / f"{column}.{generation}.bin", VALUE_DTYPE, nrows
+                )
+                for column in meta["columns"]
+            },
+            index=pd.DatetimeIndex(dates, name="Date", copy=False),
+            copy=False,
+        )
+
+    def _write(
+        self, directory: Path, meta: dict, bars: pd.DataFrame, offset: int
+    ) -> None:
+        """
+        Writes the bars to the column files of the current generation from row
+        'offset' on, either zero (a new generation) or the number of stored
+        rows, and updates the number of rows and the last date in 'meta'.
+        """
+        if bars.shape[0] == 0:
+            return
+
+        generation = meta["generation"]
+        columns = [("Date", bars.index.values.astype(DATE_DTYPE))] + [
+            (column, bars[column].to_numpy(VALUE_DTYPE)) for column in meta["columns"]
+        ]
+
+        for column, values in columns:
+            path = directory / f"{column}.{generation}.bin"
+
+            with open(path, "r+b" if offset > 0 else "wb") as f:
+                f.seek(offset * values.itemsize)
+                f.write(values.tobytes())
+                # Drops the rows left by an interrupted write
+                f.truncate()
+
+        meta["nrows"] = offset + bars.shape[0]
+        meta["last"] = bars.index[-1].date().isoformat()
+
+
+def _normalize(bars: pd.DataFrame) -> pd.DataFrame:
+    # Bars are indexed by (naive) date, sorted and unique, with float columns
+    index = pd.DatetimeIndex(bars.index)
+
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    bars = bars.select_dtypes("number").astype(VALUE_DTYPE)
+    bars.index = index.normalize().rename("Date")
+    bars = bars[~bars.index.duplicated(keep="last")]
+
+    return bars.sort_index()
+
+
+def _to_date64(date: dt.date) -> np.datetime64:
+    return np.datetime64(date, "D").astype(DATE_DTYPE)
+
+
+def _map(path: Path, dtype: np.dtype, nrows: int) -> np.ndarray:
+    if nrows == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r", shape=(nrows,))
+
+
+def _remove_generation(directory: Path, generation: int) -> None:
+    # Readers still mapping the files keep their data until they are done.
+    # Does nothing if the generation was already removed
+    for path in directory.glob(f"*.{generation}.bin"):
+        path.unlink()
+
+
+def _write_json(path: Path, data: dict) -> None:
+    fd, staging = tempfile.mkstemp(dir=path.parent, prefix=".tmp")
+
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+
+    os.replace(staging, path)
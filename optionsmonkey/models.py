@@ -1,12 +1,23 @@
 import datetime as dt
-from typing import Literal, Any
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Literal, Any, Sequence, TypeVar
 
+import numpy as np
 import pandas as pd
 from humps import decamelize
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import (
+    BaseModel,
+    Field,
+    TypeAdapter,
+    field_validator,
+    model_validator,
+    ConfigDict,
+)
 
 OptionType = Literal["call", "put"]
 Range = tuple[float, float]
+ModelT = TypeVar("ModelT", bound=BaseModel)
 Country = Literal[
     "US",
     "Canada",
@@ -147,6 +158,27 @@ class Inputs(BaseModel):
     nmc_prices : int, optional
         Number of random terminal prices to be generated when calculationg
         the average profit and loss of a strategy. Default is 100,000.
+    var_confidence_levels : list, optional
+        Confidence levels, between 0 and 1 (e.g., 0.95), at which the value at
+        risk and the conditional value at risk are computed from the terminal
+        prices used to calculate the average profit and loss. Default is None,
+        which means they are not calculated.
+    pl_quantiles : list, optional
+        Quantiles, between 0 and 1 inclusive, of the strategy's profit/loss
+        distribution to be computed from the same terminal prices. Default is
+        None, which means they are not calculated.
+
+        Both require terminal prices, i.e., 'compute_expectation' set to True
+        or 'distribution' set to 'array'.
+    per_leg_profiles : logical, optional
+        Whether the profit/loss profile of each leg is kept in memory. If
+        False, only the strategy's profit/loss is accumulated and the profile
+        of a leg is computed on demand when requested. Default is True.
+    seed : int, optional
+        Seed of the random number generator used to create terminal stock
+        prices, which makes Monte Carlo results reproducible. Default is None,
+        in which case every run draws fresh prices from a new
+        `numpy.random.default_rng()`; 'numpy.random.seed()' has no effect.
     """
 
     stock_price: float = Field(gt=0)
@@ -168,7 +200,91 @@ class Inputs(BaseModel):
     distribution: Literal["black-scholes", "normal", "laplace", "array"] = (
         "black-scholes"
     )
-    nmc_prices: float = 100000
+    nmc_prices: float = Field(100000, ge=1)
+    var_confidence_levels: list[float] | None = None
+    pl_quantiles: list[float] | None = None
+    per_leg_profiles: bool = True
+    seed: int | None = None
+
+    @field_validator("var_confidence_levels")
+    @classmethod
+    def validate_var_confidence_levels(
+        cls, v: list[float] | None
+    ) -> list[float] | None:
+        if v is not None and not all(0.0 < level < 1.0 for level in v):
+            raise ValueError("Confidence levels must be between 0 and 1!")
+
+        return v
+
+    @field_validator("pl_quantiles")
+    @classmethod
+    def validate_pl_quantiles(cls, v: list[float] | None) -> list[float] | None:
+        if v is not None and not all(0.0 <= q <= 1.0 for q in v):
+            raise ValueError("Quantiles must be between 0 and 1!")
+
+        return v
+
+    @model_validator(mode="after")
+    def validate_risk_measures(self) -> "Inputs":
+        if (
+            (self.var_confidence_levels or self.pl_quantiles)
+            and not self.compute_expectation
+            and self.distribution != "array"
+        ):
+            raise ValueError(
+                "Value at risk and quantiles require 'compute_expectation' or "
+                "'distribution=\"array\"'!"
+            )
+
+        return self
+
+    def derive(
+        self, strategy: Sequence[dict[str, Any] | None] | None = None, **fields: Any
+    ) -> "Inputs":
+        """
+        Returns a copy of these `Inputs`, used as a validated template, with some
+        fields replaced by the keyword arguments and, optionally, some leg
+        fields replaced by the entries of 'strategy', one dictionary (or None,
+        to keep the leg unchanged) per leg of the template.
+
+        This is a trusted path for strategies generated by code: the new values
+        are not validated, which makes it several times cheaper than
+        `Inputs.model_validate` when evaluating many candidate strategies, e.g.:
+
+            template = Inputs.model_validate(...)
+            candidates = [
+                template.derive(strategy=[{"strike": low}, {"strike": high}])
+                for low, high in strikes
+            ]
+        """
+        if strategy is not None:
+            if len(strategy) != len(self.strategy):
+                raise ValueError(
+                    "The number of leg updates must match the number of legs!"
+                )
+
+            fields["strategy"] = [
+                _derive(leg, update) if update else leg
+                for leg, update in zip(self.strategy, strategy)
+            ]
+
+        return _derive(self, fields)
+
+
+def _derive(model: ModelT, update: dict[str, Any]) -> ModelT:
+    """
+    Copies a model, replacing some of its fields, without validation. It is
+    equivalent to `model_copy(update=...)` at a fraction of its cost.
+    """
+    new = object.__new__(type(model))
+    object.__setattr__(new, "__dict__", model.__dict__ | update)
+    object.__setattr__(
+        new, "__pydantic_fields_set__", model.__pydantic_fields_set__ | update.keys()
+    )
+    object.__setattr__(new, "__pydantic_extra__", None)
+    object.__setattr__(new, "__pydantic_private__", None)
+
+    return new
 
 
 class BlackScholesInfo(BaseModel):
@@ -263,30 +379,123 @@ class UnderlyingAsset(BaseModel):
     display_name: str
 
 
+# Yahoo keys of the underlying asset fields decoded by the quote fast path
+QUOTE_KEYS = {
+    "regular_market_price": "regularMarketPrice",
+    "bid": "bid",
+    "ask": "ask",
+    "dividend_yield": "dividendYield",
+}
+RANGE_KEYS = frozenset({"regular_market_day_range", "fifty_two_week_range"})
+
+
+@lru_cache(maxsize=None)
+def _snake_key(key: str) -> str:
+    return decamelize(key)
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(name: str) -> TypeAdapter:
+    return TypeAdapter(UnderlyingAsset.model_fields[name].annotation)
+
+
+class LazyUnderlyingAsset:
+    """
+    Underlying asset of an options chain, holding the raw (camel-cased) dict
+    returned by Yahoo and decoding each `UnderlyingAsset` field on first
+    attribute access. The quote fields (regular_market_price, bid, ask and
+    dividend_yield) are read directly, without pydantic validation. A field
+    missing from the raw dict, or null, raises `AttributeError`, so 'hasattr()'
+    and 'getattr()' with a default work as usual.
+
+    Fields are not validated when the chain is built: use `to_model()` to
+    validate all the fields at once and get the `UnderlyingAsset` model.
+    """
+
+    def __init__(self, raw: dict[str, Any]):
+        self.raw = raw
+        self._keys: dict[str, str] | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or name not in UnderlyingAsset.model_fields:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        value: Any = self._get_raw(name)
+
+        if value is None:
+            raise AttributeError(f"Field '{name}' is null in the raw data!")
+
+        if name in QUOTE_KEYS:
+            value = float(value)
+        else:
+            value = _field_adapter(name).validate_python(value)
+
+        self.__dict__[name] = value
+
+        return value
+
+    def to_model(self) -> UnderlyingAsset:
+        """
+        Validates all the fields and returns them as an `UnderlyingAsset`.
+        """
+        if "_model" not in self.__dict__:
+            # Missing fields are left to pydantic, which reports all of them
+            self.__dict__["_model"] = UnderlyingAsset.model_validate(
+                {
+                    name: self._get_raw(name)
+                    for name in UnderlyingAsset.model_fields
+                    if name in self._get_keys()
+                }
+            )
+
+        return self.__dict__["_model"]
+
+    def _get_keys(self) -> dict[str, str]:
+        if self._keys is None:
+            self._keys = {_snake_key(key): key for key in self.raw}
+
+        return self._keys
+
+    def _get_raw(self, name: str) -> Any:
+        try:
+            value = self.raw[self._get_keys()[name]]
+        except KeyError:
+            raise AttributeError(f"Field '{name}' is missing from the raw data!")
+
+        if name in RANGE_KEYS and value is not None:
+            low, high = value.split(" - ")
+            value = (float(low), float(high))
+
+        return value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(symbol={self.raw.get('symbol')!r})"
+
+
 class OptionsChain(BaseModel):
+    """
+    calls : pandas.DataFrame
+        Call options of the chain.
+    puts : pandas.DataFrame
+        Put options of the chain.
+    underlying : LazyUnderlyingAsset
+        Underlying asset, built from the raw dict returned by Yahoo. Its fields
+        are only decoded when accessed, and not validated when the chain is
+        built. This used to be an `UnderlyingAsset`, which
+        `underlying.to_model()` returns, validating all the fields.
+    """
+
     calls: pd.DataFrame
     puts: pd.DataFrame
-    underlying: UnderlyingAsset
+    underlying: LazyUnderlyingAsset
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     @field_validator("underlying", mode="before")
     @classmethod
-    def validate_underlying(cls, v: dict[str, Any]) -> UnderlyingAsset:
-        day_range_split = v["regularMarketDayRange"].split(" - ")
-        fifty_two_week_range_split = v["fiftyTwoWeekRange"].split(" - ")
-        return UnderlyingAsset.model_validate(
-            decamelize(v)
-            | {
-                "regular_market_day_range": (
-                    float(day_range_split[0]),
-                    float(day_range_split[1]),
-                ),
-                "fifty_two_week_range": (
-                    float(fifty_two_week_range_split[0]),
-                    float(fifty_two_week_range_split[1]),
-                ),
-            }
-        )
+    def validate_underlying(cls, v: Any) -> LazyUnderlyingAsset:
+        return v if isinstance(v, LazyUnderlyingAsset) else LazyUnderlyingAsset(v)
 
 
 class Outputs(BaseModel):
@@ -333,23 +542,82 @@ class Outputs(BaseModel):
     probability_of_profit_from_mc : float
         Probability of the strategy yielding at least $0.01 as calculated
         from Monte Carlo-created terminal stock prices.
+    value_at_risk : list
+        A Python list of values at risk, one per confidence level in
+        'var_confidence_levels', as calculated from Monte Carlo-created
+        terminal stock prices. Losses are reported as positive numbers.
+    conditional_value_at_risk : list
+        A Python list of conditional values at risk (expected shortfalls),
+        one per confidence level in 'var_confidence_levels'.
+    pl_quantiles : list
+        A Python list of quantiles of the strategy's profit/loss, one per
+        quantile in 'pl_quantiles', as calculated from Monte Carlo-created
+        terminal stock prices.
     """
 
     probability_of_profit: float
     profit_ranges: list[Range]
-    per_leg_cost: Range
+    per_leg_cost: tuple[float, ...]
     strategy_cost: float
     minimum_return_in_the_domain: float
     maximum_return_in_the_domain: float
-    implied_volatility: Range
-    in_the_money_probability: Range
-    delta: Range
-    gamma: Range
-    theta: Range
-    vega: Range
+    implied_volatility: tuple[float, ...]
+    in_the_money_probability: tuple[float, ...]
+    delta: tuple[float, ...]
+    gamma: tuple[float, ...]
+    theta: tuple[float, ...]
+    vega: tuple[float, ...]
     probability_of_profit_target: float | None = None
-    project_target_ranges: Range | None = None
+    project_target_ranges: list[Range] | None = None
     probability_of_loss_limit: float | None = None
     average_profit_from_mc: float | None = None
     average_loss_from_mc: float | None = None
     probability_of_profit_from_mc: float | None = None
+    value_at_risk: list[float] | None = None
+    conditional_value_at_risk: list[float] | None = None
+    pl_quantiles: list[float] | None = None
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class RawOutputs:
+    """
+    Lightweight, unvalidated counterpart of `Outputs`, returned by
+    `StrategyEngine.run(validate=False)`. It has the same fields as `Outputs`,
+    but per-leg values and profit ranges are kept as numpy arrays, the ranges
+    with shape (number of ranges, 2). Use `to_pydantic()` to convert it to
+    `Outputs`, e.g. at an API boundary, or to compare outputs: raw outputs
+    compare (and hash) by identity.
+    """
+
+    probability_of_profit: float
+    profit_ranges: np.ndarray
+    per_leg_cost: np.ndarray
+    strategy_cost: float
+    minimum_return_in_the_domain: float
+    maximum_return_in_the_domain: float
+    implied_volatility: np.ndarray
+    in_the_money_probability: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+    probability_of_profit_target: float | None = None
+    project_target_ranges: np.ndarray | None = None
+    probability_of_loss_limit: float | None = None
+    average_profit_from_mc: float | None = None
+    average_loss_from_mc: float | None = None
+    probability_of_profit_from_mc: float | None = None
+    value_at_risk: np.ndarray | None = None
+    conditional_value_at_risk: np.ndarray | None = None
+    pl_quantiles: np.ndarray | None = None
+
+    def to_pydantic(self) -> Outputs:
+        values = {}
+
+        for field in fields(self):
+            value = getattr(self, field.name)
+            values[field.name] = (
+                value.tolist() if isinstance(value, np.ndarray) else value
+            )
+
+        return Outputs.model_validate(values)
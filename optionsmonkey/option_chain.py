@@ -1,4 +1,6 @@
-from numpy import round, array
+from numpy import round, arange, asarray, exp, log, maximum, sqrt
+from numpy.random import default_rng
+from numpy.typing import ArrayLike
 from optionsmonkey.black_scholes import (
     get_d1_d2,
     get_option_price,
@@ -6,7 +8,11 @@ from optionsmonkey.black_scholes import (
     get_gamma,
     get_theta,
     get_vega,
+    get_itm_prob,
 )
+from optionsmonkey.models import OptionType
+
+MIN_VOL = 0.01
 
 
 def create_bs_option_chain(
@@ -33,8 +39,7 @@ def create_bs_option_chain(
     n: number of strikes in the option chain.
     y: Annualized dividend yield (default is zero).
     """
-    deltax = (maxx - minx) / (n - 1)
-    x = round(array([(minx + i * deltax) for i in range(n)]), 2)
+    x = _get_strikes(minx, maxx, n)
     d1, d2 = get_d1_d2(s0, x, r, vol, time2maturity, y)
 
     return {
@@ -52,3 +57,81 @@ def create_bs_option_chain(
         "gamma": get_gamma(s0, vol, time2maturity, d1, y),
         "vega": get_vega(s0, time2maturity, d1, y),
     }
+
+
+def create_bs_option_surface(
+    s0: float,
+    minx: float,
+    maxx: float,
+    vol: float,
+    r: float,
+    time2maturity: ArrayLike,
+    n: int,
+    y: float = 0.0,
+    skew: float = 0.0,
+    smile: float = 0.0,
+    spread: float = 0.0,
+    seed: int | None = None,
+) -> dict:
+    """
+    Generates equally spaced option chains for many maturities at once,
+    calculated with the Black-Scholes model. 'strikes' and 'time2maturity' are
+    1D arrays of the strikes and maturities; all the other values are 2D arrays
+    with one row per maturity and one column per strike.
+
+    The implied volatility of a strike 'x' and a maturity 't' is
+    vol + skew * m + smile * m**2, floored at 1%, where m = log(x/f)/sqrt(t) is
+    the moneyness relative to the forward price 'f'. Bid and ask prices are
+    spread around the price by 'spread' times the price, scaled by a random
+    factor between 0.5 and 1.5 drawn from a generator seeded with 'seed'.
+
+    Arguments:
+    ----------
+    s0: stock price.
+    minx: lowest strike.
+    maxx: highest strike.
+    vol: annualized at-the-money volatility.
+    r: annualized risk-free interest rate.
+    time2maturity: times left before maturity (array-like).
+    n: number of strikes in the option chains.
+    y: Annualized dividend yield (default is zero).
+    skew: slope of the implied volatility in the moneyness (default is zero).
+    smile: curvature of the implied volatility in the moneyness (default is zero).
+    spread: bid-ask spread as a fraction of the price (default is zero).
+    seed: seed of the bid-ask noise (default is None).
+    """
+    x = _get_strikes(minx, maxx, n)
+    t = asarray(time2maturity, dtype=float).reshape(-1, 1)
+    moneyness = log(x / (s0 * exp((r - y) * t))) / sqrt(t)
+    iv = maximum(vol + skew * moneyness + smile * moneyness * moneyness, MIN_VOL)
+    d1, d2 = get_d1_d2(s0, x, r, iv, t, y)
+    rng = default_rng(seed)
+    chains = {
+        "strikes": x,
+        "time2maturity": t.reshape(-1),
+        "implied_volatility": iv,
+        "gamma": get_gamma(s0, iv, t, d1, y),
+        "vega": get_vega(s0, t, d1, y),
+    }
+
+    optypes: tuple[tuple[OptionType, str], ...] = (("call", "calls"), ("put", "puts"))
+
+    for optype, key in optypes:
+        price = get_option_price(optype, s0, x, r, t, d1, d2, y)
+        half_spread = 0.5 * spread * price * rng.uniform(0.5, 1.5, (2,) + iv.shape)
+        chains[key] = {
+            "price": price,
+            "bid": maximum(round(price - half_spread[0], 2), 0.0),
+            "ask": round(price + half_spread[1], 2),
+            "delta": get_delta(optype, d1, t, y),
+            "theta": get_theta(optype, s0, x, r, iv, t, d1, d2, y),
+            "itm_prob": get_itm_prob(optype, d2, t, y),
+        }
+
+    return chains
+
+
+def _get_strikes(minx: float, maxx: float, n: int):
+    deltax = (maxx - minx) / (n - 1)
+
+    return round(minx + arange(n) * deltax, 2)
@@ -0,0 +1,119 @@
+"""
+Compiled representation of the profit/loss of a strategy on the target date,
+for repeated evaluation on arbitrary arrays of stock prices.
+
+The profit/loss is decomposed into:
+    - a constant term, the total cost of the strategy (closed positions
+      included);
+    - a linear term, the net number of shares;
+    - hinge terms, one per option expiring on the target date, which are
+      folded into a single piecewise linear function of the stock price;
+    - Black-Scholes terms, one per option expiring after the target date.
+"""
+
+import numpy as np
+from scipy.special import ndtr
+
+CHUNK_SIZE = 16384
+
+
+class PayoffFunction:
+    """
+    Profit/loss of a strategy on the target date as a function of the stock
+    price, returned by `StrategyEngine.compile()`. Calling it on an array of
+    stock prices of any shape returns an array of the same shape.
+
+    Parameters
+    ----------
+    constant : float
+        Profit/loss not depending on the stock price.
+    slope : float
+        Net number of shares held.
+    strikes, weights, is_call : numpy array
+        Strike, signed number of contracts (positive if bought) and type of
+        the options expiring on the target date.
+    bs_strikes, bs_weights, bs_is_call, bs_time2maturity : numpy array
+        Strike, signed number of contracts, type and time remaining to
+        maturity from the target date (in years) of the options expiring after
+        the target date, priced with the Black-Scholes model.
+    r : float
+        Annualized risk-free interest rate.
+    volatility : float
+        Annualized volatility of the underlying asset.
+    y : float, optional
+        Annualized dividend yield. Default is zero.
+    """
+
+    def __init__(
+        self,
+        constant,
+        slope,
+        strikes,
+        weights,
+        is_call,
+        bs_strikes,
+        bs_weights,
+        bs_is_call,
+        bs_time2maturity,
+        r,
+        volatility,
+        y=0.0,
+    ):
+        strikes = np.asarray(strikes, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        is_put = ~np.asarray(is_call, dtype=bool)
+
+        # A put is a call minus the stock plus the strike: max(x-s,0) =
+        # max(s-x,0)-s+x. All hinges are then calls, and the sum of the hinges
+        # is piecewise linear, with one segment between consecutive strikes
+        constant += (weights[is_put] * strikes[is_put]).sum()
+        slope -= weights[is_put].sum()
+        self.breakpoints, inverse = np.unique(strikes, return_inverse=True)
+        hinge_weights = np.bincount(
+            inverse, weights=weights, minlength=self.breakpoints.shape[0]
+        )
+        self.slopes = np.concatenate(([slope], slope + np.cumsum(hinge_weights)))
+        self.intercepts = np.concatenate(
+            ([constant], constant - np.cumsum(hinge_weights * self.breakpoints))
+        )
+
+        self.bs_strikes = np.asarray(bs_strikes, dtype=np.float64)
+        self.bs_weights = np.asarray(bs_weights, dtype=np.float64)
+        self.bs_sign = np.where(np.asarray(bs_is_call, dtype=bool), 1.0, -1.0)
+        bs_time2maturity = np.asarray(bs_time2maturity, dtype=np.float64)
+        self.bs_dividend_discount = (
+            np.exp(-y * bs_time2maturity) if y > 0.0 else np.ones_like(bs_time2maturity)
+        )
+        self.bs_discounted_strikes = self.bs_strikes * np.exp(-r * bs_time2maturity)
+        self.bs_drift = (r - y + volatility * volatility / 2.0) * bs_time2maturity
+        self.bs_vol = volatility * np.sqrt(bs_time2maturity)
+
+    def __call__(self, s):
+        s = np.asarray(s, dtype=np.float64)
+        flat_s = s.reshape(-1)
+        segment = np.searchsorted(self.breakpoints, flat_s, side="right")
+        pl = self.intercepts[segment] + self.slopes[segment] * flat_s
+
+        if self.bs_weights.shape[0] > 0:
+            for start in range(0, flat_s.shape[0], CHUNK_SIZE):
+                pl[start : start + CHUNK_SIZE] += self._get_bs_pl(
+                    flat_s[start : start + CHUNK_SIZE]
+                )
+
+        return pl.reshape(s.shape)
+
+    def _get_bs_pl(self, s):
+        """
+        Returns the value of the Black-Scholes terms for the stock prices in
+        's', with option prices rounded to cents as in 'get_option_price()'.
+        """
+        s = s[:, None]
+        d1 = (np.log(s / self.bs_strikes) + self.bs_drift) / self.bs_vol
+        d2 = d1 - self.bs_vol
+        sign = self.bs_sign
+        prices = sign * (
+            s * self.bs_dividend_discount * ndtr(sign * d1)
+            - self.bs_discounted_strikes * ndtr(sign * d2)
+        )
+
+        return np.round(prices, 2) @ self.bs_weights
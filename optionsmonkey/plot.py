@@ -13,7 +13,7 @@ def plot_pl(st: StrategyEngine):
     -------
     None.
     """
-    if len(st.strategyprofit) == 0:
+    if st.state is None:
         raise RuntimeError(
             "Before plotting the profit/loss profile diagram, you must run a calculation!"
         )
@@ -0,0 +1,386 @@
+"""
+Sources of market data: options chains, stock price history and quotes.
+
+Every provider implements the `MarketDataProvider` protocol:
+    - `YFinanceProvider` downloads data from Yahoo Finance with yfinance;
+    - `ReplayProvider` replays options chains stored in CSV or Parquet files,
+      such as 'examples/msft_22-November-2021.csv';
+    - `SyntheticProvider` generates Black-Scholes options chains and random
+      price histories, deterministically and without network access.
+"""
+
+import datetime as dt
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Mapping, NamedTuple, Protocol
+
+import numpy as np
+import pandas as pd
+from yfinance import Ticker
+
+from optionsmonkey.models import LazyUnderlyingAsset, OptionsChain
+from optionsmonkey.option_chain import create_bs_option_chain
+
+
+class Quote(NamedTuple):
+    price: float
+    bid: float | None = None
+    ask: float | None = None
+    dividend_yield: float = 0.0
+
+
+class MarketDataProvider(Protocol):
+    def get_options_chain(
+        self, ticker: str, expiration_date: dt.date
+    ) -> OptionsChain: ...
+
+    def get_expirations(self, ticker: str) -> list[dt.date]: ...
+
+    def get_stock_history(
+        self,
+        ticker: str,
+        num_of_months: int,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the daily bars of the stock over the last 'num_of_months'
+        months or, if 'start' is given, from 'start' (inclusive) to 'end'
+        (exclusive, open-ended if None), indexed by date.
+        """
+        ...
+
+    def get_quote(self, ticker: str) -> Quote: ...
+
+
+class YFinanceProvider:
+    """
+    Market data downloaded from Yahoo Finance, optionally through an HTTP
+    'session' shared by all requests.
+    """
+
+    def __init__(self, session: Any = None):
+        self.session = session
+
+    def get_options_chain(self, ticker: str, expiration_date: dt.date) -> OptionsChain:
+        res = _get_ticker(ticker, self.session).option_chain(
+            expiration_date.strftime("%Y-%m-%d")
+        )
+
+        return OptionsChain(
+            calls=res.calls,
+            puts=res.puts,
+            underlying=res.underlying,
+        )
+
+    def get_expirations(self, ticker: str) -> list[dt.date]:
+        return [
+            dt.date.fromisoformat(expiration)
+            for expiration in _get_ticker(ticker, self.session).options
+        ]
+
+    def get_stock_history(
+        self,
+        ticker: str,
+        num_of_months: int,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> pd.DataFrame:
+        if start is not None:
+            return _get_ticker(ticker, self.session).history(start=start, end=end)
+
+        return _get_ticker(ticker, self.session).history(period=f"{num_of_months}mo")
+
+    def get_quote(self, ticker: str) -> Quote:
+        info = _get_ticker(ticker, self.session).info
+
+        return Quote(
+            price=info["regularMarketPrice"],
+            bid=info.get("bid"),
+            ask=info.get("ask"),
+            dividend_yield=info.get("dividendYield") or 0.0,
+        )
+
+
+class ReplayProvider:
+    """
+    Market data replayed from local files.
+
+    Parameters
+    ----------
+    chains : dict
+        Path of a CSV or Parquet file per ticker, with one row per option and
+        (case-insensitive) columns 'Type' ('call' or 'put'), 'Expiration'
+        (YYYY-MM-DD), 'Strike' and any other option data, e.g., 'Bid' and
+        'Ask'.
+    quotes : dict
+        Quote (or stock price) of each ticker at the time of the snapshot.
+    histories : dict, optional
+        Path of a CSV or Parquet file per ticker with the stock price history,
+        indexed by date as returned by 'get_stock_history()'.
+    """
+
+    def __init__(
+        self,
+        chains: Mapping[str, str | Path],
+        quotes: Mapping[str, Quote | float],
+        histories: Mapping[str, str | Path] | None = None,
+    ):
+        self.chains = {ticker.upper(): Path(path) for ticker, path in chains.items()}
+        self.quotes = {
+            ticker.upper(): quote if isinstance(quote, Quote) else Quote(quote)
+            for ticker, quote in quotes.items()
+        }
+        self.histories = {
+            ticker.upper(): Path(path) for ticker, path in (histories or {}).items()
+        }
+        self._tables: dict[str, pd.DataFrame] = {}
+
+    def get_options_chain(self, ticker: str, expiration_date: dt.date) -> OptionsChain:
+        table = self._get_table(ticker)
+        options = table[table["expiration"] == expiration_date.isoformat()]
+
+        if options.shape[0] == 0:
+            raise ValueError(
+                f"No options of {ticker} expiring on {expiration_date} to replay!"
+            )
+
+        calls, puts = (
+            options[options["type"] == optype]
+            .drop(columns=["type", "expiration"])
+            .reset_index(drop=True)
+            for optype in ("call", "put")
+        )
+
+        return OptionsChain(
+            calls=calls,
+            puts=puts,
+            underlying=_get_underlying(ticker, self.get_quote(ticker)),
+        )
+
+    def get_expirations(self, ticker: str) -> list[dt.date]:
+        return [
+            dt.date.fromisoformat(expiration)
+            for expiration in sorted(self._get_table(ticker)["expiration"].unique())
+        ]
+
+    def get_stock_history(
+        self,
+        ticker: str,
+        num_of_months: int,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> pd.DataFrame:
+        if ticker.upper() not in self.histories:
+            raise ValueError(f"No price history of {ticker} to replay!")
+
+        history = _read_table(self.histories[ticker.upper()], index_col=0)
+        history.index = pd.to_datetime(history.index)
+
+        return _get_window(history, num_of_months, start, end)
+
+    def get_quote(self, ticker: str) -> Quote:
+        if ticker.upper() not in self.quotes:
+            raise ValueError(f"No quote of {ticker} to replay!")
+
+        return self.quotes[ticker.upper()]
+
+    def _get_table(self, ticker: str) -> pd.DataFrame:
+        ticker = ticker.upper()
+
+        if ticker not in self._tables:
+            if ticker not in self.chains:
+                raise ValueError(f"No options chains of {ticker} to replay!")
+
+            table = _read_table(self.chains[ticker])
+            table.columns = [column.lower() for column in table.columns]
+            table["type"] = table["type"].str.lower()
+            table["expiration"] = pd.to_datetime(table["expiration"]).dt.strftime(
+                "%Y-%m-%d"
+            )
+            self._tables[ticker] = table
+
+        return self._tables[ticker]
+
+
+class SyntheticProvider:
+    """
+    Synthetic market data: options chains priced with the Black-Scholes model
+    around the current stock price, with weekly expirations on Fridays, and
+    price histories following a geometric Brownian motion. The data only
+    depends on the parameters and on 'seed'.
+
+    Parameters
+    ----------
+    quotes : dict
+        Quote (or stock price) of each ticker on 'start_date'.
+    volatility : float, optional
+        Annualized volatility of the stocks. Default is 0.3.
+    interest_rate : float, optional
+        Annualized risk-free interest rate. Default is 0.045.
+    start_date : date, optional
+        Date of the quotes. Default is today.
+    nstrikes : int, optional
+        Number of strikes in each chain. Default is 41.
+    strike_range : float, optional
+        Strikes span the stock price times 1 -/+ 'strike_range'. Default is 0.3.
+    spread : float, optional
+        Bid-ask spread as a fraction of the option price. Default is 0.02.
+    nexpirations : int, optional
+        Number of weekly expirations. Default is 8.
+    seed : int, optional
+        Seed of the random price histories. Default is 0.
+    """
+
+    def __init__(
+        self,
+        quotes: Mapping[str, Quote | float],
+        volatility: float = 0.3,
+        interest_rate: float = 0.045,
+        start_date: dt.date | None = None,
+        nstrikes: int = 41,
+        strike_range: float = 0.3,
+        spread: float = 0.02,
+        nexpirations: int = 8,
+        seed: int = 0,
+    ):
+        self.quotes = {
+            ticker.upper(): quote if isinstance(quote, Quote) else Quote(quote)
+            for ticker, quote in quotes.items()
+        }
+        self.volatility = volatility
+        self.interest_rate = interest_rate
+        self.start_date = start_date or dt.date.today()
+        self.nstrikes = nstrikes
+        self.strike_range = strike_range
+        self.spread = spread
+        self.nexpirations = nexpirations
+        self.seed = seed
+
+    def get_options_chain(self, ticker: str, expiration_date: dt.date) -> OptionsChain:
+        quote = self.get_quote(ticker)
+        time2maturity = (expiration_date - self.start_date).days / 365
+
+        if time2maturity <= 0.0:
+            raise ValueError("Expiration date must be after the start date!")
+
+        bs = create_bs_option_chain(
+            quote.price,
+            quote.price * (1.0 - self.strike_range),
+            quote.price * (1.0 + self.strike_range),
+            self.volatility,
+            self.interest_rate,
+            time2maturity,
+            self.nstrikes,
+            quote.dividend_yield,
+        )
+        calls, puts = (
+            pd.DataFrame(
+                {
+                    "strike": bs["strikes"],
+                    "lastPrice": bs[side]["price"],
+                    "bid": np.maximum(
+                        np.round(bs[side]["price"] * (1.0 - self.spread / 2), 2), 0.0
+                    ),
+                    "ask": np.round(bs[side]["price"] * (1.0 + self.spread / 2), 2),
+                    "impliedVolatility": self.volatility,
+                    "delta": bs[side]["delta"],
+                }
+            )
+            for side in ("calls", "puts")
+        )
+
+        return OptionsChain(
+            calls=calls, puts=puts, underlying=_get_underlying(ticker, quote)
+        )
+
+    def get_expirations(self, ticker: str) -> list[dt.date]:
+        self.get_quote(ticker)
+        first_friday = self.start_date + dt.timedelta(
+            days=(4 - self.start_date.weekday()) % 7 or 7
+        )
+
+        return [
+            first_friday + dt.timedelta(weeks=week) for week in range(self.nexpirations)
+        ]
+
+    def get_stock_history(
+        self,
+        ticker: str,
+        num_of_months: int,
+        start: dt.date | None = None,
+        end: dt.date | None = None,
+    ) -> pd.DataFrame:
+        quote = self.get_quote(ticker)
+        if start is None:
+            dates = pd.bdate_range(
+                end=self.start_date, periods=21 * num_of_months, name="Date"
+            )
+        else:
+            dates = pd.bdate_range(start=start, end=self.start_date, name="Date")
+
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.upper().encode())])
+        sigma = self.volatility / np.sqrt(252)
+        # The path is drawn backwards from the quoted price on 'start_date', so
+        # that the bar of a date is the same whatever the requested window
+        returns = rng.normal(-0.5 * sigma * sigma, sigma, dates.shape[0])
+        close = quote.price * np.exp(-np.cumsum(returns) + returns)[::-1]
+        opens = quote.price * np.exp(-np.cumsum(returns))[::-1]
+        history = pd.DataFrame(
+            {
+                "Open": opens,
+                "High": np.maximum(opens, close),
+                "Low": np.minimum(opens, close),
+                "Close": close,
+            },
+            index=dates,
+        )
+
+        return history if end is None else history[history.index < pd.Timestamp(end)]
+
+    def get_quote(self, ticker: str) -> Quote:
+        if ticker.upper() not in self.quotes:
+            raise ValueError(f"No quote of {ticker}!")
+
+        return self.quotes[ticker.upper()]
+
+
+@lru_cache(maxsize=256)
+def _get_ticker(ticker: str, session: Any = None) -> Ticker:
+    return Ticker(ticker, session=session)
+
+
+def _get_underlying(ticker: str, quote: Quote) -> LazyUnderlyingAsset:
+    # Only the quote fields, which is all the engine reads
+    return LazyUnderlyingAsset(
+        {
+            "symbol": ticker.upper(),
+            "regularMarketPrice": quote.price,
+            "bid": quote.bid if quote.bid is not None else quote.price,
+            "ask": quote.ask if quote.ask is not None else quote.price,
+            "dividendYield": quote.dividend_yield,
+        }
+    )
+
+
+def _get_window(
+    history: pd.DataFrame,
+    num_of_months: int,
+    start: dt.date | None,
+    end: dt.date | None,
+) -> pd.DataFrame:
+    if start is None:
+        start = history.index[-1] - pd.DateOffset(months=num_of_months)
+        history = history[history.index > start]
+    else:
+        history = history[history.index >= pd.Timestamp(start)]
+
+    return history if end is None else history[history.index < pd.Timestamp(end)]
+
+
+def _read_table(path: Path, **kwargs) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+
+    return pd.read_csv(path, **kwargs)
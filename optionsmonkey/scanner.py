@@ -0,0 +1,442 @@
+"""
+Vectorized scanner of the candidate strategies of an options chain: all the
+combinations of strikes of some named strategies are evaluated at once and the
+best ones according to a metric are returned.
+
+All the legs of a candidate expire on the target date, so its profit/loss is
+piecewise linear in the stock price, with kinks at its strikes. The profit/loss
+at the kinks and its slope beyond the highest strike give, for all the
+candidates as arrays, the maximum profit and loss, the breakevens and the
+profit ranges, whose probability is computed in one pass with
+'get_pop_batch()'. Candidates are evaluated in chunks and only the best 'k' of
+each chunk are kept, with 'numpy.argpartition()'.
+"""
+
+import datetime as dt
+from typing import Callable, Iterable, Iterator, Literal, Mapping
+
+import numpy as np
+import pandas as pd
+
+from optionsmonkey.models import (
+    OptionsChain,
+    OptionStrategy,
+    OptionType,
+    StockStrategy,
+    Strategy,
+)
+from optionsmonkey.support import get_pop_batch
+
+ScannedStrategy = Literal[
+    "covered-call",
+    "married-put",
+    "bull-call",
+    "bear-call",
+    "bull-put",
+    "bear-put",
+    "protective-collar",
+    "strangle",
+    "short-strangle",
+    "iron-condor",
+]
+Action = Literal["buy", "sell"]
+Metric = str | Callable[[Mapping[str, np.ndarray]], np.ndarray]
+
+"""
+Option legs of each strategy, in increasing order of strike (strikes are
+strictly increasing), and whether the strategy holds the stock. The strategies
+also built by 'strategies.generate_strategies()' have the same legs.
+"""
+STRATEGY_LEGS: dict[str, tuple[tuple[tuple[OptionType, Action], ...], bool]] = {
+    "covered-call": ((("call", "sell"),), True),
+    "married-put": ((("put", "buy"),), True),
+    "bull-call": ((("call", "buy"), ("call", "sell")), False),
+    "bear-call": ((("call", "sell"), ("call", "buy")), False),
+    "bull-put": ((("put", "buy"), ("put", "sell")), False),
+    "bear-put": ((("put", "sell"), ("put", "buy")), False),
+    "protective-collar": ((("put", "buy"), ("call", "sell")), False),
+    "strangle": ((("put", "buy"), ("call", "buy")), False),
+    "short-strangle": ((("put", "sell"), ("call", "sell")), False),
+    "iron-condor": (
+        (("put", "buy"), ("put", "sell"), ("call", "sell"), ("call", "buy")),
+        False,
+    ),
+}
+STRATEGIES = tuple(STRATEGY_LEGS)
+METRICS = (
+    "cost",
+    "max_profit",
+    "max_loss",
+    "return_on_risk",
+    "probability_of_profit",
+)
+
+
+def scan_strategies(
+    chain: OptionsChain,
+    days_to_target: int,
+    volatility: float,
+    stock_price: float | None = None,
+    interest_rate: float = 0.0,
+    dividend_yield: float = 0.0,
+    strategies: Iterable[ScannedStrategy] | None = None,
+    metric: Metric = "probability_of_profit",
+    k: int = 10,
+    n: int = 100,
+    profit_target: float = 0.01,
+    days_in_year: int = 252,
+    chunk_size: int = 8192,
+) -> pd.DataFrame:
+    """
+    Evaluates all the combinations of strikes of the given strategies (all of
+    them by default) in an options chain expiring on the target date, and
+    returns the best 'k' candidates according to a metric, from best to worst.
+
+    Bought options are priced at the ask and sold options at the bid; options
+    without a positive bid and ask are skipped.
+
+    Parameters
+    ----------
+    chain : OptionsChain
+        Options chain expiring 'days_to_target' days ahead.
+    days_to_target : int
+        Days left to the target date.
+    volatility : float
+        Annualized volatility of the stock, used to compute the probability of
+        profit with the Black-Scholes model.
+    stock_price : float, optional
+        Stock price. Default is the market price of the underlying asset of
+        the chain.
+    metric : str or callable, optional
+        Either the name of one of the columns in 'METRICS' or a function of a
+        mapping of those names to arrays, one value per candidate, returning
+        the score of each candidate. Higher is better. Default is
+        'probability_of_profit'.
+    k : int, optional
+        Number of candidates returned. Default is 10.
+    n : int, optional
+        Number of shares per contract and per stock leg. Default is 100.
+    profit_target : float, optional
+        Minimum profit of a profitable outcome. Default is $0.01.
+    chunk_size : int, optional
+        Number of candidates evaluated at once. Default is 8192.
+
+    Returns
+    -------
+    candidates : pandas.DataFrame
+        One row per candidate, with the 'strategy' name, the 'strikes' and
+        'premiums' of its option legs, its 'breakevens' (tuples) and the
+        columns in 'METRICS': the 'cost' (negative if the strategy is paid
+        for), the 'max_profit' and the 'max_loss' (negative) at the target
+        date, infinite if unbounded, their ratio 'return_on_risk' and the
+        'probability_of_profit'.
+    """
+    names = STRATEGIES if strategies is None else tuple(strategies)
+
+    if any(strategy not in STRATEGY_LEGS for strategy in names):
+        raise ValueError("Strategy not defined")
+
+    if isinstance(metric, str) and metric not in METRICS:
+        raise ValueError(f"Metric must be one of {', '.join(METRICS)}!")
+
+    if k < 1:
+        raise ValueError("Number of candidates must be positive!")
+
+    if stock_price is None:
+        stock_price = chain.underlying.regular_market_price
+
+    quotes = {"call": _get_quotes(chain.calls), "put": _get_quotes(chain.puts)}
+    time2target = days_to_target / days_in_year
+    best: dict[str, np.ndarray] | None = None
+
+    for strategy in names:
+        legs = STRATEGY_LEGS[strategy][0]
+        strikes, premiums = zip(
+            *(quotes[optype][0 if action == "buy" else 1] for optype, action in legs)
+        )
+
+        for index in _combinations(strikes, chunk_size):
+            candidates = _evaluate(
+                strategy,
+                np.column_stack([strikes[i][index[:, i]] for i in range(len(legs))]),
+                np.column_stack([premiums[i][index[:, i]] for i in range(len(legs))]),
+                stock_price,
+                volatility,
+                time2target,
+                interest_rate,
+                dividend_yield,
+                n,
+                profit_target,
+            )
+            score = (
+                candidates[metric] if isinstance(metric, str) else metric(candidates)
+            )
+            candidates["score"] = np.where(np.isnan(score), -np.inf, score)
+
+            if best is not None:
+                candidates = _concatenate(best, candidates)
+
+            best = _top(candidates, k)
+
+    if best is None:
+        return pd.DataFrame(
+            columns=["strategy", "strikes", "premiums", "breakevens", *METRICS]
+        )
+
+    order = np.argsort(-best["score"], kind="stable")
+    best = {name: values[order] for name, values in best.items()}
+    breakevens = [
+        _get_crossings(
+            np.concatenate(([[0.0]], strikes[None, ~np.isnan(strikes)]), axis=1),
+            profit[None, ~np.isnan(profit)],
+            slope,
+        )[0]
+        for strikes, profit, slope in zip(
+            best["strikes"], best["profit"], best["slope"]
+        )
+    ]
+
+    return pd.DataFrame(
+        {
+            "strategy": [STRATEGIES[i] for i in best["strategy"]],
+            "strikes": _to_tuples(best["strikes"]),
+            "premiums": _to_tuples(best["premiums"]),
+            "breakevens": _to_tuples(breakevens),
+            **{name: best[name] for name in METRICS},
+        }
+    )
+
+
+def get_strategy(
+    candidate: Mapping, expiration: dt.date, n: int = 100
+) -> list[Strategy]:
+    """
+    Returns the legs of a candidate (a row of the data frame returned by
+    'scan_strategies()'), e.g. to evaluate it in detail with a
+    'StrategyEngine'.
+    """
+    legs, stock = STRATEGY_LEGS[candidate["strategy"]]
+    strategy: list[Strategy] = [StockStrategy(n=n, action="buy")] if stock else []
+
+    for (optype, action), strike, premium in zip(
+        legs, candidate["strikes"], candidate["premiums"]
+    ):
+        strategy.append(
+            OptionStrategy(
+                type=optype,
+                strike=strike,
+                premium=premium,
+                n=n,
+                action=action,
+                expiration=expiration,
+            )
+        )
+
+    return strategy
+
+
+def _get_quotes(
+    options: pd.DataFrame,
+) -> tuple[tuple[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]]:
+    """
+    Returns the strikes and prices of the options that can be bought (at the
+    ask) and sold (at the bid), in increasing order of strike.
+    """
+    options = options.sort_values("strike")
+    strikes = options["strike"].to_numpy(dtype=np.float64)
+    quotes = []
+
+    for column in ("ask", "bid"):
+        prices = options[column].to_numpy(dtype=np.float64)
+        valid = prices > 0.0
+        quotes.append((strikes[valid], prices[valid]))
+
+    return quotes[0], quotes[1]
+
+
+def _combinations(
+    strikes: tuple[np.ndarray, ...], chunk_size: int
+) -> Iterator[np.ndarray]:
+    """
+    Yields, in chunks of at most 'chunk_size' rows (unless a single partial
+    combination has more), the indices of all the combinations of one strike
+    per leg with strictly increasing strikes.
+    """
+    stack = [np.arange(strikes[0].shape[0])[:, None]]
+
+    while stack:
+        partial = stack.pop()
+        depth = partial.shape[1]
+
+        if depth == len(strikes):
+            if partial.shape[0] > 0:
+                yield partial
+
+            continue
+
+        # The strikes of the next leg above the last strike are a suffix
+        nstrikes = strikes[depth].shape[0]
+        first = np.searchsorted(
+            strikes[depth], strikes[depth - 1][partial[:, -1]], side="right"
+        )
+        counts = nstrikes - first
+        total = int(counts.sum())
+
+        if total > chunk_size and partial.shape[0] > 1:
+            half = partial.shape[0] // 2
+            stack.extend((partial[half:], partial[:half]))
+
+            continue
+
+        rows = np.repeat(np.arange(partial.shape[0]), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        stack.append(np.column_stack((partial[rows], first[rows] + offsets)))
+
+
+def _evaluate(
+    strategy: str,
+    strikes: np.ndarray,
+    premiums: np.ndarray,
+    stock_price: float,
+    volatility: float,
+    time2target: float,
+    interest_rate: float,
+    dividend_yield: float,
+    n: int,
+    profit_target: float,
+) -> dict[str, np.ndarray]:
+    legs, stock = STRATEGY_LEGS[strategy]
+    ncandidates, nlegs = strikes.shape
+    action = np.array([1.0 if action == "buy" else -1.0 for _, action in legs])
+    call = np.array([optype == "call" for optype, _ in legs])
+    cost = -n * (premiums @ action + stock * stock_price)
+
+    # Strikes are increasing, so in the segment between the strikes of legs
+    # 'i - 1' and 'i' the calls of the legs below and the puts of the legs
+    # above are in the money, for all the candidates
+    slopes = n * np.array(
+        [
+            stock + action[:i][call[:i]].sum() - action[i:][~call[i:]].sum()
+            for i in range(nlegs + 1)
+        ]
+    )
+    kinks = np.concatenate((np.zeros((ncandidates, 1)), strikes), axis=1)
+    profit = np.empty_like(kinks)
+    profit[:, 0] = n * (strikes @ (action * ~call)) + cost
+    profit[:, 1:] = np.diff(kinks, axis=1) * slopes[:-1]
+    np.cumsum(profit, axis=1, out=profit)
+    slope = slopes[-1]
+
+    max_profit = np.inf if slope > 0.0 else profit.max(axis=1)
+    max_loss = -np.inf if slope < 0.0 else profit.min(axis=1)
+    lower, upper = _get_profit_ranges(kinks, profit - profit_target, slope)
+    profitable = ~np.isnan(lower)
+    pop = get_pop_batch(
+        lower[profitable],
+        upper[profitable],
+        np.concatenate(([0], np.cumsum(profitable.sum(axis=1)))),
+        stockprice=stock_price,
+        volatility=volatility,
+        time2maturity=time2target,
+        interestrate=interest_rate,
+        dividendyield=dividend_yield,
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return_on_risk = np.where(max_loss < 0.0, max_profit / -max_loss, np.inf)
+
+    return {
+        "strategy": np.full(ncandidates, STRATEGIES.index(strategy), dtype=np.int8),
+        "strikes": strikes,
+        "premiums": premiums,
+        # Breakevens are only found for the best candidates
+        "profit": profit,
+        "slope": np.full(ncandidates, slope),
+        "cost": cost,
+        "max_profit": np.broadcast_to(max_profit, (ncandidates,)),
+        "max_loss": np.broadcast_to(max_loss, (ncandidates,)),
+        "return_on_risk": return_on_risk,
+        "probability_of_profit": pop,
+    }
+
+
+def _get_crossings(kinks: np.ndarray, profit: np.ndarray, slope: float) -> np.ndarray:
+    """
+    Returns the stock price at which the profit/loss changes sign in each
+    segment between kinks and above the last one, or NaN if it does not.
+    """
+    crossings = np.full(kinks.shape, np.nan)
+    start, stop = profit[:, :-1], profit[:, 1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossings[:, :-1] = np.where(
+            (start > 0.0) != (stop > 0.0),
+            kinks[:, :-1] + (kinks[:, 1:] - kinks[:, :-1]) * start / (start - stop),
+            np.nan,
+        )
+
+    if slope != 0.0:
+        last = profit[:, -1]
+        crossings[:, -1] = np.where(
+            (last > 0.0) != (slope > 0.0), kinks[:, -1] - last / slope, np.nan
+        )
+
+    return crossings
+
+
+def _get_profit_ranges(
+    kinks: np.ndarray, profit: np.ndarray, slope: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the bounds of the range of stock prices with a positive
+    profit/loss in each segment between kinks and above the last one, or NaN
+    if there is none.
+    """
+    crossings = _get_crossings(kinks, profit, slope)
+    start = profit > 0.0
+    stop = np.empty_like(start)
+    stop[:, :-1] = start[:, 1:]
+    stop[:, -1] = start[:, -1] if slope == 0.0 else slope > 0.0
+    end = np.empty_like(kinks)
+    end[:, :-1] = kinks[:, 1:]
+    end[:, -1] = np.inf
+    lower = np.where(start, kinks, np.where(stop, crossings, np.nan))
+    upper = np.where(stop, end, np.where(start, crossings, np.nan))
+
+    return lower, upper
+
+
+def _concatenate(
+    first: dict[str, np.ndarray], second: dict[str, np.ndarray]
+) -> dict[str, np.ndarray]:
+    # Candidates of different strategies have different numbers of legs
+    joined = {}
+
+    for name, values in first.items():
+        other = second[name]
+
+        if values.ndim == 2:
+            columns = max(values.shape[1], other.shape[1])
+            values, other = (
+                np.pad(v, ((0, 0), (0, columns - v.shape[1])), constant_values=np.nan)
+                for v in (values, other)
+            )
+
+        joined[name] = np.concatenate((values, other))
+
+    return joined
+
+
+def _top(candidates: dict[str, np.ndarray], k: int) -> dict[str, np.ndarray]:
+    score = candidates["score"]
+
+    if score.shape[0] <= k:
+        return candidates
+
+    index = np.argpartition(-score, k - 1)[:k]
+
+    return {name: values[index] for name, values in candidates.items()}
+
+
+def _to_tuples(values: Iterable[np.ndarray]) -> list[tuple[float, ...]]:
+    return [tuple(row[~np.isnan(row)].tolist()) for row in values]
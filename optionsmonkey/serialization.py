@@ -0,0 +1,199 @@
+"""
+Compact binary serialization of strategy results, for shipping them between
+processes (e.g., from pool workers to an aggregator).
+
+A batch of results is stored column by column: one float64 column per scalar
+field, and a flat float64 column plus an int64 offsets column per array field
+(per-leg values, ranges, VaR...), in the same CSR-like layout used by
+'support.get_pop_batch()'. Optional fields also carry a uint8 presence mask.
+Decoding maps every column onto the input buffer with 'numpy.frombuffer', so
+no data is copied.
+
+Buffer layout:
+    MAGIC (4 bytes) | header size (uint32) | JSON header | padding | columns
+"""
+
+import json
+import struct
+from dataclasses import fields
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from optionsmonkey.models import Outputs, RawOutputs
+
+MAGIC = b"OMR1"
+ALIGNMENT = 8
+EMPTY = np.zeros(0)
+
+SCALAR_FIELDS = (
+    "probability_of_profit",
+    "strategy_cost",
+    "minimum_return_in_the_domain",
+    "maximum_return_in_the_domain",
+    "probability_of_profit_target",
+    "probability_of_loss_limit",
+    "average_profit_from_mc",
+    "average_loss_from_mc",
+    "probability_of_profit_from_mc",
+)
+RANGE_FIELDS = ("profit_ranges", "project_target_ranges")
+OPTIONAL_FIELDS = frozenset(
+    field.name for field in fields(RawOutputs) if field.default is None
+)
+
+
+class OutputsBatch:
+    """
+    Columnar batch of strategy results that can be converted to and from a
+    compact binary buffer.
+
+    Individual results are obtained as `RawOutputs` by indexing the batch; their
+    arrays are views of the batch columns. Pickling a batch (e.g., when it is
+    returned from a process pool worker) uses the binary buffer.
+    """
+
+    def __init__(self, size: int, columns: dict[str, np.ndarray]):
+        self.size = size
+        self.columns = columns
+
+    @classmethod
+    def from_outputs(cls, outputs: Iterable[RawOutputs | Outputs]) -> "OutputsBatch":
+        """
+        Builds a batch from `RawOutputs` or `Outputs` objects.
+        """
+        outputs = list(outputs)
+        columns: dict[str, np.ndarray] = {}
+
+        for field in fields(RawOutputs):
+            name = field.name
+            values = [getattr(output, name) for output in outputs]
+            optional = name in OPTIONAL_FIELDS
+
+            if optional:
+                columns[f"{name}.mask"] = np.fromiter(
+                    (value is not None for value in values),
+                    dtype=np.uint8,
+                    count=len(values),
+                )
+
+            if name in SCALAR_FIELDS:
+                columns[name] = np.fromiter(
+                    (np.nan if value is None else value for value in values),
+                    dtype=np.float64,
+                    count=len(values),
+                )
+            else:
+                width = 2 if name in RANGE_FIELDS else 1
+                counts = [0 if value is None else len(value) for value in values]
+                nonempty = [value for value, count in zip(values, counts) if count]
+                offsets = np.zeros(len(values) + 1, dtype=np.int64)
+                np.cumsum(counts, out=offsets[1:])
+                offsets *= width
+                columns[name] = (
+                    np.concatenate(nonempty, dtype=np.float64).reshape(-1)
+                    if nonempty
+                    else EMPTY
+                )
+                columns[f"{name}.offsets"] = offsets
+
+        return cls(len(outputs), columns)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the batch into a binary buffer.
+        """
+        layout = []
+        position = 0
+
+        for name, column in self.columns.items():
+            layout.append([name, column.dtype.str, position, column.shape[0]])
+            position += _aligned(column.nbytes)
+
+        header = json.dumps({"size": self.size, "columns": layout}).encode()
+        start = _aligned(len(MAGIC) + 4 + len(header))
+        buffer = bytearray(start + position)
+        buffer[: len(MAGIC)] = MAGIC
+        struct.pack_into("<I", buffer, len(MAGIC), len(header))
+        buffer[len(MAGIC) + 4 : len(MAGIC) + 4 + len(header)] = header
+        data = np.frombuffer(buffer, dtype=np.uint8)
+
+        for (_, _, offset, _), column in zip(layout, self.columns.values()):
+            column = np.ascontiguousarray(column).view(np.uint8)
+            data[start + offset : start + offset + column.shape[0]] = column
+
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes | bytearray | memoryview) -> "OutputsBatch":
+        """
+        Deserializes a batch from a binary buffer. The columns of the batch are
+        read-only views of the buffer.
+        """
+        if bytes(buffer[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a serialized batch of outputs!")
+
+        (header_size,) = struct.unpack_from("<I", buffer, len(MAGIC))
+        header_end = len(MAGIC) + 4 + header_size
+        header = json.loads(bytes(buffer[len(MAGIC) + 4 : header_end]))
+        start = _aligned(header_end)
+        columns = {
+            name: np.frombuffer(
+                buffer, dtype=np.dtype(dtype), count=count, offset=start + offset
+            )
+            for name, dtype, offset, count in header["columns"]
+        }
+
+        return cls(header["size"], columns)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> RawOutputs:
+        if index < 0:
+            index += self.size
+
+        if not 0 <= index < self.size:
+            raise IndexError("Batch index out of range!")
+
+        values: dict[str, Any] = {}
+
+        for field in fields(RawOutputs):
+            name = field.name
+
+            if name in OPTIONAL_FIELDS and not self.columns[f"{name}.mask"][index]:
+                values[name] = None
+            elif name in SCALAR_FIELDS:
+                values[name] = float(self.columns[name][index])
+            else:
+                offsets = self.columns[f"{name}.offsets"]
+                value = self.columns[name][offsets[index] : offsets[index + 1]]
+                values[name] = value.reshape(-1, 2) if name in RANGE_FIELDS else value
+
+        return RawOutputs(**values)
+
+    def __iter__(self) -> Iterator[RawOutputs]:
+        for index in range(self.size):
+            yield self[index]
+
+    def __reduce__(self):
+        return OutputsBatch.from_bytes, (self.to_bytes(),)
+
+
+def dumps_outputs(outputs: Iterable[RawOutputs | Outputs]) -> bytes:
+    """
+    Serializes `RawOutputs` or `Outputs` objects into a binary buffer.
+    """
+    return OutputsBatch.from_outputs(outputs).to_bytes()
+
+
+def loads_outputs(buffer: bytes | bytearray | memoryview) -> OutputsBatch:
+    """
+    Deserializes a binary buffer created by 'dumps_outputs()' into a batch
+    of outputs, without copying the data.
+    """
+    return OutputsBatch.from_bytes(buffer)
+
+
+def _aligned(nbytes: int) -> int:
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
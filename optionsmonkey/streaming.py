@@ -0,0 +1,405 @@
+"""
+Streaming quote ingestion: strategies subscribe with their legs, and a stream
+of quote updates re-evaluates only the strategies they affect.
+
+An option quote update marks the strategies holding that contract as dirty; a
+stock price update marks all the strategies on the underlying asset. Pending
+updates are applied in micro-batches, so a strategy hit by many updates in a
+batch is evaluated once, with the latest quotes.
+
+Quote updates can be replayed from a `ChainArchive` with 'replay_updates()' or
+polled from a `MarketDataProvider` with 'poll_updates()'.
+"""
+
+import datetime as dt
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from queue import Empty, Queue
+from threading import Event, Lock
+from typing import Any, Callable, Hashable, Iterable, Iterator, NamedTuple, cast
+
+import numpy as np
+
+from optionsmonkey.chain_archive import ChainSnapshot
+from optionsmonkey.engine import LEG_TYPES, StrategyEngine
+from optionsmonkey.models import Inputs, OptionStrategy, OptionType, Outputs
+from optionsmonkey.providers import MarketDataProvider
+
+Contract = tuple[str, OptionType, float, dt.date]
+
+
+class QuoteUpdate(NamedTuple):
+    """
+    New quote of a stock or, if 'option_type' is given, of an option.
+    """
+
+    underlying: str
+    price: float
+    bid: float | None = None
+    ask: float | None = None
+    option_type: OptionType | None = None
+    strike: float | None = None
+    expiration: dt.date | None = None
+
+
+@dataclass
+class StreamStats:
+    updates: int = 0
+    batches: int = 0
+    evaluations: int = 0
+    max_queue_depth: int = 0
+    errors: int = 0
+    # Seconds from publication to the end of the batch, of the latest updates
+    latencies: deque = field(default_factory=lambda: deque(maxlen=10000))
+
+    @property
+    def evaluations_per_batch(self) -> float:
+        return self.evaluations / self.batches if self.batches > 0 else 0.0
+
+    def latency(self, percentile: float = 50.0) -> float:
+        return (
+            float(np.percentile(self.latencies, percentile)) if self.latencies else 0.0
+        )
+
+
+class SubscriptionEngine:
+    """
+    Keeps the outputs of the subscribed strategies up to date with a stream of
+    quote updates, applied in micro-batches of up to 'batch_size' updates.
+    Strategies are evaluated with 'evaluate', which defaults to running a
+    `StrategyEngine` and can be, e.g., 'ResultCache.run'. If given, 'on_result'
+    is called with the key and the outputs of each evaluated strategy that is
+    still subscribed.
+
+    A strategy whose evaluation (or 'on_result' call) fails does not affect
+    the others: its error is kept in 'errors' until it is evaluated again, on
+    the next update that affects it, and reported to 'on_error' if given.
+
+    The premiums of the option legs follow the quotes: buy legs at the ask and
+    sell legs at the bid, or at the quote price if that side is missing.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 256,
+        evaluate: Callable[[Inputs], Outputs] | None = None,
+        on_result: Callable[[Hashable, Outputs], Any] | None = None,
+        on_error: Callable[[Hashable, Exception], Any] | None = None,
+    ):
+        self.batch_size = batch_size
+        self.evaluate = evaluate or (lambda inputs: StrategyEngine(inputs).run())
+        self.on_result = on_result
+        self.on_error = on_error
+        self.results: dict[Hashable, Outputs] = {}
+        self.errors: dict[Hashable, Exception] = {}
+        self.stats = StreamStats()
+        self._queue: Queue[tuple[QuoteUpdate, float]] = Queue()
+        self._lock = Lock()
+        self._inputs: dict[Hashable, Inputs] = {}
+        self._underlyings: dict[Hashable, str] = {}
+        self._strategies: dict[str, set[Hashable]] = {}
+        self._contracts: dict[Contract, set[Hashable]] = {}
+        self._dirty: set[Hashable] = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def subscribe(self, key: Hashable, underlying: str, inputs: Inputs) -> None:
+        """
+        Subscribes a strategy on an underlying asset under 'key', replacing the
+        strategy subscribed under the same key. It is evaluated with the next
+        batch.
+        """
+        with self._lock:
+            self._remove(key)
+            underlying = underlying.upper()
+            self._inputs[key] = inputs
+            self._underlyings[key] = underlying
+            self._strategies.setdefault(underlying, set()).add(key)
+
+            for leg in inputs.strategy:
+                if isinstance(leg, OptionStrategy):
+                    self._contracts.setdefault(_contract(underlying, leg), set()).add(
+                        key
+                    )
+
+            self._dirty.add(key)
+
+    def unsubscribe(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+            self.results.pop(key, None)
+
+    def publish(self, update: QuoteUpdate) -> None:
+        """
+        Queues a quote update. Thread-safe.
+        """
+        self._queue.put((update, time.perf_counter()))
+
+    def process(self, block: bool = False, timeout: float | None = None) -> dict:
+        """
+        Applies up to 'batch_size' queued updates and evaluates the dirty
+        strategies, returning their outputs by key. If 'block' is True, waits up
+        to 'timeout' seconds for a first update.
+        """
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue_depth)
+        batch: list[tuple[QuoteUpdate, float]] = []
+
+        try:
+            batch.append(self._queue.get(block, timeout))
+
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except Empty:
+            pass
+
+        if not batch and not self._dirty:
+            return {}
+
+        with self._lock:
+            spots: dict[str, float] = {}
+            quotes: dict[Contract, QuoteUpdate] = {}
+
+            for update, _ in batch:
+                underlying = update.underlying.upper()
+
+                if update.option_type is None:
+                    spots[underlying] = update.price
+                    self._dirty |= self._strategies.get(underlying, set())
+                else:
+                    contract = (
+                        underlying,
+                        update.option_type,
+                        float(cast(float, update.strike)),
+                        cast(dt.date, update.expiration),
+                    )
+                    quotes[contract] = update
+                    self._dirty |= self._contracts.get(contract, set())
+
+            dirty, self._dirty = self._dirty, set()
+
+            for key in dirty:
+                self._inputs[key] = _apply(
+                    self._inputs[key], self._underlyings[key], spots, quotes
+                )
+
+            inputs = {key: self._inputs[key] for key in dirty}
+
+        results = {}
+        errors = {}
+
+        for key, value in inputs.items():
+            try:
+                results[key] = self.evaluate(value)
+            except Exception as error:
+                errors[key] = error
+
+        end = time.perf_counter()
+
+        with self._lock:
+            # Strategies unsubscribed during the evaluation are left out
+            results = {key: results[key] for key in results if key in self._inputs}
+            errors = {key: errors[key] for key in errors if key in self._inputs}
+            self.results.update(results)
+
+            for key in results:
+                self.errors.pop(key, None)
+
+        if self.on_result is not None:
+            for key, outputs in results.items():
+                try:
+                    self.on_result(key, outputs)
+                except Exception as error:
+                    errors[key] = error
+
+        if errors:
+            with self._lock:
+                self.errors.update(
+                    {key: errors[key] for key in errors if key in self._inputs}
+                )
+
+            for key in errors:
+                self._report(key, errors[key])
+
+        self.stats.updates += len(batch)
+        self.stats.batches += 1
+        self.stats.evaluations += len(inputs)
+        self.stats.errors += len(errors)
+        self.stats.latencies.extend(end - published for _, published in batch)
+
+        return results
+
+    def run(self, updates: Iterable[QuoteUpdate]) -> None:
+        """
+        Feeds a stream of updates, e.g., a replay, processing a micro-batch
+        whenever 'batch_size' updates are queued and the remaining ones at the
+        end.
+        """
+        for update in updates:
+            self.publish(update)
+
+            if self.queue_depth >= self.batch_size:
+                self.process()
+
+        while self.queue_depth > 0 or self._dirty:
+            self.process()
+
+    def serve(self, stop: Event, timeout: float = 0.1) -> None:
+        """
+        Processes updates published from other threads as they arrive until
+        'stop' is set. Errors are reported to 'on_error' (with a None key if not
+        raised by a strategy), and processing goes on.
+        """
+        while not stop.is_set():
+            try:
+                self.process(block=True, timeout=timeout)
+            except Exception as error:
+                self.stats.errors += 1
+                self._report(None, error)
+
+    def _report(self, key: Hashable, error: Exception) -> None:
+        if self.on_error is not None:
+            try:
+                self.on_error(key, error)
+            except Exception:
+                pass
+
+    def _remove(self, key: Hashable) -> None:
+        if key not in self._inputs:
+            return
+
+        underlying = self._underlyings.pop(key)
+        self._strategies[underlying].discard(key)
+
+        for leg in self._inputs.pop(key).strategy:
+            if isinstance(leg, OptionStrategy):
+                self._contracts[_contract(underlying, leg)].discard(key)
+
+        self._dirty.discard(key)
+        self.errors.pop(key, None)
+
+
+def replay_updates(snapshots: Iterable[ChainSnapshot]) -> Iterator[QuoteUpdate]:
+    """
+    Yields the quote updates between consecutive snapshots of an archive:
+    the stock price if it changed, then the options whose bid or ask changed.
+    All the quotes of the first snapshot are yielded.
+    """
+    book: dict[Any, tuple] = {}
+
+    for snapshot in snapshots:
+        rows = zip(
+            snapshot.type.tolist(),
+            snapshot.strike.tolist(),
+            snapshot.expiration.astype(object),
+            snapshot.bid.tolist(),
+            snapshot.ask.tolist(),
+        )
+
+        yield from _diff(
+            book,
+            snapshot.underlying,
+            snapshot.stock_price,
+            ((LEG_TYPES[type], *row) for type, *row in rows),
+        )
+
+
+def poll_updates(
+    provider: MarketDataProvider,
+    underlying: str,
+    expirations: list[dt.date],
+    interval: float = 1.0,
+    stop: Event | None = None,
+) -> Iterator[QuoteUpdate]:
+    """
+    Polls the quote and the options chains of an underlying asset from a
+    provider every 'interval' seconds until 'stop' is set, yielding the quotes
+    that changed since the previous poll.
+    """
+    book: dict[Any, tuple] = {}
+
+    while stop is None or not stop.is_set():
+        rows: list[tuple] = []
+
+        for expiration in expirations:
+            chain = provider.get_options_chain(underlying, expiration)
+
+            for optype, options in (("call", chain.calls), ("put", chain.puts)):
+                rows.extend(
+                    zip(
+                        [optype] * options.shape[0],
+                        options["strike"].tolist(),
+                        [expiration] * options.shape[0],
+                        options["bid"].tolist(),
+                        options["ask"].tolist(),
+                    )
+                )
+
+        yield from _diff(book, underlying, provider.get_quote(underlying).price, rows)
+
+        if stop is None:
+            time.sleep(interval)
+        else:
+            stop.wait(interval)
+
+
+def _diff(
+    book: dict[Any, tuple], underlying: str, price: float, rows: Iterable[tuple]
+) -> Iterator[QuoteUpdate]:
+    # Yields the quotes differing from the ones in 'book', which is updated
+    if book.get("spot") != (price,):
+        book["spot"] = (price,)
+
+        yield QuoteUpdate(underlying, price)
+
+    for optype, strike, expiration, bid, ask in rows:
+        contract = (optype, strike, expiration)
+
+        if book.get(contract) != (bid, ask):
+            book[contract] = (bid, ask)
+
+            yield QuoteUpdate(
+                underlying,
+                (bid + ask) / 2.0,
+                bid,
+                ask,
+                optype,
+                strike,
+                expiration,
+            )
+
+
+def _contract(underlying: str, leg: OptionStrategy) -> Contract:
+    return (underlying, leg.type, float(leg.strike), leg.expiration)
+
+
+def _apply(
+    inputs: Inputs,
+    underlying: str,
+    spots: dict[str, float],
+    quotes: dict[Contract, QuoteUpdate],
+) -> Inputs:
+    # Returns a copy of the inputs with the new stock price and premiums
+    legs = list(inputs.strategy)
+
+    for i, leg in enumerate(legs):
+        if isinstance(leg, OptionStrategy):
+            quote = quotes.get(_contract(underlying, leg))
+
+            if quote is not None:
+                premium = quote.ask if leg.action == "buy" else quote.bid
+
+                if premium is None or not premium > 0.0:
+                    premium = quote.price
+
+                if premium > 0.0:
+                    legs[i] = leg.model_copy(update={"premium": premium})
+
+    return inputs.model_copy(
+        update={
+            "stock_price": spots.get(underlying, inputs.stock_price),
+            "strategy": legs,
+        }
+    )
@@ -1,9 +1,40 @@
 from __future__ import division
 from scipy import stats
-from numpy import asarray, ndarray, exp, abs, round, diff, flatnonzero, arange, inf
-from numpy.random import normal, laplace
+from scipy.special import ndtr
+from numpy import (
+    add,
+    asarray,
+    broadcast_to,
+    diff,
+    where,
+    ndarray,
+    exp,
+    abs,
+    round,
+    arange,
+    column_stack,
+    concatenate,
+    cumsum,
+    floor,
+    minimum,
+    partition,
+    unique,
+    int8,
+    nonzero,
+    searchsorted,
+    split,
+    inf,
+    maximum,
+    repeat,
+    zeros,
+)
+from numpy import random
+from numpy.random import default_rng
 from numpy.lib.scimath import log, sqrt
+from collections import OrderedDict
 from datetime import date, timedelta
+from decimal import Decimal
+from threading import Lock
 from optionsmonkey.black_scholes import get_d1_d2, get_option_price
 from optionsmonkey.holidays import getholidays
 
@@ -208,28 +239,118 @@ def getnonbusinessdays(startdate, enddate, country="US"):
     return nonbusinessdays
 
 
-def createpriceseq(minprice, maxprice):
+def createpriceseq(minprice, maxprice, step=0.01):
     """
-    createpriceseq(minprice,maxprice) -> generates a sequence of stock prices
-    from 'minprice' to 'maxprice' with increment $0.01.
+    createpriceseq(minprice,maxprice,step) -> generates a sequence of stock
+    prices from 'minprice' to 'maxprice' with increment 'step'.
 
     Arguments:
     ----------
     minprice: minimum stock price in the range.
     maxprice: maximum stock price in the range.
+    step: price increment (default is $0.01).
     """
+    if step <= 0.0:
+        raise ValueError("Price increment must be greater than zero!")
+
     if maxprice > minprice:
-        return round((arange(int(maxprice - minprice) * 100 + 1) * 0.01 + minprice), 2)
+        # Enough decimals for the step as written, e.g., 3 for 0.015
+        decimals = max(2, _get_decimals(step))
+
+        return round(
+            arange(int((maxprice - minprice) / step + 0.5) + 1) * step + minprice,
+            decimals,
+        )
     else:
         raise ValueError("Maximum price cannot be less than minimum price!")
 
 
+def _get_decimals(value):
+    # Number of decimals of the shortest decimal representation of a float
+    return max(0, -Decimal(repr(float(value))).normalize().as_tuple().exponent)
+
+
+class PriceGridRegistry:
+    """
+    PriceGridRegistry -> interns the stock price sequences generated by
+    'createpriceseq()', so that strategies sharing the same stock price domain
+    also share the same read-only array in memory.
+
+    Grids are keyed by (minprice, maxprice, step). When the total size of the
+    cached grids exceeds 'max_bytes', the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._grids = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    def get(self, minprice, maxprice, step=0.01):
+        """
+        get(minprice,maxprice,step) -> returns a read-only view of the sequence
+        of stock prices from 'minprice' to 'maxprice' with increment 'step',
+        creating and caching it if necessary.
+        """
+        key = (float(minprice), float(maxprice), float(step))
+
+        with self._lock:
+            grid = self._grids.get(key)
+
+            if grid is not None:
+                self._grids.move_to_end(key)
+
+                return grid.view()
+
+        grid = createpriceseq(*key)
+        grid.flags.writeable = False
+
+        with self._lock:
+            if key not in self._grids and grid.nbytes <= self.max_bytes:
+                self._grids[key] = grid
+                self._nbytes += grid.nbytes
+
+                while self._nbytes > self.max_bytes:
+                    _, evicted = self._grids.popitem(last=False)
+                    self._nbytes -= evicted.nbytes
+
+            grid = self._grids.get(key, grid)
+
+        return grid.view()
+
+    def clear(self):
+        """
+        clear() -> removes all cached grids.
+        """
+        with self._lock:
+            self._grids.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._grids)
+
+
+price_grids = PriceGridRegistry()
+
+
 def createpricesamples(
-    s0, volatility, time2maturity, r=0.01, distribution="black-scholes", y=0.0, n=100000
+    s0,
+    volatility,
+    time2maturity,
+    r=0.01,
+    distribution="black-scholes",
+    y=0.0,
+    n=100000,
+    seed=None,
 ):
     """
-    createpricesamples(s0,volatility,time2maturity,r,distribution,y,n) -> generates
-    random stock prices at maturity according to a statistical distribution.
+    createpricesamples(s0,volatility,time2maturity,r,distribution,y,n,seed) ->
+    generates random stock prices at maturity according to a statistical
+    distribution.
 
     Arguments:
     ----------
@@ -243,7 +364,18 @@ def createpricesamples(
                   'laplace'.
     y: annualized dividend yield (default is zero).
     n: number of randomly generated terminal prices.
+    seed: seed of the random number generator, for reproducible prices, or a
+          NumPy random Generator (default is None, which uses NumPy's global
+          random state).
     """
+    if seed is not None:
+        rng = default_rng(seed)
+        normal, laplace = rng.normal, rng.laplace
+    else:
+        normal, laplace = random.normal, random.laplace
+
+    n = int(n)
+
     if distribution == "normal":
         return exp(normal(log(s0), volatility * sqrt(time2maturity), n))
     elif distribution == "black-scholes":
@@ -268,40 +400,106 @@ def getprofitrange(s, profit, target=0.01):
             stock price in the stock price array.
     target: profit target (0.01 is the default).
     """
+    return get_profit_ranges(s, profit, [target])[0].tolist()
+
+
+def get_profit_ranges(s, profit, targets):
+    """
+    get_profit_ranges(s,profit,targets) -> returns, for each profit target, the
+    pairs of stock prices for which an option trade is expected to get at least
+    that profit in between.
+
+    The ranges of all targets are found in a single pass, by detecting where the
+    profit crosses each target along the stock price array. As in
+    'getprofitrange()', a range starting at the first stock price has its lower
+    bound set to zero and a range ending at the last stock price has its upper
+    bound set to infinity.
+
+    Arguments:
+    ----------
+    s: a numpy array of stock prices.
+    profit: a numpy array containing the profit (or loss) of the trade for each
+            stock price in the stock price array.
+    targets: a sequence of profit targets.
+
+    Returns:
+    --------
+    A list with one numpy array of shape (number of ranges, 2) per target.
+    """
     if not (isinstance(s, ndarray) and isinstance(profit, ndarray)):
         raise TypeError("'s' and 'profit' must be numpy arrays!")
 
-    profitrange = []
+    if s.shape != profit.shape or s.ndim != 1:
+        raise ValueError("'s' and 'profit' must be 1D arrays of the same length!")
 
-    t = s[profit >= target]
+    targets = asarray(targets, dtype=float).reshape(-1)
+    above = zeros((targets.shape[0], s.shape[0] + 2), dtype=int8)
+    above[:, 1:-1] = profit >= targets[:, None]
+    crossings = diff(above, axis=1)
+    rows, starts = nonzero(crossings == 1)
+    ends = nonzero(crossings == -1)[1] - 1
 
-    if t.shape[0] == 0:
-        return profitrange
+    lower = s[starts]
+    lower[starts == 0] = 0.0
+    upper = s[ends]
+    upper[ends == s.shape[0] - 1] = inf
+    bounds = column_stack((lower, upper))
 
-    mask1 = diff(t) <= target + 0.001
-    mask2 = diff(t) > target + 0.001
-    maxi = flatnonzero(mask1[:-1] & mask2[1:]) + 1
+    return split(bounds, searchsorted(rows, arange(1, targets.shape[0])))
 
-    for i in range(maxi.shape[0] + 1):
-        profitrange.append([])
 
-        if i == 0:
-            if t[0] == s[0]:
-                profitrange[0].append(0.0)
-            else:
-                profitrange[0].append(t[0])
-        else:
-            profitrange[i].append(t[maxi[i - 1] + 1])
+def get_tail_risk(profit, confidence_levels=(), quantiles=()):
+    """
+    get_tail_risk(profit,confidence_levels,quantiles) -> returns the value at
+    risk (VaR), the conditional value at risk (CVaR) and quantiles of the
+    profit/loss of a trade, as numpy arrays.
 
-        if i == maxi.shape[0]:
-            if t[t.shape[0] - 1] == s[s.shape[0] - 1]:
-                profitrange[maxi.shape[0]].append(inf)
-            else:
-                profitrange[maxi.shape[0]].append(t[t.shape[0] - 1])
-        else:
-            profitrange[i].append(t[maxi[i]])
+    All order statistics are obtained from a single partial sort of the
+    profit/loss samples, which takes linear time instead of the O(n log n) of
+    a full sort. VaR and CVaR are reported as positive numbers when they
+    represent losses, and quantiles are taken without interpolation (lower
+    order statistic).
+
+    Arguments:
+    ----------
+    profit: a 1D numpy array with the profit (or loss) of the trade for each
+            terminal stock price, typically from Monte Carlo simulations.
+    confidence_levels: a sequence of confidence levels (e.g., 0.95 or 0.99) at
+                       which VaR and CVaR are computed.
+    quantiles: a sequence of quantiles of the profit/loss to be computed.
+    """
+    if not isinstance(profit, ndarray):
+        raise TypeError("'profit' must be a numpy array!")
 
-    return profitrange
+    nprofit = profit.shape[0]
+
+    if nprofit == 0:
+        raise ValueError("The array of profits is empty!")
+
+    confidence_levels = asarray(confidence_levels, dtype=float).reshape(-1)
+    quantiles = asarray(quantiles, dtype=float).reshape(-1)
+
+    if ((confidence_levels <= 0.0) | (confidence_levels >= 1.0)).any():
+        raise ValueError("Confidence levels must be between 0 and 1!")
+
+    if ((quantiles < 0.0) | (quantiles > 1.0)).any():
+        raise ValueError("Quantiles must be between 0 and 1!")
+
+    kvar = floor((1.0 - confidence_levels) * nprofit).astype(int)
+    kvar = minimum(kvar, nprofit - 1)
+    kquant = floor(quantiles * (nprofit - 1)).astype(int)
+    kth = unique(concatenate((kvar, kquant)))
+
+    if kth.shape[0] == 0:
+        return zeros(0), zeros(0), zeros(0)
+
+    sortedprofit = partition(profit, kth)
+    tailsum = cumsum(sortedprofit[: kvar.max() + 1]) if kvar.shape[0] > 0 else None
+
+    var = -sortedprofit[kvar]
+    cvar = -tailsum[kvar] / (kvar + 1) if tailsum is not None else zeros(0)
+
+    return var, cvar, sortedprofit[kquant]
 
 
 def getPoP(profitranges, source="black-scholes", **kwargs):
@@ -434,3 +632,128 @@ def getPoP(profitranges, source="black-scholes", **kwargs):
         raise ValueError("Source not supported yet!")
 
     return pop
+
+
+def get_pop_batch(
+    lower,
+    upper,
+    offsets,
+    source="black-scholes",
+    stockprice=None,
+    volatility=None,
+    time2maturity=None,
+    interestrate=0.0,
+    dividendyield=0.0,
+):
+    """
+    get_pop_batch(lower,upper,offsets,source,stockprice,volatility,time2maturity,
+    interestrate,dividendyield) -> estimates, in a single vectorized pass, the
+    probability of profit (PoP) of many option trades at once.
+
+    The profit ranges of all trades are flattened into 'lower' and 'upper', and
+    'offsets' delimits the ranges belonging to each trade, in the same way as
+    the index pointer of a CSR matrix: the ranges of trade 'i' are
+    'lower[offsets[i]:offsets[i+1]]' and 'upper[offsets[i]:offsets[i+1]]'.
+    A trade without profit ranges has a PoP of zero.
+
+    Arguments:
+    ----------
+    lower: a numpy array with the lower bounds of the profit ranges.
+    upper: a numpy array with the upper bounds of the profit ranges.
+    offsets: a numpy array of integers with length equal to the number of trades
+             plus one, starting at zero and ending at the number of ranges.
+    source: either 'black-scholes' (default), 'normal' or 'laplace'. See
+            'getPoP()'.
+    stockprice: spot price of the stock, either a scalar or one per trade.
+    volatility: annualized volatility, either a scalar or one per trade.
+    time2maturity: time left to the target date in units of year, either a
+                   scalar or one per trade.
+    interestrate: annualized risk-free interest rate, either a scalar or one per
+                  trade (default is zero). Used only if source is
+                  'black-scholes'.
+    dividendyield: annualized dividend yield, either a scalar or one per trade
+                   (default is zero). Used only if source is 'black-scholes'.
+    """
+    if source not in ("normal", "laplace", "black-scholes"):
+        raise ValueError("Source not supported yet!")
+
+    if stockprice is None or volatility is None or time2maturity is None:
+        raise ValueError(
+            "Stock price, volatility and time left to expiration must be provided!"
+        )
+
+    lower = asarray(lower, dtype=float)
+    upper = asarray(upper, dtype=float)
+    offsets = asarray(offsets, dtype=int)
+
+    if lower.shape != upper.shape or lower.ndim != 1:
+        raise ValueError("'lower' and 'upper' must be 1D arrays of the same length!")
+
+    if offsets.ndim != 1 or offsets.shape[0] == 0:
+        raise ValueError("'offsets' must be a non-empty 1D array!")
+
+    if offsets[0] != 0 or offsets[-1] != lower.shape[0] or (diff(offsets) < 0).any():
+        raise ValueError(
+            "'offsets' must be non-decreasing, start at zero and end at the number "
+            "of ranges!"
+        )
+
+    ntrades = offsets.shape[0] - 1
+    counts = diff(offsets)
+    pop = zeros(ntrades)
+
+    if lower.shape[0] == 0:
+        return pop
+
+    def per_range(v):
+        return repeat(broadcast_to(asarray(v, dtype=float), (ntrades,)), counts)
+
+    stockprice = per_range(stockprice)
+    volatility = per_range(volatility)
+    time2maturity = per_range(time2maturity)
+
+    if (stockprice <= 0.0).any():
+        raise ValueError("Stock price must be greater than zero!")
+
+    if (volatility <= 0.0).any():
+        raise ValueError("Volatility must be greater than zero!")
+
+    if (time2maturity < 0.0).any():
+        raise ValueError("Time left to expiration must be a positive number!")
+
+    sigma = volatility * sqrt(time2maturity)
+    sigma = where(sigma == 0.0, 1e-10, sigma)
+    loglow = log(maximum(lower, 1e-10) / stockprice)
+    loghigh = log(upper / stockprice)
+
+    if source == "laplace":
+        beta = sigma / sqrt(2.0)
+        zlow = loglow / beta
+        zhigh = loghigh / beta
+        # Laplace CDF from the tail probability, which cannot overflow
+        tailhigh = 0.5 * exp(-abs(zhigh))
+        taillow = 0.5 * exp(-abs(zlow))
+        prob = where(zhigh < 0.0, tailhigh, 1.0 - tailhigh) - where(
+            zlow < 0.0, taillow, 1.0 - taillow
+        )
+    else:
+        if source == "black-scholes":
+            r = per_range(interestrate)
+            y = per_range(dividendyield)
+
+            if (r < 0.0).any():
+                raise ValueError("Risk-free interest rate must be a positive number!")
+
+            if (y < 0.0).any():
+                raise ValueError("Dividend yield must be a positive number!")
+
+            drift = (r - y - 0.5 * volatility * volatility) * time2maturity
+        else:
+            drift = 0.0
+
+        prob = ndtr((loghigh - drift) / sigma) - ndtr((loglow - drift) / sigma)
+
+    nonempty = counts > 0
+    pop[nonempty] = add.reduceat(prob, offsets[:-1][nonempty])
+
+    return pop
@@ -0,0 +1,183 @@
+"""
+Historical volatility estimators, e.g., to set 'Inputs.volatility' from price
+histories.
+
+The estimators take daily prices as arrays whose last axis is time, such as
+(tickers x days) arrays built from 'HistoryStore.load_panel()', and return
+annualized volatilities of the same shape: the element for a day is the
+estimate over the window of days ending on it, NaN where the window is
+incomplete or holds a missing price. Rolling windows are computed from
+cumulative sums, in a single vectorized pass over all the tickers.
+"""
+
+import numpy as np
+from numpy.typing import ArrayLike
+from scipy.signal import lfilter
+
+TRADING_DAYS = 252
+
+
+def close_to_close(
+    close: ArrayLike, window: int = 21, trading_days: int = TRADING_DAYS
+) -> np.ndarray:
+    """
+    Returns the standard deviation of the daily log returns over rolling
+    windows of 'window' returns.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = _shift(np.log(close[..., 1:] / close[..., :-1]))
+
+    return np.sqrt(_rolling_var(returns, window) * trading_days)
+
+
+def ewma(
+    close: ArrayLike, decay: float = 0.94, trading_days: int = TRADING_DAYS
+) -> np.ndarray:
+    """
+    Returns the RiskMetrics exponentially weighted moving average estimate,
+    with variance(t) = decay * variance(t-1) + (1 - decay) * return(t)^2,
+    started from the first squared return. A missing price makes the estimates
+    from it on NaN.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    squared = np.log(close[..., 1:] / close[..., :-1]) ** 2
+    variance = np.full(close.shape, np.nan)
+
+    if squared.shape[-1] > 0:
+        # The recursion is a first order linear filter, started from the first
+        # squared return
+        initial = (decay * squared[..., :1]).reshape(squared.shape[:-1] + (1,))
+        variance[..., 1:] = lfilter(
+            [1.0 - decay], [1.0, -decay], squared, axis=-1, zi=initial
+        )[0]
+
+    return np.sqrt(variance * trading_days)
+
+
+def parkinson(
+    high: ArrayLike,
+    low: ArrayLike,
+    window: int = 21,
+    trading_days: int = TRADING_DAYS,
+) -> np.ndarray:
+    """
+    Returns the Parkinson estimate from the daily high-low ranges over rolling
+    windows of 'window' days.
+    """
+    high, low = _asarrays(high, low)
+    variance = np.log(high / low) ** 2 / (4.0 * np.log(2.0))
+
+    return np.sqrt(_rolling_mean(variance, window) * trading_days)
+
+
+def garman_klass(
+    open: ArrayLike,
+    high: ArrayLike,
+    low: ArrayLike,
+    close: ArrayLike,
+    window: int = 21,
+    trading_days: int = TRADING_DAYS,
+) -> np.ndarray:
+    """
+    Returns the Garman-Klass estimate from the daily open, high, low and close
+    prices over rolling windows of 'window' days.
+    """
+    open, high, low, close = _asarrays(open, high, low, close)
+    variance = (
+        0.5 * np.log(high / low) ** 2
+        - (2.0 * np.log(2.0) - 1.0) * np.log(close / open) ** 2
+    )
+
+    return np.sqrt(_rolling_mean(variance, window) * trading_days)
+
+
+def yang_zhang(
+    open: ArrayLike,
+    high: ArrayLike,
+    low: ArrayLike,
+    close: ArrayLike,
+    window: int = 21,
+    trading_days: int = TRADING_DAYS,
+) -> np.ndarray:
+    """
+    Returns the Yang-Zhang estimate over rolling windows of 'window' days,
+    combining the overnight (previous close to open) and open-to-close return
+    variances with the Rogers-Satchell estimate, so that it is unbiased with
+    opening jumps and drifts.
+    """
+    open, high, low, close = _asarrays(open, high, low, close)
+    overnight = _shift(np.log(open[..., 1:] / close[..., :-1]))
+    intraday = np.log(close / open)
+    rogers_satchell = np.log(high / close) * np.log(high / open) + np.log(
+        low / close
+    ) * np.log(low / open)
+    k = 0.34 / (1.34 + (window + 1) / (window - 1))
+    variance = (
+        _rolling_var(overnight, window)
+        + k * _rolling_var(intraday, window)
+        + (1.0 - k) * _rolling_mean(rogers_satchell, window)
+    )
+
+    return np.sqrt(variance * trading_days)
+
+
+def _asarrays(*prices: ArrayLike) -> list[np.ndarray]:
+    arrays = [np.asarray(price, dtype=np.float64) for price in prices]
+
+    if any(array.shape != arrays[0].shape for array in arrays):
+        raise ValueError("Prices must have the same shape!")
+
+    return arrays
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    # Aligns values computed from consecutive days with the later day
+    return np.concatenate((np.full(values.shape[:-1] + (1,), np.nan), values), axis=-1)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the sums over rolling windows of 'window' values along the last
+    axis, NaN where the window is incomplete or holds a NaN.
+    """
+    if window < 1:
+        raise ValueError("Window must be positive!")
+
+    # Cumulative sums starting from zero: the sum of a window is a difference
+    missing = np.isnan(values)
+    zero = np.zeros(values.shape[:-1] + (1,))
+    cumsum = np.concatenate(
+        (zero, np.cumsum(np.where(missing, 0.0, values), axis=-1)), axis=-1
+    )
+    nmissing = np.concatenate((zero, np.cumsum(missing, axis=-1)), axis=-1)
+    sums = np.full(values.shape, np.nan)
+    sums[..., window - 1 :] = np.where(
+        nmissing[..., window:] > nmissing[..., :-window],
+        np.nan,
+        cumsum[..., window:] - cumsum[..., :-window],
+    )
+
+    return sums
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_sum(values, window) / window
+
+
+def _rolling_var(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the sample variances over rolling windows of 'window' values.
+    """
+    if window < 2:
+        raise ValueError("Window must be at least 2!")
+
+    # Values are centered on their overall mean to limit the cancellation in
+    # sum(x^2) - sum(x)^2/n
+    count = np.maximum(np.sum(~np.isnan(values), axis=-1, keepdims=True), 1)
+    values = values - np.nansum(values, axis=-1, keepdims=True) / count
+    sums = _rolling_sum(values, window)
+    variance = (_rolling_sum(values * values, window) - sums * sums / window) / (
+        window - 1
+    )
+
+    return np.maximum(variance, 0.0)
@@ -14,3 +14,86 @@ def nvidia():
         min_stock=stockprice - 100.0,
         max_stock=stockprice + 100.0,
     )
+
+
+@pytest.fixture
+def microsoft():
+    # Raw underlying asset data of an options chain, as returned by Yahoo
+    return {
+        "symbol": "MSFT",
+        "region": "US",
+        "quoteType": "EQUITY",
+        "quoteSourceName": "Delayed Quote",
+        "triggerable": True,
+        "currency": "USD",
+        "marketState": "CLOSED",
+        "regularMarketChangePercent": 0.43,
+        "regularMarketPrice": 406.32,
+        "exchange": "NMS",
+        "shortName": "Microsoft Corporation",
+        "longName": "Microsoft Corporation",
+        "exchangeTimezoneName": "America/New_York",
+        "exchangeTimezoneShortName": "EST",
+        "gmtOffSetMilliseconds": -18000000,
+        "market": "us_market",
+        "esgPopulated": False,
+        "firstTradeDateMilliseconds": 511108200000,
+        "postMarketChangePercent": 0.05,
+        "postMarketTime": 1707872399,
+        "postMarketPrice": 406.52,
+        "postMarketChange": 0.2,
+        "regularMarketChange": 1.75,
+        "regularMarketTime": 1707858001,
+        "regularMarketDayHigh": 407.0,
+        "regularMarketDayRange": "403.51 - 407.0",
+        "regularMarketDayLow": 403.51,
+        "regularMarketVolume": 18765634,
+        "regularMarketPreviousClose": 404.57,
+        "bid": 406.2,
+        "ask": 406.5,
+        "bidSize": 8,
+        "askSize": 10,
+        "fullExchangeName": "NasdaqGS",
+        "financialCurrency": "USD",
+        "regularMarketOpen": 404.0,
+        "averageDailyVolume3Month": 22804014,
+        "averageDailyVolume10Day": 21353170,
+        "fiftyTwoWeekLowChange": 160.71,
+        "fiftyTwoWeekLowChangePercent": 0.65,
+        "fiftyTwoWeekRange": "245.61 - 420.82",
+        "fiftyTwoWeekHighChange": -14.5,
+        "fiftyTwoWeekHighChangePercent": -0.03,
+        "fiftyTwoWeekLow": 245.61,
+        "fiftyTwoWeekHigh": 420.82,
+        "fiftyTwoWeekChangePercent": 51.41,
+        "dividendDate": 1709769600,
+        "earningsTimestamp": 1706130000,
+        "earningsTimestampStart": 1713880740,
+        "earningsTimestampEnd": 1714392000,
+        "trailingAnnualDividendRate": 2.87,
+        "trailingPE": 36.67,
+        "dividendRate": 3.0,
+        "trailingAnnualDividendYield": 0.007,
+        "dividendYield": 0.74,
+        "epsTrailingTwelveMonths": 11.08,
+        "epsForward": 12.94,
+        "epsCurrentYear": 11.61,
+        "priceEpsCurrentYear": 35.0,
+        "sharesOutstanding": 7430439936,
+        "bookValue": 34.06,
+        "fiftyDayAverage": 382.09,
+        "fiftyDayAverageChange": 24.23,
+        "fiftyDayAverageChangePercent": 0.06,
+        "twoHundredDayAverage": 347.91,
+        "twoHundredDayAverageChange": 58.41,
+        "twoHundredDayAverageChangePercent": 0.17,
+        "marketCap": 3019136401408,
+        "forwardPE": 31.4,
+        "priceToBook": 11.93,
+        "sourceInterval": 15,
+        "exchangeDataDelayedBy": 0,
+        "averageAnalystRating": "1.7 - Buy",
+        "tradeable": False,
+        "cryptoTradeable": False,
+        "displayName": "Microsoft",
+    }
@@ -1,7 +1,7 @@
 import pandas as pd
 
 from optionsmonkey.api import get_options_chain, get_stock_history
-from optionsmonkey.models import UnderlyingAsset
+from optionsmonkey.models import LazyUnderlyingAsset, UnderlyingAsset
 from optionsmonkey.utils import get_fridays_date
 
 
@@ -13,7 +13,8 @@ def test_get_options_chain():
 
     assert isinstance(options.calls, pd.DataFrame)
     assert isinstance(options.puts, pd.DataFrame)
-    assert isinstance(options.underlying, UnderlyingAsset)
+    assert isinstance(options.underlying, LazyUnderlyingAsset)
+    assert isinstance(options.underlying.to_model(), UnderlyingAsset)
 
 
 def test_get_stock_history():
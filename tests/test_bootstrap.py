@@ -0,0 +1,90 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from optionsmonkey.bootstrap import BootstrapGenerator
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.history_store import HistoryStore
+from optionsmonkey.models import Inputs
+from optionsmonkey.providers import SyntheticProvider
+
+RETURNS = np.random.default_rng(0).normal(0.0005, 0.02, 1000)
+
+
+def test_block_bootstrap():
+    generator = BootstrapGenerator(returns={"XYZ": RETURNS}, block_size=5)
+    samples = generator.samples("xyz", 100.0, 12, n=1000, seed=1)
+
+    # Blocks of 5, 5 and 2 returns
+    starts = np.random.default_rng(1).integers(0, 996, (3, 1000))
+    growth = sum(
+        np.array([RETURNS[start : start + size].sum() for start in starts[i]])
+        for i, size in enumerate((5, 5, 2))
+    )
+
+    assert np.allclose(samples, 100.0 * np.exp(growth))
+    assert not samples.flags.writeable
+
+    # Cached by ticker, stock price, horizon, number of samples and seed
+    assert generator.samples("XYZ", 100.0, 12, n=1000, seed=1) is samples
+    assert generator.samples("XYZ", 100.0, 12, n=1000, seed=2) is not samples
+    assert generator.samples("XYZ", 100.0, 12, n=1000) is not samples
+    assert generator.stats.memory_hits == 1 and generator.stats.misses == 3
+
+
+def test_drift():
+    generator = BootstrapGenerator(returns={"XYZ": RETURNS}, drift=0.0)
+    growth = np.log(generator.samples("XYZ", 1.0, 21, n=100000, seed=0))
+
+    assert growth.mean() == pytest.approx(0.0, abs=0.002)
+    assert growth.std() == pytest.approx(RETURNS.std() * np.sqrt(21), rel=0.05)
+
+    with pytest.raises(ValueError):
+        BootstrapGenerator(block_size=0)
+
+
+def test_engine_samples(tmp_path):
+    provider = SyntheticProvider({"XYZ": 100.0})
+    generator = BootstrapGenerator(
+        provider=provider, store=HistoryStore(tmp_path), num_of_months=12
+    )
+
+    assert generator.returns("XYZ").shape[0] > 200
+
+    inputs = Inputs(
+        stock_price=100.0,
+        volatility=0.3,
+        interest_rate=0.045,
+        min_stock=50.0,
+        max_stock=150.0,
+        start_date=dt.date(2024, 1, 8),
+        target_date=dt.date(2024, 2, 16),
+        distribution="array",
+        nmc_prices=20000,
+        seed=3,
+        strategy=[
+            {
+                "type": "call",
+                "strike": 105.0,
+                "premium": 2.0,
+                "n": 100,
+                "action": "buy",
+                "expiration": dt.date(2024, 2, 16),
+            }
+        ],
+    )
+    engine = StrategyEngine(inputs)
+    samples = generator.attach(engine, "XYZ")
+    outputs = engine.run()
+
+    assert samples.shape[0] == 20000
+    assert engine.state.s_mc is samples
+    assert 0.0 < outputs.probability_of_profit < 0.5
+    assert generator.attach(StrategyEngine(inputs), "XYZ") is samples
+
+    # The horizon is in trading days even if the engine counts calendar days
+    calendar = StrategyEngine(inputs.derive(discard_nonbusiness_days=False))
+
+    assert calendar.days_to_target == 39
+    assert generator.attach(calendar, "XYZ") is samples
@@ -0,0 +1,165 @@
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+import requests
+
+from optionsmonkey.api import TokenBucket, get_options_chains
+from optionsmonkey.chain_cache import ChainCache
+from optionsmonkey.models import OptionsChain
+
+EXPIRATIONS = [dt.date(2024, 2, 16), dt.date(2024, 3, 15)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for the data source: serves a chain per /<ticker>/<expiration>
+    path, failing the first request of 'FLAKY' chains and every request of
+    'DEAD' chains, and not finding 'BAD' chains.
+    """
+
+    def do_GET(self):
+        server = self.server
+
+        with server.lock:
+            server.requests.append(self.path)
+            attempts = server.requests.count(self.path)
+
+        if self.path.startswith("/DEAD") or (
+            self.path.startswith("/FLAKY") and attempts == 1
+        ):
+            self.send_response(503)
+            self.end_headers()
+
+            return
+
+        if self.path.startswith("/BAD"):
+            self.send_response(404)
+            self.end_headers()
+
+            return
+
+        ticker, expiration = self.path.strip("/").split("/")
+        body = json.dumps(
+            {
+                "calls": [
+                    {"strike": 400.0, "lastPrice": 9.1, "expiration": expiration}
+                ],
+                "puts": [{"strike": 400.0, "lastPrice": 2.6, "expiration": expiration}],
+                "underlying": server.underlying | {"symbol": ticker},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(microsoft):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.underlying = microsoft
+    server.lock = threading.Lock()
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_options_chains(stub_server, tmp_path):
+    url = f"http://127.0.0.1:{stub_server.server_address[1]}"
+
+    def fetch(ticker, expiration_date, session):
+        response = session.get(f"{url}/{ticker}/{expiration_date}", timeout=5)
+        response.raise_for_status()
+        data = response.json()
+
+        return OptionsChain(
+            calls=pd.DataFrame(data["calls"]),
+            puts=pd.DataFrame(data["puts"]),
+            underlying=data["underlying"],
+        )
+
+    pairs = [
+        (ticker, expiration)
+        for ticker in ("MSFT", "AAPL", "FLAKY", "DEAD", "BAD")
+        for expiration in EXPIRATIONS
+    ]
+    cache = ChainCache(tmp_path)
+
+    with requests.Session() as session:
+        results = list(
+            get_options_chains(
+                pairs,
+                rate=100.0,
+                retries=2,
+                backoff=0.01,
+                session=session,
+                cache=cache,
+                fetch=fetch,
+            )
+        )
+
+    assert sorted((result.ticker, result.expiration_date) for result in results) == (
+        sorted(pairs)
+    )
+
+    for result in results:
+        if result.ticker in ("DEAD", "BAD"):
+            assert isinstance(result.error, requests.HTTPError)
+        else:
+            assert result.error is None
+            assert result.chain.underlying.symbol == result.ticker
+            assert result.chain.calls["expiration"][0] == str(result.expiration_date)
+
+    # Server errors are retried, missing chains are not
+    assert len(stub_server.requests) == 4 + 2 * 2 + 2 * 3 + 2
+
+    cached = list(get_options_chains(pairs[:6], cache=cache, fetch=fetch))
+
+    assert all(result.error is None for result in cached)
+    assert len(stub_server.requests) == 16
+
+
+def test_get_options_chains_closed_early():
+    started = []
+
+    def fetch(ticker, expiration_date, session):
+        started.append(ticker)
+        time.sleep(0.05)
+
+        raise ValueError("Not retried")
+
+    results = get_options_chains(
+        [(f"T{i}", EXPIRATIONS[0]) for i in range(50)],
+        max_workers=2,
+        rate=1000.0,
+        burst=1000.0,
+        fetch=fetch,
+    )
+    first = next(results)
+    results.close()
+
+    assert isinstance(first.error, ValueError)
+    assert len(started) < 10
+
+
+def test_token_bucket():
+    limiter = TokenBucket(rate=100.0, capacity=5.0)
+    start = time.monotonic()
+
+    for _ in range(25):
+        limiter.acquire()
+
+    assert time.monotonic() - start >= 0.19
@@ -0,0 +1,75 @@
+from optionsmonkey.cache import ResultCache, inputs_key
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+
+STOCK = {"type": "stock", "n": 100, "action": "buy"}
+
+
+def covered_call(nvidia, **kwargs):
+    call = {
+        "type": "call",
+        "strike": 185.0,
+        "premium": 4.1,
+        "n": 100,
+        "action": "sell",
+        "expiration": nvidia["target_date"],
+    }
+
+    return Inputs.model_validate(nvidia | dict(strategy=[STOCK, call]) | kwargs)
+
+
+def test_inputs_key_is_canonical(nvidia):
+    inputs = covered_call(nvidia)
+    swapped = inputs.model_copy(update={"strategy": inputs.strategy[::-1]})
+    nudged = covered_call(nvidia, volatility=nvidia["volatility"] + 1e-12)
+
+    assert inputs_key(inputs) == inputs_key(swapped) == inputs_key(nudged)
+    assert inputs_key(inputs) != inputs_key(covered_call(nvidia, volatility=0.5))
+    assert inputs_key(covered_call(nvidia, seed=1)) == inputs_key(inputs)
+    assert inputs_key(
+        covered_call(nvidia, compute_expectation=True, seed=1)
+    ) != inputs_key(covered_call(nvidia, compute_expectation=True, seed=2))
+
+
+def test_result_cache(nvidia, tmp_path):
+    inputs = covered_call(nvidia)
+    swapped = inputs.model_copy(update={"strategy": inputs.strategy[::-1]})
+    cache = ResultCache(maxsize=1, path=str(tmp_path / "cache.db"))
+
+    assert cache.run(inputs) == StrategyEngine(inputs).run()
+    assert cache.run(swapped) == StrategyEngine(swapped).run()
+    assert cache.stats.memory_hits == 1 and cache.stats.misses == 1
+
+    cache.run(covered_call(nvidia, volatility=0.5))
+    cache.close()
+
+    reopened = ResultCache(path=str(tmp_path / "cache.db"))
+
+    assert reopened.run(inputs) == StrategyEngine(inputs).run()
+    assert reopened.stats.disk_hits == 1
+    assert reopened.stats.hit_ratio == 1.0
+
+
+def test_result_cache_runs_quantized_inputs(nvidia):
+    inputs = covered_call(nvidia)
+    nudged = covered_call(nvidia, volatility=nvidia["volatility"] + 1e-7)
+    cache = ResultCache(decimals=4)
+
+    # The first inputs of a key are run as quantized
+    assert cache.run(nudged) == StrategyEngine(inputs).run()
+    assert cache.run(inputs) == StrategyEngine(inputs).run()
+    assert cache.stats.memory_hits == 1
+
+
+def test_result_cache_monte_carlo(nvidia):
+    cache = ResultCache()
+    unseeded = covered_call(nvidia, compute_expectation=True)
+    seeded = covered_call(nvidia, compute_expectation=True, seed=42)
+
+    cache.run(unseeded)
+    cache.run(unseeded)
+    first = cache.run(seeded)
+
+    assert cache.stats.hits == 0 and len(cache) == 1
+    assert cache.run(seeded) == first == StrategyEngine(seeded).run()
+    assert cache.stats.hits == 1
@@ -0,0 +1,100 @@
+import datetime as dt
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from optionsmonkey.black_scholes import get_implied_vol
+from optionsmonkey.chain_archive import ChainArchive
+from optionsmonkey.engine import LegType
+from optionsmonkey.providers import Quote, ReplayProvider, SyntheticProvider
+
+MSFT_CSV = Path(__file__).parents[1] / "examples" / "msft_22-November-2021.csv"
+
+
+def test_archive_replayed_chains(tmp_path):
+    provider = ReplayProvider({"MSFT": MSFT_CSV}, {"MSFT": Quote(342.97)})
+    date = dt.date(2021, 11, 22)
+    chains = {
+        expiration: provider.get_options_chain("MSFT", expiration)
+        for expiration in provider.get_expirations("MSFT")
+    }
+    archive = ChainArchive(tmp_path)
+    archive.append("msft", date, chains)
+
+    assert archive.underlyings() == ["MSFT"]
+    assert archive.dates("MSFT") == [date]
+
+    with pytest.raises(ValueError):
+        archive.append("MSFT", date, chains)
+
+    with pytest.raises(ValueError):
+        archive.append("MSFT", date + dt.timedelta(days=1), {})
+
+    snapshot = archive.read("MSFT", date)
+    expiration = dt.date(2021, 12, 17)
+    calls = chains[expiration].calls.sort_values("strike")
+    rows = snapshot.rows(expiration, "call")
+
+    assert snapshot.stock_price == 342.97
+    assert snapshot.expirations() == sorted(chains)
+    assert snapshot.strike.shape[0] == sum(
+        chain.calls.shape[0] + chain.puts.shape[0] for chain in chains.values()
+    )
+    assert np.array_equal(snapshot.strike[rows], calls["strike"])
+    assert np.array_equal(snapshot.ask[rows], calls["ask"])
+    assert (snapshot.type[rows] == LegType.CALL).all()
+    assert (snapshot.type[snapshot.rows(expiration, "put")] == LegType.PUT).all()
+    assert (snapshot.days_to_expiration[rows] == 25).all()
+    assert np.isnan(snapshot.implied_volatility).all()
+    assert not snapshot.bid.flags.writeable  # Memory-mapped
+    assert snapshot == snapshot and snapshot != archive.read("MSFT", date)
+
+    row = snapshot.find(expiration, "put", 340.0)
+
+    assert snapshot.strike[row] == 340.0 and snapshot.type[row] == LegType.PUT
+
+    with pytest.raises(ValueError):
+        snapshot.find(expiration, "put", 341.0)
+
+
+def test_backtest_scan(tmp_path):
+    archive = ChainArchive(tmp_path)
+    dates = [dt.date(2024, 1, 8) + dt.timedelta(days=day) for day in range(3)]
+
+    for date in dates:
+        provider = SyntheticProvider(
+            {"XYZ": 100.0}, volatility=0.25, interest_rate=0.0, start_date=date
+        )
+        archive.append(
+            "XYZ",
+            date,
+            {
+                expiration: provider.get_options_chain("XYZ", expiration)
+                for expiration in provider.get_expirations("XYZ")[:3]
+            },
+        )
+
+    snapshots = list(archive.snapshots("XYZ", start=dates[1]))
+
+    assert [snapshot.date for snapshot in snapshots] == dates[1:]
+
+    # Implied volatilities of the calls near the money, all at once
+    snapshot = snapshots[0]
+    rows = snapshot.type == LegType.CALL
+    near = (
+        rows
+        & (np.abs(snapshot.strike - snapshot.stock_price) < 5.0)
+        & (snapshot.days_to_expiration > 7)
+    )
+    iv = get_implied_vol(
+        "call",
+        snapshot.last_price[near],
+        snapshot.stock_price,
+        snapshot.strike[near],
+        0.0,
+        snapshot.days_to_expiration[near] / 365,
+    )
+
+    assert iv == pytest.approx(np.full(near.sum(), 0.25), abs=0.01)
+    assert np.allclose(snapshot.implied_volatility[rows], 0.25)
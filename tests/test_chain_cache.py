@@ -0,0 +1,105 @@
+import datetime as dt
+import json
+
+import pandas as pd
+import pytest
+
+from optionsmonkey.api import get_options_chain
+from optionsmonkey.chain_cache import SNAPSHOT_FORMAT, ChainCache
+from optionsmonkey.models import OptionsChain
+
+EXPIRATION = dt.date(2024, 2, 16)
+
+
+@pytest.fixture
+def chain(microsoft):
+    calls = pd.DataFrame(
+        {
+            "contractSymbol": ["MSFT240216C00400000", "MSFT240216C00410000"],
+            "strike": [400.0, 410.0],
+            "lastPrice": [9.1, 3.75],
+            "impliedVolatility": [0.21, 0.2],
+            "lastTradeDate": pd.to_datetime(
+                ["2024-02-01 15:59:58", "2024-02-01 15:42:10"], utc=True
+            ),
+            "inTheMoney": [True, False],
+        }
+    )
+    puts = calls.assign(
+        contractSymbol=["MSFT240216P00400000", "MSFT240216P00410000"],
+        lastPrice=[2.6, 7.2],
+    )
+
+    return OptionsChain(calls=calls, puts=puts, underlying=microsoft)
+
+
+def test_chain_cache(tmp_path, chain, microsoft):
+    cache = ChainCache(tmp_path, ttl=60.0)
+
+    assert cache.get("MSFT", EXPIRATION) is None
+
+    old = cache.put("MSFT", EXPIRATION, chain, snapshot=dt.datetime(2024, 2, 1))
+    new = cache.put("MSFT", EXPIRATION, chain)
+    cached = cache.get("msft", EXPIRATION)
+
+    pd.testing.assert_frame_equal(cached.calls, chain.calls)
+    pd.testing.assert_frame_equal(cached.puts, chain.puts)
+    assert cached.underlying.raw == microsoft
+    assert [snapshot.date() for snapshot in cache.snapshots("MSFT", EXPIRATION)] == [
+        old.date(),
+        new.date(),
+    ]
+    assert cache.get("MSFT", EXPIRATION, snapshot=old) is not None
+    assert cache.stats.hits == 2 and cache.stats.misses == 1
+    assert cache.stats.mean_hit_seconds > 0.0
+
+    # Storing the same snapshot again does nothing
+    assert cache.put("MSFT", EXPIRATION, chain, snapshot=old) == old
+    assert len(cache.snapshots("MSFT", EXPIRATION)) == 2
+
+    cache.put("MSFT", EXPIRATION, chain, ttl=0.0)
+
+    assert cache.get("MSFT", EXPIRATION) is None
+    assert ChainCache(tmp_path, offline=True).get("MSFT", EXPIRATION) is not None
+
+
+def test_get_options_chain_offline(tmp_path, chain):
+    cache = ChainCache(tmp_path, offline=True)
+    cache.put("MSFT", EXPIRATION, chain)
+
+    cached = get_options_chain("MSFT", EXPIRATION, cache=cache)
+
+    assert cached.underlying.regular_market_price == 406.32
+
+    with pytest.raises(RuntimeError):
+        get_options_chain("MSFT", dt.date(2024, 3, 15), cache=cache)
+
+
+def test_pickled_snapshots_are_not_loaded(tmp_path, chain):
+    cache = ChainCache(tmp_path, offline=True)
+    snapshot = cache.put("MSFT", EXPIRATION, chain)
+    directory = (
+        tmp_path / "MSFT" / EXPIRATION.isoformat() / snapshot.strftime(SNAPSHOT_FORMAT)
+    )
+    chain.calls.to_pickle(directory / "calls.pkl")
+    chain.puts.to_pickle(directory / "puts.pkl")
+    meta = json.loads((directory / "meta.json").read_text())
+    (directory / "meta.json").write_text(json.dumps(meta | {"format": "pickle"}))
+
+    assert cache.get("MSFT", EXPIRATION) is None
+
+
+def test_broken_snapshots_are_misses(tmp_path, chain):
+    cache = ChainCache(tmp_path)
+    snapshot = cache.put("MSFT", EXPIRATION, chain, ttl=3600.0)
+    directory = (
+        tmp_path / "MSFT" / EXPIRATION.isoformat() / snapshot.strftime(SNAPSHOT_FORMAT)
+    )
+    (directory / "meta.json").write_text('{"ttl": 36')
+
+    assert cache.get("MSFT", EXPIRATION) is None
+
+    (directory / "meta.json").unlink()
+
+    assert cache.get("MSFT", EXPIRATION) is None
+    assert cache.stats.misses == 2
@@ -1,6 +1,12 @@
-from optionsmonkey.engine import StrategyEngine
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 
-from optionsmonkey.models import Inputs, Outputs
+import numpy as np
+import pytest
+
+from optionsmonkey.engine import LEG_DTYPE, LegType, StrategyEngine
+
+from optionsmonkey.models import Inputs, Outputs, RawOutputs
 
 
 def test_covered_call(nvidia):
@@ -133,3 +139,472 @@ def test_100_perc_itm(nvidia):
         "theta": (-0.22254722153197432, 0.22755381063645636),
         "vega": (0.19665373318968424, 0.20330401888012928),
     }
+
+
+def test_covered_call_w_profit_target_and_loss_limit(nvidia):
+    inputs = Inputs.model_validate(
+        nvidia
+        | dict(
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "call",
+                    "strike": 185.0,
+                    "premium": 4.1,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": nvidia["target_date"],
+                },
+            ],
+            profit_target=1000.0,
+            loss_limit=-1000.0,
+        )
+    )
+
+    outputs = StrategyEngine(inputs).run()
+
+    assert outputs.profit_ranges == [(164.9, float("inf"))]
+    assert outputs.project_target_ranges == [(174.9, float("inf"))]
+    assert outputs.probability_of_profit_target < outputs.probability_of_profit < 1.0
+    assert 0.0 < outputs.probability_of_loss_limit < 1.0 - outputs.probability_of_profit
+
+
+def test_tail_risk_from_mc(nvidia):
+    inputs = Inputs.model_validate(
+        nvidia
+        | dict(
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "call",
+                    "strike": 185.0,
+                    "premium": 4.1,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": nvidia["target_date"],
+                },
+            ],
+            compute_expectation=True,
+            var_confidence_levels=[0.95, 0.99],
+            pl_quantiles=[0.5, 1.0],
+        )
+    )
+
+    outputs = StrategyEngine(inputs).run()
+
+    assert len(outputs.value_at_risk) == 2
+    assert outputs.value_at_risk[1] >= outputs.value_at_risk[0] > 0.0
+    assert outputs.conditional_value_at_risk[0] >= outputs.value_at_risk[0]
+    assert outputs.pl_quantiles[1] == pytest.approx(2011.0)
+
+    for invalid in (
+        dict(var_confidence_levels=[95.0]),
+        dict(var_confidence_levels=[1.0]),
+        dict(pl_quantiles=[-0.1]),
+        dict(compute_expectation=False),
+        dict(nmc_prices=0),
+    ):
+        with pytest.raises(ValueError):
+            Inputs.model_validate(inputs.model_dump() | invalid)
+
+
+def test_lazy_leg_profiles(nvidia):
+    strategy = [
+        {"type": "stock", "n": 100, "action": "buy"},
+        {
+            "type": "put",
+            "strike": 160.0,
+            "premium": 5.3,
+            "n": 100,
+            "action": "buy",
+            "expiration": nvidia["target_date"],
+        },
+        {
+            "type": "call",
+            "strike": 185.0,
+            "premium": 6.2,
+            "n": 100,
+            "action": "sell",
+            "expiration": dt.date(2023, 3, 17),
+        },
+        {"type": "closed", "prev_pos": -150.0},
+    ]
+    eager = StrategyEngine(
+        Inputs.model_validate(
+            nvidia | dict(strategy=strategy, compute_expectation=True)
+        )
+    )
+    lazy = StrategyEngine(
+        Inputs.model_validate(
+            nvidia
+            | dict(strategy=strategy, compute_expectation=True, per_leg_profiles=False)
+        )
+    )
+    lazy.s_mc = eager.s_mc = np.random.default_rng(1).lognormal(
+        np.log(nvidia["stock_price"]), 0.15, 50_000
+    )
+
+    assert lazy.run() == eager.run()
+    assert lazy.profit.size == 0 and lazy.profit_mc.size == 0
+    np.testing.assert_array_equal(lazy.strategyprofit_mc, eager.strategyprofit_mc)
+
+    for leg in range(len(strategy)):
+        np.testing.assert_array_equal(lazy.get_pl(leg)[1], eager.get_pl(leg)[1])
+
+
+def test_inputs_derive(nvidia):
+    def strategy(low, high):
+        return [
+            {
+                "type": "call",
+                "strike": low,
+                "premium": 12.65,
+                "n": 100,
+                "action": "buy",
+                "expiration": nvidia["target_date"],
+            },
+            {
+                "type": "call",
+                "strike": high,
+                "premium": 9.9,
+                "n": 100,
+                "action": "sell",
+                "expiration": nvidia["target_date"],
+            },
+        ]
+
+    template = Inputs.model_validate(nvidia | dict(strategy=strategy(165.0, 170.0)))
+    validated = Inputs.model_validate(
+        nvidia | dict(strategy=strategy(160.0, 170.0), volatility=0.5)
+    )
+    derived = template.derive(strategy=[{"strike": 160.0}, None], volatility=0.5)
+
+    assert derived == validated
+    assert derived.strategy[1] is template.strategy[1]
+    assert template.strategy[0].strike == 165.0
+    assert StrategyEngine(derived).run() == StrategyEngine(validated).run()
+
+
+def test_columnar_legs(nvidia):
+    inputs = Inputs.model_validate(
+        nvidia
+        | dict(
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "put",
+                    "strike": 160.0,
+                    "premium": 5.3,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": nvidia["target_date"],
+                },
+                {"type": "closed", "prev_pos": 50.0},
+            ]
+        )
+    )
+
+    st = StrategyEngine(inputs)
+
+    assert st.legs.dtype == LEG_DTYPE
+    assert st.legs["type"].tolist() == [LegType.STOCK, LegType.PUT, LegType.CLOSED]
+    assert st.type == ["stock", "put", "closed"]
+    assert st.action == ["buy", "sell", "n/a"]
+    assert st.strike.tolist() == [0.0, 160.0, 0.0]
+
+    outputs = st.run()
+
+    assert outputs.delta[0] == 1.0 and outputs.delta[2] == 0.0
+    assert outputs.delta[1] > 0.0
+    assert outputs.per_leg_cost[2] == 50.0
+
+
+def test_raw_outputs(nvidia):
+    inputs = Inputs.model_validate(
+        nvidia
+        | dict(
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "call",
+                    "strike": 185.0,
+                    "premium": 4.1,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": nvidia["target_date"],
+                },
+            ],
+            profit_target=1000.0,
+        )
+    )
+
+    st = StrategyEngine(inputs)
+    raw = st.run(validate=False)
+
+    assert isinstance(raw, RawOutputs)
+    assert isinstance(raw.delta, np.ndarray)
+    np.testing.assert_array_equal(raw.profit_ranges, [[164.9, np.inf]])
+    assert raw.to_pydantic() == st.run()
+    assert raw != st.run(validate=False) and len({raw, raw}) == 1
+
+    with pytest.raises(AttributeError):
+        raw.strategy_cost = 0.0
+
+
+def test_leg_netting(nvidia):
+    def call(n, action, premium, strike=185.0):
+        return {
+            "type": "call",
+            "strike": strike,
+            "premium": premium,
+            "n": n,
+            "action": action,
+            "expiration": dt.date(2023, 3, 17),
+        }
+
+    fills = [
+        {"type": "stock", "n": 60, "action": "buy"},
+        call(60, "sell", 6.2),
+        {"type": "stock", "n": 40, "action": "buy"},
+        call(40, "sell", 6.3),
+        call(30, "buy", 2.0, strike=200.0),
+        call(30, "sell", 2.1, strike=200.0),
+    ]
+    netted = StrategyEngine(
+        Inputs.model_validate(
+            nvidia | dict(strategy=fills, compute_expectation=True, seed=7)
+        )
+    )
+    outputs = netted.run()
+
+    assert netted.contracts.shape[0] == 3
+    assert netted.leg_contract.tolist() == [0, 1, 0, 1, 2, 2]
+    assert netted.contracts["action"].tolist() == [1, -1, 1]
+    assert netted.contracts["n"].tolist() == [100, 100, 0]
+    assert outputs.per_leg_cost[1] == pytest.approx(60 * 6.2)
+
+    single = StrategyEngine(
+        Inputs.model_validate(
+            nvidia
+            | dict(
+                strategy=[
+                    {"type": "stock", "n": 100, "action": "buy"},
+                    call(100, "sell", 6.24),
+                    {"type": "closed", "prev_pos": 3.0},
+                ],
+                compute_expectation=True,
+                seed=7,
+            )
+        )
+    )
+    expected = single.run()
+
+    np.testing.assert_allclose(netted.strategyprofit, single.strategyprofit, atol=1e-6)
+    np.testing.assert_allclose(
+        netted.strategyprofit_mc, single.strategyprofit_mc, atol=1e-6
+    )
+    assert outputs.strategy_cost == pytest.approx(expected.strategy_cost)
+    assert outputs.profit_ranges == expected.profit_ranges
+
+    for leg, fill in enumerate(fills):
+        alone = StrategyEngine(Inputs.model_validate(nvidia | dict(strategy=[fill])))
+        alone.run()
+
+        np.testing.assert_allclose(netted.get_pl(leg)[1], alone.get_pl(0)[1])
+
+
+def test_closed_leg_next_to_stock(nvidia):
+    legs = [
+        {
+            "type": "call",
+            "strike": 185.0,
+            "premium": 6.2,
+            "n": 100,
+            "action": "sell",
+            "expiration": nvidia["target_date"],
+        },
+        {
+            "type": "put",
+            "strike": 160.0,
+            "premium": 5.3,
+            "n": 100,
+            "action": "buy",
+            "expiration": nvidia["target_date"],
+        },
+        {"type": "closed", "prev_pos": -300.0},
+        {"type": "stock", "n": 100, "action": "buy"},
+    ]
+    # The closed leg at index 2, then first
+    engines = [
+        StrategyEngine(
+            Inputs.model_validate(nvidia | dict(strategy=[legs[i] for i in order]))
+        )
+        for order in ([0, 1, 2, 3], [2, 0, 1, 3])
+    ]
+    outputs = [engine.run() for engine in engines]
+
+    assert engines[0].contracts.shape[0] == 4
+    assert outputs[0].strategy_cost == pytest.approx(outputs[1].strategy_cost)
+    assert outputs[0].profit_ranges == outputs[1].profit_ranges
+    assert outputs[0].probability_of_profit == pytest.approx(
+        outputs[1].probability_of_profit
+    )
+    np.testing.assert_allclose(
+        engines[0].strategyprofit, engines[1].strategyprofit, atol=1e-6
+    )
+
+    for engine in engines:
+        np.testing.assert_allclose(
+            engine.compile()(engine.s), engines[0].strategyprofit, atol=1e-6
+        )
+
+    # Values at a point, without running the engine
+    for order in ([0, 1, 2, 3], [2, 0, 1, 3], [3, 2, 1, 0]):
+        engine = StrategyEngine(
+            Inputs.model_validate(nvidia | dict(strategy=[legs[i] for i in order]))
+        )
+
+        assert engine.value_at(200.0) == pytest.approx(
+            np.interp(200.0, engines[0].s, engines[0].strategyprofit)
+        )
+
+
+def test_compiled_payoff(nvidia):
+    strategy = [
+        {"type": "stock", "n": 100, "action": "buy"},
+        {
+            "type": "put",
+            "strike": 160.0,
+            "premium": 5.3,
+            "n": 100,
+            "action": "buy",
+            "expiration": nvidia["target_date"],
+        },
+        {
+            "type": "call",
+            "strike": 185.0,
+            "premium": 6.2,
+            "n": 100,
+            "action": "sell",
+            "expiration": dt.date(2023, 3, 17),
+        },
+        {
+            "type": "put",
+            "strike": 150.0,
+            "premium": 3.1,
+            "n": 50,
+            "action": "sell",
+            "expiration": dt.date(2023, 3, 17),
+        },
+        {"type": "closed", "prev_pos": -150.0},
+    ]
+    st = StrategyEngine(
+        Inputs.model_validate(
+            nvidia
+            | dict(
+                strategy=strategy,
+                dividend_yield=0.01,
+                opt_commission=1.0,
+                compute_expectation=True,
+                seed=5,
+            )
+        )
+    )
+    st.run()
+    payoff = st.compile()
+
+    np.testing.assert_allclose(payoff(st.s), st.strategyprofit, atol=1e-6)
+    np.testing.assert_allclose(payoff(st.s_mc), st.strategyprofit_mc, atol=1e-6)
+
+    paths = st.s_mc[:1000].reshape(10, 100)
+
+    assert payoff(paths).shape == (10, 100)
+    np.testing.assert_allclose(
+        payoff(paths), st.strategyprofit_mc[:1000].reshape(10, 100), atol=1e-6
+    )
+    assert payoff(st.s[0]) == pytest.approx(st.strategyprofit[0])
+
+
+def test_value_at(nvidia):
+    inputs = Inputs.model_validate(
+        nvidia
+        | dict(
+            strategy=[
+                {"type": "stock", "n": 100, "action": "buy"},
+                {
+                    "type": "call",
+                    "strike": 185.0,
+                    "premium": 6.2,
+                    "n": 100,
+                    "action": "sell",
+                    "expiration": dt.date(2023, 3, 17),
+                },
+            ]
+        )
+    )
+    st = StrategyEngine(inputs)
+    spots = np.array([150.0, 168.99, 190.0])
+    values = st.value_at(spots)
+
+    assert st.s.shape[0] == 0
+    assert isinstance(st.value_at(168.99), float)
+    assert st.value_at(168.99) == pytest.approx(values[1])
+
+    st.run()
+
+    np.testing.assert_allclose(
+        values, np.interp(spots, st.s, st.strategyprofit), atol=1e-6
+    )
+
+
+def test_concurrent_evaluate(nvidia):
+    strategy = [
+        {"type": "stock", "n": 100, "action": "buy"},
+        {
+            "type": "call",
+            "strike": 185.0,
+            "premium": 6.2,
+            "n": 100,
+            "action": "sell",
+            "expiration": dt.date(2023, 3, 17),
+        },
+        {
+            "type": "put",
+            "strike": 160.0,
+            "premium": 5.3,
+            "n": 100,
+            "action": "buy",
+            "expiration": nvidia["target_date"],
+        },
+    ]
+    engines = [
+        StrategyEngine(
+            Inputs.model_validate(
+                nvidia
+                | dict(
+                    strategy=strategy[: i + 1],
+                    compute_expectation=True,
+                    per_leg_profiles=i % 2 == 0,
+                    seed=i,
+                    nmc_prices=20000,
+                    var_confidence_levels=[0.95],
+                )
+            )
+        )
+        for i in range(3)
+    ]
+    expected = [engine.run() for engine in engines]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        states = list(pool.map(lambda i: engines[i % 3].evaluate(), range(96)))
+
+    for i, state in enumerate(states):
+        assert state.outputs == expected[i % 3]
+        np.testing.assert_array_equal(
+            state.strategyprofit_mc, engines[i % 3].strategyprofit_mc
+        )
+
+    fresh = StrategyEngine(Inputs.model_validate(nvidia | dict(strategy=strategy)))
+    fresh.evaluate()
+
+    assert fresh.state is None
@@ -0,0 +1,123 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from optionsmonkey.api import get_stock_history, update_stock_histories
+from optionsmonkey.history_store import HistoryStore
+from optionsmonkey.providers import SyntheticProvider
+
+
+class RecordingProvider(SyntheticProvider):
+    """
+    Synthetic provider recording the date ranges of the histories it serves.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def get_stock_history(self, ticker, num_of_months, start=None, end=None):
+        self.requests.append((ticker, start, end))
+
+        return super().get_stock_history(ticker, num_of_months, start, end)
+
+
+@pytest.fixture
+def provider():
+    return RecordingProvider({"XYZ": 100.0, "ABC": 50.0, "DEF": 20.0})
+
+
+def test_incremental_history(tmp_path, provider):
+    store = HistoryStore(tmp_path)
+    history = get_stock_history("XYZ", 3, provider=provider, store=store)
+    expected = provider.get_stock_history("XYZ", 3, start=provider.requests[0][1])
+
+    assert np.array_equal(history.index.values, expected.index.values)
+    assert np.allclose(history.values, expected.values)
+    assert not history["Close"].to_numpy().flags.writeable  # Memory-mapped
+    assert len(provider.requests) == 2
+
+    # Fresh store: nothing is fetched
+    get_stock_history("XYZ", 3, provider=provider, store=store)
+
+    assert len(provider.requests) == 2
+
+    # Longer window: only the older bars are fetched
+    start = provider.requests[0][1]
+    history = get_stock_history("XYZ", 6, provider=provider, store=store)
+    start_6 = provider.requests[-1][1]
+
+    assert provider.requests[-1][2] == start
+    assert history.index.is_unique and history.index.is_monotonic_increasing
+    assert np.allclose(
+        history.values, provider.get_stock_history("XYZ", 6, start=start_6).values
+    )
+
+    # Stale store: only the bars from the last stored one on are fetched
+    store.ttl = 0.0
+    last = history.index[-1].date()
+    history = get_stock_history("XYZ", 6, provider=provider, store=store)
+
+    assert provider.requests[-1][1:] == (last, None)
+    assert history.index.is_unique
+    assert np.allclose(
+        history.values, provider.get_stock_history("XYZ", 6, start=start_6).values
+    )
+
+
+def test_synthetic_windows(provider):
+    # The bars of a date are the same whatever the window, so that histories
+    # fetched in pieces can be merged
+    history = provider.get_stock_history("XYZ", 3)
+    start = history.index[20]
+    window = provider.get_stock_history("XYZ", 1, start=start.date())
+
+    assert history.loc[start:].equals(window)
+    assert (history["Open"].iloc[1:].values == history["Close"].iloc[:-1].values).all()
+
+
+def test_append_replaces_last_bar(tmp_path):
+    store = HistoryStore(tmp_path)
+    dates = pd.bdate_range("2024-01-01", periods=5)
+    bars = pd.DataFrame({"Close": np.arange(5.0)}, index=dates)
+    store.merge("XYZ", bars.iloc[:2], dt.date(2024, 1, 1))
+    store.merge("XYZ", bars.iloc[1:3], dt.date(2024, 1, 2))
+    mapped = store.load("XYZ")["Close"]
+
+    # Same last bar: the new bars are appended to the same generation
+    assert store._read_meta("XYZ")["generation"] == 0
+    assert mapped.tolist() == [0.0, 1.0, 2.0]
+
+    store.merge("XYZ", bars.iloc[2:] + 10.0, dt.date(2024, 1, 3))
+
+    # Changed last bar: a new generation, and mapped rows are left untouched
+    assert store._read_meta("XYZ")["generation"] == 1
+    assert mapped.tolist() == [0.0, 1.0, 2.0]
+    assert store.load("XYZ")["Close"].tolist() == [0.0, 1.0, 12.0, 13.0, 14.0]
+    assert store.load("XYZ", dt.date(2024, 1, 2), dt.date(2024, 1, 4)).shape[0] == 2
+    assert store.tickers() == ["XYZ"]
+
+    with pytest.raises(ValueError):
+        store.load("ABC")
+
+
+def test_bulk_update(tmp_path, provider):
+    store = HistoryStore(tmp_path)
+    errors = update_stock_histories(
+        ["XYZ", "ABC", "DEF", "GHI"],
+        2,
+        store,
+        rate=1000.0,
+        backoff=0.0,
+        provider=provider,
+    )
+
+    assert list(errors) == ["GHI"]
+    assert isinstance(errors["GHI"], ValueError)
+
+    panel = store.load_panel(["XYZ", "ABC", "DEF", "GHI"])
+
+    assert list(panel.columns) == ["XYZ", "ABC", "DEF"]
+    assert panel.iloc[-1].tolist() == pytest.approx([100.0, 50.0, 20.0])
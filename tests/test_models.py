@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from optionsmonkey.models import LazyUnderlyingAsset, OptionsChain, UnderlyingAsset
+
+
+def test_lazy_underlying_asset(microsoft):
+    chain = OptionsChain(
+        calls=pd.DataFrame(), puts=pd.DataFrame(), underlying=microsoft
+    )
+    underlying = chain.underlying
+
+    assert isinstance(underlying, LazyUnderlyingAsset)
+    assert underlying.regular_market_price == 406.32
+    assert (underlying.bid, underlying.ask, underlying.dividend_yield) == (
+        406.2,
+        406.5,
+        0.74,
+    )
+    assert underlying.trailing_pe == 36.67
+    assert underlying.fifty_two_week_range == (245.61, 420.82)
+    assert underlying.average_daily_volume3_month == 22804014
+    assert "symbol" not in underlying.__dict__
+
+    model = underlying.to_model()
+
+    assert isinstance(model, UnderlyingAsset)
+    assert model.regular_market_day_range == (403.51, 407.0)
+    assert all(
+        getattr(underlying, name) == value for name, value in model if name != "symbol"
+    )
+
+    with pytest.raises(AttributeError):
+        underlying.not_a_field
+
+
+def test_lazy_underlying_asset_missing_fields():
+    underlying = LazyUnderlyingAsset({"symbol": "X", "bid": None, "trailingPE": None})
+
+    assert not hasattr(underlying, "bid")
+    assert not hasattr(underlying, "ask")
+    assert not hasattr(underlying, "trailing_pe")
+    assert getattr(underlying, "regular_market_price", None) is None
+    assert underlying.symbol == "X"
+
+    with pytest.raises(ValueError):
+        underlying.to_model()
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from optionsmonkey.black_scholes import get_implied_vol
+from optionsmonkey.option_chain import create_bs_option_chain, create_bs_option_surface
+
+MATURITIES = np.array([0.05, 0.25, 1.0])
+
+
+def test_surface_matches_chains():
+    surface = create_bs_option_surface(100.0, 70.0, 130.0, 0.3, 0.045, MATURITIES, 41)
+
+    assert surface["calls"]["price"].shape == (3, 41)
+    assert surface["strikes"].shape == (41,)
+    assert surface["time2maturity"].tolist() == MATURITIES.tolist()
+    assert np.all(surface["implied_volatility"] == 0.3)
+
+    for i, time2maturity in enumerate(MATURITIES):
+        chain = create_bs_option_chain(
+            100.0, 70.0, 130.0, 0.3, 0.045, time2maturity, 41
+        )
+
+        assert np.array_equal(surface["strikes"], chain["strikes"])
+        assert np.allclose(surface["gamma"][i], chain["gamma"])
+        assert np.allclose(surface["vega"][i], chain["vega"])
+
+        for side in ("calls", "puts"):
+            for value in ("price", "delta", "theta"):
+                assert np.allclose(surface[side][value][i], chain[side][value])
+
+    assert np.allclose(surface["calls"]["itm_prob"] + surface["puts"]["itm_prob"], 1.0)
+
+
+def test_skew_and_noise():
+    surface = create_bs_option_surface(
+        100.0,
+        70.0,
+        130.0,
+        0.3,
+        0.0,
+        MATURITIES,
+        41,
+        skew=-0.1,
+        smile=0.05,
+        spread=0.05,
+        seed=0,
+    )
+    iv = surface["implied_volatility"]
+    calls = surface["calls"]
+
+    # Higher volatility on the downside, the lowest near the money
+    assert (iv[:, 0] > iv[:, -1]).all()
+    assert (iv[:, 0] > iv[:, 20]).all()
+    assert (calls["bid"] <= calls["price"] + 0.01).all()
+    assert (calls["ask"] >= calls["price"] - 0.01).all()
+
+    # The implied volatilities of the prices are the ones of the surface
+    liquid = calls["price"][1] > 1.0
+    assert get_implied_vol(
+        "call",
+        calls["price"][1][liquid],
+        100.0,
+        surface["strikes"][liquid],
+        0.0,
+        MATURITIES[1],
+    ) == pytest.approx(iv[1][liquid], abs=0.002)
+
+    again = create_bs_option_surface(
+        100.0,
+        70.0,
+        130.0,
+        0.3,
+        0.0,
+        MATURITIES,
+        41,
+        skew=-0.1,
+        smile=0.05,
+        spread=0.05,
+        seed=0,
+    )
+
+    assert np.array_equal(again["calls"]["bid"], calls["bid"])
+    assert np.array_equal(again["puts"]["ask"], surface["puts"]["ask"])
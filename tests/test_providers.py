@@ -0,0 +1,108 @@
+import datetime as dt
+from pathlib import Path
+
+import pytest
+
+from optionsmonkey.api import get_options_chain, get_options_chains, get_stock_history
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+from optionsmonkey.providers import Quote, ReplayProvider, SyntheticProvider
+
+MSFT_CSV = Path(__file__).parents[1] / "examples" / "msft_22-November-2021.csv"
+
+
+@pytest.fixture
+def replay():
+    return ReplayProvider({"MSFT": MSFT_CSV}, {"MSFT": Quote(342.97, 342.9, 343.0)})
+
+
+@pytest.fixture
+def synthetic():
+    return SyntheticProvider({"XYZ": 100.0}, start_date=dt.date(2024, 1, 8))
+
+
+def test_replay_provider(replay):
+    expiration = dt.date(2021, 12, 17)
+    chain = get_options_chain("msft", expiration, provider=replay)
+
+    assert dt.date(2021, 11, 26) in replay.get_expirations("MSFT")
+    assert set(chain.calls.columns) == {"strike", "bid", "ask"}
+    assert chain.calls.shape[0] > 0 and chain.puts.shape[0] > 0
+    assert chain.underlying.regular_market_price == 342.97
+
+    call = chain.calls[chain.calls["strike"] == 345.0].iloc[0]
+    inputs = Inputs(
+        stock_price=chain.underlying.regular_market_price,
+        volatility=0.25,
+        interest_rate=0.002,
+        min_stock=250.0,
+        max_stock=450.0,
+        start_date=dt.date(2021, 11, 22),
+        target_date=expiration,
+        strategy=[
+            {
+                "type": "call",
+                "strike": 345.0,
+                "premium": float(call["ask"]),
+                "n": 100,
+                "action": "buy",
+                "expiration": expiration,
+            }
+        ],
+    )
+    outputs = StrategyEngine(inputs).run()
+
+    assert outputs.strategy_cost == pytest.approx(-100 * call["ask"])
+
+    with pytest.raises(ValueError):
+        replay.get_options_chain("MSFT", dt.date(2021, 11, 23))
+
+    with pytest.raises(ValueError):
+        replay.get_options_chain("AAPL", expiration)
+
+
+def test_synthetic_provider(synthetic):
+    expirations = synthetic.get_expirations("XYZ")
+
+    assert expirations[0] == dt.date(2024, 1, 12)
+    assert all(expiration.weekday() == 4 for expiration in expirations)
+
+    chain = synthetic.get_options_chain("XYZ", expirations[3])
+    atm = chain.calls["strike"].sub(100.0).abs().idxmin()
+
+    assert chain.calls.shape[0] == chain.puts.shape[0] == 41
+    assert (chain.calls["bid"] <= chain.calls["ask"]).all()
+    assert chain.calls["lastPrice"].is_monotonic_decreasing
+    assert chain.puts["lastPrice"].is_monotonic_increasing
+    assert chain.calls.loc[atm, "lastPrice"] > chain.puts.loc[atm, "lastPrice"]
+
+    history = get_stock_history("XYZ", 3, provider=synthetic)
+
+    assert history.shape[0] == 63
+    assert history["Close"].iloc[-1] == pytest.approx(100.0)
+    assert (history["Low"] <= history["High"]).all()
+
+
+def test_synthetic_provider_is_deterministic(synthetic):
+    other = SyntheticProvider({"XYZ": 100.0}, start_date=dt.date(2024, 1, 8))
+    expiration = synthetic.get_expirations("XYZ")[0]
+
+    assert synthetic.get_options_chain("XYZ", expiration).calls.equals(
+        other.get_options_chain("XYZ", expiration).calls
+    )
+    assert synthetic.get_stock_history("XYZ", 6).equals(
+        other.get_stock_history("XYZ", 6)
+    )
+    assert not synthetic.get_stock_history("XYZ", 6).equals(
+        SyntheticProvider(
+            {"XYZ": 100.0}, start_date=dt.date(2024, 1, 8), seed=1
+        ).get_stock_history("XYZ", 6)
+    )
+
+
+def test_bulk_fetch_from_provider(synthetic):
+    pairs = [("XYZ", expiration) for expiration in synthetic.get_expirations("XYZ")]
+    results = list(get_options_chains(pairs, rate=1000.0, provider=synthetic))
+
+    assert len(results) == len(pairs)
+    assert all(result.error is None for result in results)
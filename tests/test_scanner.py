@@ -0,0 +1,111 @@
+import datetime as dt
+from itertools import product
+
+import numpy as np
+import pytest
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+from optionsmonkey.providers import SyntheticProvider
+from optionsmonkey.scanner import get_strategy, scan_strategies
+
+START_DATE = dt.date(2024, 1, 8)
+
+
+@pytest.fixture
+def chain():
+    provider = SyntheticProvider({"XYZ": 100.0}, nstrikes=21, start_date=START_DATE)
+
+    return provider.get_options_chain("XYZ", dt.date(2024, 2, 16))
+
+
+def test_candidates_match_engine(chain):
+    for strategy in ("bull-call", "iron-condor", "covered-call", "strangle"):
+        # The candidate closest to an even chance of profit
+        candidate = scan_strategies(
+            chain,
+            28,
+            0.3,
+            interest_rate=0.045,
+            strategies=[strategy],
+            metric=lambda c: -abs(c["probability_of_profit"] - 0.5),
+            k=1,
+        ).iloc[0]
+        inputs = Inputs(
+            stock_price=100.0,
+            volatility=0.3,
+            interest_rate=0.045,
+            min_stock=0.01,
+            max_stock=200.0,
+            start_date=START_DATE,
+            target_date=dt.date(2024, 2, 16),
+            strategy=get_strategy(candidate, dt.date(2024, 2, 16)),
+        )
+        engine = StrategyEngine(inputs)
+        outputs = engine.run()
+        breakevens = [
+            bound
+            for bounds in outputs.profit_ranges
+            for bound in bounds
+            if 0.01 < bound < 200.0
+        ]
+
+        assert engine.days_to_target == 28
+        assert candidate["cost"] == pytest.approx(outputs.strategy_cost)
+        assert candidate["max_loss"] == pytest.approx(
+            outputs.minimum_return_in_the_domain, abs=1.0
+        )
+        assert candidate["probability_of_profit"] == pytest.approx(
+            outputs.probability_of_profit, abs=1e-3
+        )
+        assert candidate["breakevens"] == pytest.approx(breakevens, abs=0.02)
+
+        if np.isfinite(candidate["max_profit"]):
+            assert candidate["max_profit"] == pytest.approx(
+                outputs.maximum_return_in_the_domain
+            )
+
+
+def test_top_candidates(chain):
+    calls = chain.calls.sort_values("strike")
+    candidates = scan_strategies(
+        chain, 28, 0.3, strategies=["bull-call"], metric="cost", k=1000
+    )
+    expected = [
+        -100.0 * (buy.ask - sell.bid)
+        for buy, sell in product(calls.itertuples(), repeat=2)
+        if buy.strike < sell.strike and buy.ask > 0.0 and sell.bid > 0.0
+    ]
+
+    # All the candidates, from the highest to the lowest cost
+    assert candidates["cost"].tolist() == pytest.approx(sorted(expected)[::-1])
+    assert (candidates["max_loss"] == candidates["cost"]).all()
+    assert np.allclose(
+        candidates["max_profit"] - candidates["max_loss"],
+        [100.0 * (high - low) for low, high in candidates["strikes"]],
+    )
+
+    # The best ones are the same whatever the chunk size
+    best = scan_strategies(
+        chain,
+        28,
+        0.3,
+        strategies=["iron-condor", "bull-put"],
+        metric=lambda c: c["probability_of_profit"] * c["max_profit"],
+        k=5,
+    )
+
+    assert best.equals(
+        scan_strategies(
+            chain,
+            28,
+            0.3,
+            strategies=["iron-condor", "bull-put"],
+            metric=lambda c: c["probability_of_profit"] * c["max_profit"],
+            k=5,
+            chunk_size=7,
+        )
+    )
+
+    with pytest.raises(ValueError):
+        scan_strategies(chain, 28, 0.3, strategies=["butterfly"])
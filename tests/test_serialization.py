@@ -0,0 +1,52 @@
+import pickle
+
+import numpy as np
+
+from optionsmonkey.engine import StrategyEngine
+from optionsmonkey.models import Inputs
+from optionsmonkey.serialization import OutputsBatch, dumps_outputs, loads_outputs
+
+
+def test_outputs_round_trip(nvidia):
+    def strategy(strike):
+        return [
+            {"type": "stock", "n": 100, "action": "buy"},
+            {
+                "type": "call",
+                "strike": strike,
+                "premium": 4.1,
+                "n": 100,
+                "action": "sell",
+                "expiration": nvidia["target_date"],
+            },
+        ]
+
+    engines = [
+        StrategyEngine(Inputs.model_validate(nvidia | dict(strategy=strategy(185.0)))),
+        StrategyEngine(
+            Inputs.model_validate(
+                nvidia
+                | dict(
+                    strategy=strategy(175.0),
+                    profit_target=500.0,
+                    compute_expectation=True,
+                    var_confidence_levels=[0.95],
+                    seed=1,
+                )
+            )
+        ),
+    ]
+    outputs = [engine.run() for engine in engines]
+    buffer = dumps_outputs(outputs)
+    batch = loads_outputs(buffer)
+
+    assert len(batch) == 2
+    assert np.shares_memory(batch.columns["delta"], np.frombuffer(buffer, np.uint8))
+    assert [raw.to_pydantic() for raw in batch] == outputs
+    assert batch[0].value_at_risk is None
+    assert batch[1].profit_ranges.shape == (1, 2)
+
+    raw = [engine.run(validate=False) for engine in engines]
+    unpickled = pickle.loads(pickle.dumps(OutputsBatch.from_outputs(raw)))
+
+    assert [output.to_pydantic() for output in unpickled] == outputs
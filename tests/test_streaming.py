@@ -0,0 +1,152 @@
+import datetime as dt
+import threading
+
+import pytest
+
+from optionsmonkey.chain_archive import ChainArchive
+from optionsmonkey.models import Inputs
+from optionsmonkey.providers import SyntheticProvider
+from optionsmonkey.streaming import QuoteUpdate, SubscriptionEngine, replay_updates
+
+EXPIRATION = dt.date(2024, 2, 16)
+
+
+def make_inputs(stock_price, strike, optype="call"):
+    return Inputs(
+        stock_price=stock_price,
+        volatility=0.3,
+        interest_rate=0.045,
+        min_stock=stock_price * 0.5,
+        max_stock=stock_price * 1.5,
+        start_date=dt.date(2024, 1, 8),
+        target_date=EXPIRATION,
+        strategy=[
+            {
+                "type": optype,
+                "strike": strike,
+                "premium": 2.0,
+                "n": 100,
+                "action": "buy",
+                "expiration": EXPIRATION,
+            }
+        ],
+    )
+
+
+@pytest.fixture
+def engine():
+    engine = SubscriptionEngine()
+    engine.subscribe("a", "XYZ", make_inputs(100.0, 105.0))
+    engine.subscribe("b", "XYZ", make_inputs(100.0, 95.0, "put"))
+    engine.subscribe("c", "ABC", make_inputs(50.0, 55.0))
+    engine.run([])
+
+    return engine
+
+
+def test_targeted_reevaluation(engine):
+    assert set(engine.results) == {"a", "b", "c"}
+    assert engine.results["a"].strategy_cost == pytest.approx(-200.0)
+
+    # Only the strategy holding the contract is evaluated, once, with the
+    # latest quote
+    for ask in (2.5, 3.0):
+        engine.publish(
+            QuoteUpdate("xyz", ask - 0.1, ask - 0.2, ask, "call", 105.0, EXPIRATION)
+        )
+
+    engine.publish(QuoteUpdate("XYZ", 1.0, 0.9, 1.1, "call", 110.0, EXPIRATION))
+
+    assert engine.queue_depth == 3
+    assert set(engine.process()) == {"a"}
+    assert engine.results["a"].strategy_cost == pytest.approx(-300.0)
+
+    # A stock price update re-evaluates all the strategies on the stock
+    engine.publish(QuoteUpdate("XYZ", 101.0))
+
+    assert set(engine.process()) == {"a", "b"}
+    assert engine.results["a"].strategy_cost == pytest.approx(-300.0)
+    assert engine.stats.updates == 4
+    assert engine.stats.evaluations == 6
+    assert engine.stats.latency(99) > 0.0
+
+    engine.unsubscribe("a")
+    engine.publish(QuoteUpdate("XYZ", 102.0))
+
+    assert set(engine.process()) == {"b"}
+    assert "a" not in engine.results
+
+
+def test_serve(engine):
+    evaluated = threading.Event()
+    engine.on_result = lambda key, outputs: evaluated.set()
+    stop = threading.Event()
+    worker = threading.Thread(target=engine.serve, args=(stop,))
+    worker.start()
+
+    try:
+        engine.publish(QuoteUpdate("ABC", 51.0))
+
+        assert evaluated.wait(10.0)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert engine.stats.max_queue_depth <= 1
+
+
+def test_failed_evaluations(engine):
+    evaluate = engine.evaluate
+    reported = []
+
+    def failing(inputs):
+        if inputs.strategy[0].type == "put":
+            raise RuntimeError("No quotes")
+
+        # Unsubscribed while being evaluated
+        engine.unsubscribe("a")
+
+        return evaluate(inputs)
+
+    engine.evaluate = failing
+    engine.on_result = lambda key, outputs: reported.append(key)
+    engine.on_error = lambda key, error: reported.append((key, str(error)))
+    engine.publish(QuoteUpdate("XYZ", 101.0))
+
+    assert engine.process() == {}
+    assert reported == [("b", "No quotes")]
+    assert list(engine.errors) == ["b"] and engine.stats.errors == 1
+    assert "a" not in engine.results
+
+    # Evaluated again on the next update
+    engine.evaluate = evaluate
+    engine.publish(QuoteUpdate("XYZ", 102.0))
+
+    assert set(engine.process()) == {"b"}
+    assert engine.errors == {}
+
+
+def test_replay_updates(tmp_path):
+    archive = ChainArchive(tmp_path)
+    provider = SyntheticProvider({"XYZ": 100.0}, start_date=dt.date(2024, 1, 8))
+    expirations = provider.get_expirations("XYZ")[:2]
+
+    for date in (dt.date(2024, 1, 8), dt.date(2024, 1, 9)):
+        chains = {
+            expiration: provider.get_options_chain("XYZ", expiration)
+            for expiration in expirations
+        }
+
+        if date.day == 9:
+            chains[expirations[0]].calls.loc[0, "ask"] += 0.05
+
+        archive.append("XYZ", date, chains)
+
+    updates = list(replay_updates(archive.snapshots("XYZ")))
+    noptions = 4 * provider.nstrikes
+
+    # Every quote of the first snapshot, then the changed one only
+    assert len(updates) == 1 + noptions + 1
+    assert updates[0] == QuoteUpdate("XYZ", 100.0)
+    assert updates[-1].option_type == "call"
+    assert updates[-1].expiration == expirations[0]
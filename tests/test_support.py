@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from optionsmonkey.support import (
+    PriceGridRegistry,
+    createpriceseq,
+    get_pop_batch,
+    get_profit_ranges,
+    get_tail_risk,
+    getPoP,
+    getprofitrange,
+)
+
+
+@pytest.mark.parametrize("source", ["black-scholes", "normal", "laplace"])
+def test_get_pop_batch_matches_getpop(source):
+    ranges = [
+        [(150.0, 170.0)],
+        [],
+        [(0.0, 160.0), (175.0, float("inf"))],
+        [(164.9, float("inf"))],
+        [(150.0, 1e40)],
+    ]
+    kwargs = dict(
+        stockprice=168.99,
+        volatility=0.483,
+        time2maturity=23 / 252,
+        interestrate=0.045,
+        dividendyield=0.01,
+    )
+
+    lower = np.array([r[0] for strat in ranges for r in strat])
+    upper = np.array([r[1] for strat in ranges for r in strat])
+    offsets = np.cumsum([0] + [len(strat) for strat in ranges])
+
+    # Far-out bounds must not overflow
+    with np.errstate(over="raise"):
+        pop = get_pop_batch(lower, upper, offsets, source, **kwargs)
+
+    assert pop.shape == (len(ranges),)
+    assert pop[1] == 0.0
+
+    for i, strat in enumerate(ranges):
+        assert pop[i] == pytest.approx(getPoP(strat, source, **kwargs), abs=1e-12)
+
+
+def test_get_pop_batch_per_strategy_parameters():
+    pop = get_pop_batch(
+        [100.0, 100.0],
+        [float("inf"), float("inf")],
+        [0, 1, 2],
+        "normal",
+        stockprice=np.array([100.0, 120.0]),
+        volatility=0.3,
+        time2maturity=0.25,
+    )
+
+    assert pop[0] == pytest.approx(0.5)
+    assert pop[1] > pop[0]
+
+
+def test_get_pop_batch_invalid_offsets():
+    with pytest.raises(ValueError):
+        get_pop_batch(
+            [1.0], [2.0], [0, 2], stockprice=1.0, volatility=0.2, time2maturity=0.1
+        )
+
+
+def test_get_profit_ranges_multiple_targets():
+    s = np.round(np.arange(0, 1001) * 0.01 + 10.0, 2)
+    profit = np.where(s < 15.0, 20.0 - s, s - 16.0)
+
+    ranges = get_profit_ranges(s, profit, [0.01, 3.0, 100.0])
+
+    assert len(ranges) == 3
+    np.testing.assert_array_equal(ranges[0], [[0.0, 14.99], [16.01, np.inf]])
+    np.testing.assert_array_equal(ranges[1], [[0.0, 14.99], [19.0, np.inf]])
+    assert ranges[2].shape == (0, 2)
+    assert getprofitrange(s, profit, 3.0) == ranges[1].tolist()
+
+
+def test_get_tail_risk_matches_sort():
+    rng = np.random.default_rng(0)
+    profit = rng.normal(0.0, 100.0, 10001)
+
+    var, cvar, quantiles = get_tail_risk(profit, [0.95, 0.99], [0.0, 0.5, 1.0])
+
+    ordered = np.sort(profit)
+    k = np.floor(np.array([0.05, 0.01]) * profit.shape[0]).astype(int)
+
+    np.testing.assert_allclose(var, -ordered[k])
+    np.testing.assert_allclose(cvar, [-ordered[: i + 1].mean() for i in k])
+    np.testing.assert_array_equal(
+        quantiles, [ordered[0], np.median(ordered), ordered[-1]]
+    )
+    assert (cvar >= var).all()
+
+
+def test_createpriceseq():
+    for step in (0.015, 0.0125, 0.5):
+        grid = createpriceseq(10.0, 20.3, step)
+
+        np.testing.assert_allclose(np.diff(grid), step)
+        assert grid[-1] == pytest.approx(10.0 + step * round(10.3 / step))
+
+    np.testing.assert_array_equal(
+        createpriceseq(1.0, 1.045, 0.015), [1.0, 1.015, 1.03, 1.045]
+    )
+
+
+def test_price_grid_registry_shares_read_only_grids():
+    registry = PriceGridRegistry(max_bytes=2 * 1001 * 8)
+
+    grid = registry.get(10.0, 20.0)
+    again = registry.get(10.0, 20.0)
+
+    np.testing.assert_array_equal(grid, createpriceseq(10.0, 20.0))
+    assert np.shares_memory(grid, again)
+    assert not grid.flags.writeable
+
+    with pytest.raises(ValueError):
+        grid[0] = 0.0
+
+    registry.get(20.0, 30.0)
+    registry.get(30.0, 40.0)
+
+    assert len(registry) == 2
+    assert registry.nbytes <= registry.max_bytes
+    assert not np.shares_memory(registry.get(10.0, 20.0), grid)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from optionsmonkey import volatility
+
+
+@pytest.fixture
+def ohlc():
+    # Random walks of 3 tickers over 60 days, with overnight gaps
+    rng = np.random.default_rng(0)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, (3, 60)), axis=1))
+    open = close * np.exp(rng.normal(0.0, 0.01, close.shape))
+    high = np.maximum(open, close) * np.exp(rng.uniform(0.0, 0.01, close.shape))
+    low = np.minimum(open, close) * np.exp(-rng.uniform(0.0, 0.01, close.shape))
+
+    return open, high, low, close
+
+
+def rolling(values, window, stat):
+    return np.array(
+        [getattr(pd.Series(row).rolling(window), stat)().to_numpy() for row in values]
+    )
+
+
+def test_close_to_close(ohlc):
+    close = ohlc[3]
+    returns = np.log(close / np.roll(close, 1, axis=1))
+    returns[:, 0] = np.nan
+    expected = rolling(returns, 10, "std") * np.sqrt(252)
+
+    assert np.allclose(volatility.close_to_close(close, 10), expected, equal_nan=True)
+    assert np.isnan(volatility.close_to_close(close, 10)[:, :10]).all()
+    assert np.allclose(
+        volatility.close_to_close(close[0], 10), expected[0], equal_nan=True
+    )
+
+
+def test_range_estimators(ohlc):
+    open, high, low, close = ohlc
+    parkinson = np.log(high / low) ** 2 / (4.0 * np.log(2.0))
+    garman_klass = (
+        0.5 * np.log(high / low) ** 2
+        - (2.0 * np.log(2.0) - 1.0) * np.log(close / open) ** 2
+    )
+
+    assert np.allclose(
+        volatility.parkinson(high, low, 5),
+        np.sqrt(rolling(parkinson, 5, "mean") * 252),
+        equal_nan=True,
+    )
+    assert np.allclose(
+        volatility.garman_klass(open, high, low, close, 5),
+        np.sqrt(rolling(garman_klass, 5, "mean") * 252),
+        equal_nan=True,
+    )
+
+    with pytest.raises(ValueError):
+        volatility.parkinson(high, low[:, 1:])
+
+
+def test_yang_zhang(ohlc):
+    open, high, low, close = ohlc
+    window = 10
+    k = 0.34 / (1.34 + (window + 1) / (window - 1))
+    estimates = volatility.yang_zhang(open, high, low, close, window)
+
+    for day in (window, 30, 59):
+        days = slice(day - window + 1, day + 1)
+        o, h, l, c = open[:, days], high[:, days], low[:, days], close[:, days]
+        overnight = np.log(o / close[:, day - window : day])
+        rogers_satchell = np.log(h / c) * np.log(h / o) + np.log(l / c) * np.log(l / o)
+        variance = (
+            overnight.var(axis=1, ddof=1)
+            + k * np.log(c / o).var(axis=1, ddof=1)
+            + (1.0 - k) * rogers_satchell.mean(axis=1)
+        )
+
+        assert np.allclose(estimates[:, day], np.sqrt(variance * 252))
+
+    assert np.isnan(estimates[:, :window]).all()
+
+
+def test_ewma(ohlc):
+    close = ohlc[3]
+    squared = np.log(close[:, 1:] / close[:, :-1]) ** 2
+    variance = squared[:, 0].copy()
+    estimates = volatility.ewma(close, 0.9)
+
+    for day in range(1, close.shape[1]):
+        variance = 0.9 * variance + 0.1 * squared[:, day - 1]
+
+        assert np.allclose(estimates[:, day], np.sqrt(variance * 252))
+
+    assert np.isnan(estimates[:, 0]).all()
+
+
+def test_missing_prices(ohlc):
+    close = ohlc[3].copy()
+    close[1, 30] = np.nan
+    estimates = volatility.close_to_close(close, 10)
+
+    # Only the windows holding the returns to and from the missing price
+    assert np.isnan(estimates[1, 30:41]).all()
+    assert np.isfinite(estimates[1, 41:]).all()
+    assert np.isfinite(estimates[[0, 2], 10:]).all()